@@ -1,5 +1,6 @@
 import os
 import sys
+import multiprocessing
 import tkinter as tk
 
 import darkdetect
@@ -87,5 +88,7 @@ class SmartUtilityHub(ttk.Window):
 
 
 if __name__ == "__main__":
+    # Needed for the optional process-pool hashing in frozen (PyInstaller) builds.
+    multiprocessing.freeze_support()
     app = SmartUtilityHub()
     app.mainloop()
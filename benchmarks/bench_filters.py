@@ -0,0 +1,183 @@
+"""Filter throughput benchmark: per-file fnmatch checks versus the compiled matchers.
+
+Runs a synthetic listing (1M names by default) through File Search and
+Duplicate Finder rules and reports files/second for each implementation:
+
+    python -m benchmarks.bench_filters --files 1000000 --per-dir 100
+"""
+import argparse
+import fnmatch
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.engine.filters import (  # noqa: E402
+    DuplicateMatcher,
+    SearchMatcher,
+    normalize_include_filters,
+    normalize_query,
+)
+
+EXTENSIONS = [".pdf", ".log", ".txt", ".docx", ".tmp", ".jpg", ".py", ".csv"]
+FOLDER_TOKENS = {"node_modules", "git", "__pycache__", "venv"}
+NAME_PATTERNS = {"*.tmp", "thumbs.db", "~$*", "*.bak"}
+INCLUDES = {".pdf", ".log", "*.report", ".csv"}
+
+
+# The per-file checks the tools used before the matchers were compiled.
+def legacy_query_matches(filename, lowered_query, use_wildcards):
+    lname = filename.lower()
+    if use_wildcards:
+        return fnmatch.fnmatch(lname, lowered_query)
+    return lowered_query in lname
+
+
+def legacy_matches_includes(filename, filters):
+    lname = filename.lower()
+    ext = os.path.splitext(lname)[1]
+    for ftype, value in filters:
+        if ftype == "ext" and ext == value:
+            return True
+        if ftype == "pattern" and fnmatch.fnmatch(lname, value):
+            return True
+    return False
+
+
+def legacy_search_excluded(folder, name, folder_tokens, name_patterns):
+    full_lower = os.path.join(folder, name).lower()
+    lname = name.lower()
+    for tok in folder_tokens:
+        if tok in full_lower:
+            return True
+    for pattern in name_patterns:
+        if fnmatch.fnmatch(lname, pattern):
+            return True
+    return False
+
+
+def legacy_duplicate_excluded(folder, name, folder_tokens, name_patterns):
+    full_lower = os.path.join(folder, name).lower()
+    base = name.lower()
+    for tok in folder_tokens:
+        if tok in full_lower:
+            return True
+    for pattern in name_patterns:
+        if any(ch in pattern for ch in "*?"):
+            if fnmatch.fnmatch(base, pattern) or fnmatch.fnmatch(full_lower, pattern):
+                return True
+        else:
+            if pattern in base or pattern in full_lower:
+                return True
+    return False
+
+
+def legacy_matches_filter(full_path, filename, pattern, has_wildcard):
+    if not pattern:
+        return True
+    full_lower = full_path.lower()
+    file_lower = filename.lower()
+    if has_wildcard:
+        return fnmatch.fnmatch(file_lower, pattern) or fnmatch.fnmatch(full_lower, pattern)
+    return pattern in file_lower or pattern in full_lower
+
+
+def synthetic_listing(files, per_dir):
+    listing = []
+    for start in range(0, files, per_dir):
+        d = start // per_dir
+        folder = os.path.join(os.sep, "home", "user", f"Project{d % 97:02d}", f"Src{d:06d}")
+        names = [
+            f"Report_{i:07d}{EXTENSIONS[i % len(EXTENSIONS)]}" for i in range(start, min(start + per_dir, files))
+        ]
+        listing.append((folder, names))
+    return listing
+
+
+def legacy_search(listing, query):
+    lowered_query, use_wildcards = normalize_query(query)
+    include_filters = normalize_include_filters(INCLUDES)
+    count = 0
+    for folder, names in listing:
+        for name in names:
+            if not legacy_query_matches(name, lowered_query, use_wildcards):
+                continue
+            if legacy_search_excluded(folder, name, FOLDER_TOKENS, NAME_PATTERNS):
+                continue
+            if not legacy_matches_includes(name, include_filters):
+                continue
+            count += 1
+    return count
+
+
+def compiled_search(listing, query):
+    matcher = SearchMatcher(query, INCLUDES, FOLDER_TOKENS, NAME_PATTERNS)
+    count = 0
+    for folder, names in listing:
+        accept = matcher.for_folder(folder)
+        if accept is None:
+            continue
+        for name in names:
+            if accept(name):
+                count += 1
+    return count
+
+
+def legacy_dupes(listing, pattern):
+    has_wildcard = any(ch in pattern for ch in "*?")
+    count = 0
+    for folder, names in listing:
+        for name in names:
+            if pattern and not legacy_matches_filter(os.path.join(folder, name), name, pattern, has_wildcard):
+                continue
+            if legacy_duplicate_excluded(folder, name, FOLDER_TOKENS, NAME_PATTERNS):
+                continue
+            count += 1
+    return count
+
+
+def compiled_dupes(listing, pattern):
+    matcher = DuplicateMatcher(pattern, FOLDER_TOKENS, NAME_PATTERNS)
+    count = 0
+    for folder, names in listing:
+        accept = matcher.for_folder(folder)
+        if accept is None:
+            continue
+        for name in names:
+            if accept(name):
+                count += 1
+    return count
+
+
+def run(label, func, listing, argument, files):
+    started = time.perf_counter()
+    count = func(listing, argument)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28}: {count:>9} kept in {elapsed:6.2f}s ({files / elapsed:>12,.0f} files/s)")
+    return count, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=1_000_000)
+    parser.add_argument("--per-dir", type=int, default=100, help="names per synthetic folder")
+    parser.add_argument("--query", default="report_*", help="File Search query")
+    parser.add_argument("--pattern", default="*.pdf", help="Duplicate Finder name filter")
+    args = parser.parse_args(argv)
+
+    listing = synthetic_listing(args.files, args.per_dir)
+    print(f"{args.files} names in {len(listing)} folders")
+    for kind, legacy, compiled, argument in (
+        ("search", legacy_search, compiled_search, args.query),
+        ("dupes", legacy_dupes, compiled_dupes, args.pattern),
+    ):
+        legacy_count, legacy_time = run(f"{kind}: per-file fnmatch", legacy, listing, argument, args.files)
+        compiled_count, compiled_time = run(f"{kind}: compiled matcher", compiled, listing, argument, args.files)
+        if legacy_count != compiled_count:
+            print(f"{kind}: MISMATCH ({legacy_count} vs {compiled_count})")
+        print(f"{kind + ': speed-up':<28}: {legacy_time / compiled_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
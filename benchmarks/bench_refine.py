@@ -0,0 +1,54 @@
+"""Search-as-you-type benchmark: refining a finished result set per keystroke.
+
+Fills a ResultStore with synthetic names (1M by default), then types each
+query one character at a time and reports how long every refinement takes,
+chained from the previous keystroke as File Search does:
+
+    python -m benchmarks.bench_refine --names 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_trigram import synthetic_names  # noqa: E402
+from modules.engine.options import SearchFilters  # noqa: E402
+from modules.engine.results import ResultStore  # noqa: E402
+from modules.engine.search import ResultRefiner  # noqa: E402
+
+QUERIES = ["invoice_2021", "budget_final", "readme_index"]
+ROOT = os.path.join(os.sep, "bench")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--names", type=int, default=1_000_000)
+    parser.add_argument("--folders", type=int, default=10_000)
+    parser.add_argument("--query", action="append", default=None, help="query to type (repeatable)")
+    args = parser.parse_args(argv)
+
+    store = ResultStore()
+    folders = [os.path.join(ROOT, f"folder{i:05d}") for i in range(max(args.folders, 1))]
+    for i, name in enumerate(synthetic_names(args.names)):
+        store.append(folders[i % len(folders)], name, i)
+    filters = SearchFilters()
+    started = time.perf_counter()
+    base = ResultRefiner([ROOT], "", filters, store)
+    print(f"{args.names} names, prepared in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    for query in args.query or QUERIES:
+        refiner = base
+        worst = 0.0
+        for end in range(1, len(query) + 1):
+            started = time.perf_counter()
+            refiner = refiner.refine(query[:end], filters)
+            elapsed = time.perf_counter() - started
+            worst = max(worst, elapsed)
+            print(f"  {query[:end]:<16}: {len(refiner.store):>8} results  {elapsed * 1000:7.1f} ms")
+        print(f"{query}: slowest keystroke {worst * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Result storage memory benchmark: per-file dicts versus the engine's columnar stores.
+
+Builds synthetic search results (1M by default) and duplicate groups, the
+way a large scan would, and reports traced bytes per result for each layout:
+
+    python -m benchmarks.bench_results --results 1000000
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.engine.results import DuplicateStore, ResultStore  # noqa: E402
+from modules.engine.search import make_result  # noqa: E402
+
+BASE = os.path.join(os.sep, "data", "projects", "archive")
+
+
+def synthetic_matches(results, per_dir):
+    # One folder string per directory, shared by its files, as the walkers yield them.
+    folder = None
+    for i in range(results):
+        if i % per_dir == 0:
+            folder = os.path.join(BASE, f"client{i // (per_dir * 100):04d}", f"batch{i // per_dir:06d}")
+        yield folder, f"report_{i:08d}.pdf", 1000 + i % 50_000
+
+
+def dict_results(results, per_dir):
+    return [make_result(folder, name, size) for folder, name, size in synthetic_matches(results, per_dir)]
+
+
+def store_results(results, per_dir):
+    store = ResultStore()
+    for folder, name, size in synthetic_matches(results, per_dir):
+        store.append(folder, name, size)
+    return store
+
+
+def iter_groups(results, per_dir, copies):
+    # Group dicts handed over one at a time, the way find_duplicates yields them.
+    paths = []
+    count = 0
+    for folder, name, size in synthetic_matches(results, per_dir):
+        paths.append(os.path.join(folder, name))
+        if len(paths) == copies:
+            yield {"hash": f"{count:040x}", "name": name, "size": size, "paths": paths}
+            count += 1
+            paths = []
+
+
+def dict_groups(results, per_dir, copies):
+    return list(iter_groups(results, per_dir, copies))
+
+
+def store_groups(results, per_dir, copies):
+    store = DuplicateStore()
+    for group in iter_groups(results, per_dir, copies):
+        store.add(group)
+    return store
+
+
+def measure(build, *args):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    value = build(*args)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del value
+    return current, peak, elapsed
+
+
+def report(label, results, current, peak, elapsed):
+    print(
+        f"{label:<22}: {current / results:7.1f} B/result  "
+        f"({current / 2**20:8.1f} MB held, {peak / 2**20:8.1f} MB peak, {elapsed:5.2f}s)"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--results", type=int, default=1_000_000)
+    parser.add_argument("--per-dir", type=int, default=50, help="results per synthetic folder")
+    parser.add_argument("--copies", type=int, default=2, help="paths per synthetic duplicate group")
+    args = parser.parse_args(argv)
+
+    print(f"{args.results} results, {args.per_dir} per folder")
+    dict_stats = measure(dict_results, args.results, args.per_dir)
+    store_stats = measure(store_results, args.results, args.per_dir)
+    report("search: dicts", args.results, *dict_stats)
+    report("search: ResultStore", args.results, *store_stats)
+    print(f"{'search: saving':<22}: {dict_stats[0] / store_stats[0]:.1f}x")
+
+    dict_stats = measure(dict_groups, args.results, args.per_dir, args.copies)
+    store_stats = measure(store_groups, args.results, args.per_dir, args.copies)
+    report("dupes: path lists", args.results, *dict_stats)
+    report("dupes: DuplicateStore", args.results, *store_stats)
+    print(f"{'dupes: saving':<22}: {dict_stats[0] / store_stats[0]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
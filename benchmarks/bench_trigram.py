@@ -0,0 +1,80 @@
+"""Filename query benchmark: linear scan versus the trigram index.
+
+Builds a synthetic name list (5M by default), indexes it and reports
+per-query latency for substring and wildcard queries against a full scan:
+
+    python -m benchmarks.bench_trigram --names 5000000
+"""
+import argparse
+import fnmatch
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.engine.filters import normalize_query  # noqa: E402
+from modules.engine.trigram import TrigramIndex  # noqa: E402
+
+WORDS = [
+    "report", "invoice", "summary", "backup", "photo", "scan", "draft", "final", "budget", "notes",
+    "index", "config", "readme", "module", "release", "archive", "export", "client", "project", "meeting",
+]
+EXTENSIONS = [".pdf", ".docx", ".xlsx", ".jpg", ".png", ".txt", ".log", ".js", ".py", ".zip"]
+QUERIES = ["invoice_2021", "budget_final*", "readme", "photo_*_201?_*", "*.xlsx", "zzq", "meeting*client*.pdf"]
+
+
+def synthetic_names(count, seed=1):
+    rng = random.Random(seed)
+    for i in range(count):
+        first, second = rng.choice(WORDS), rng.choice(WORDS)
+        yield f"{first}_{second}_{rng.randint(2000, 2025)}_{i:07d}{rng.choice(EXTENSIONS)}"
+
+
+def linear_match(names, query):
+    lowered_query, use_wildcards = normalize_query(query)
+    if use_wildcards:
+        return [i for i, name in enumerate(names) if fnmatch.fnmatch(name, lowered_query)]
+    return [i for i, name in enumerate(names) if lowered_query in name]
+
+
+def best_of(repeats, func, *args):
+    best = None
+    result = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--names", type=int, default=5_000_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--query", action="append", default=None, help="query to time (repeatable)")
+    parser.add_argument("--skip-linear", action="store_true", help="only time the trigram index")
+    args = parser.parse_args(argv)
+
+    index = TrigramIndex()
+    started = time.perf_counter()
+    for name in synthetic_names(args.names):
+        index.add(name)
+    print(
+        f"indexed {args.names} names ({len(index.postings)} trigrams) in {time.perf_counter() - started:.1f}s"
+    )
+
+    for query in args.query or QUERIES:
+        hits, trigram_time = best_of(args.repeats, index.match, query)
+        line = f"{query:<22}: {len(hits):>8} hits  trigram {trigram_time * 1000:8.1f} ms"
+        if not args.skip_linear:
+            expected, linear_time = best_of(1, linear_match, index.names, query)
+            status = "" if expected == hits else "  MISMATCH"
+            line += f"  linear {linear_time * 1000:8.1f} ms{status}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Directory walk benchmark: os.walk + getsize versus the engine's scandir walker.
+
+Builds a synthetic tree (1M empty files by default; reuse one with --root)
+and times a full walk that sizes every file, the way duplicate scans do:
+
+    python -m benchmarks.bench_walk --files 1000000 --keep
+    python -m benchmarks.bench_walk --root /tmp/suh-walk-bench-xxxx
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.engine.walk import scandir_walk  # noqa: E402
+
+
+def make_tree(folder, files, per_dir, fan_out):
+    created = 0
+    queue = [folder]
+    while created < files:
+        current = queue.pop(0)
+        for i in range(min(per_dir, files - created)):
+            open(os.path.join(current, f"file{i:04d}.dat"), "wb").close()
+            created += 1
+        for i in range(fan_out):
+            child = os.path.join(current, f"dir{i:02d}")
+            os.mkdir(child)
+            queue.append(child)
+    return created
+
+
+def legacy_walk(root_folder, max_depth, tokens):
+    count = total = 0
+    for current_root, dirs, files in os.walk(root_folder):
+        rel = os.path.relpath(current_root, root_folder)
+        depth = 0 if rel == "." else rel.count(os.sep)
+        if tokens:
+            dirs[:] = [d for d in dirs if not any(tok in os.path.join(current_root, d).lower() for tok in tokens)]
+        if max_depth is not None and depth >= max_depth:
+            dirs[:] = []
+        for f in files:
+            try:
+                total += os.path.getsize(os.path.join(current_root, f))
+            except OSError:
+                continue
+            count += 1
+    return count, total
+
+
+def engine_walk(root_folder, max_depth, tokens):
+    count = total = 0
+    for _root, _dirs, files in scandir_walk(root_folder, max_depth, tokens):
+        for entry in files:
+            try:
+                total += entry.stat().st_size
+            except OSError:
+                continue
+            count += 1
+    return count, total
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root", help="walk an existing tree instead of generating one")
+    parser.add_argument("--files", type=int, default=1_000_000)
+    parser.add_argument("--per-dir", type=int, default=100, help="files per generated folder")
+    parser.add_argument("--fan-out", type=int, default=10, help="sub-folders per generated folder")
+    parser.add_argument("--exclude", action="append", default=[], metavar="TOKEN", help="folder exclusion token")
+    parser.add_argument("--keep", action="store_true", help="leave the generated tree in place")
+    args = parser.parse_args(argv)
+
+    root = args.root
+    generated = root is None
+    if generated:
+        root = tempfile.mkdtemp(prefix="suh-walk-bench-")
+        started = time.perf_counter()
+        make_tree(root, args.files, args.per_dir, args.fan_out)
+        print(f"generated {args.files} files in {time.perf_counter() - started:.1f}s under {root}")
+
+    tokens = {tok.lower() for tok in args.exclude}
+    try:
+        # Warm the dentry cache so both walkers see the same conditions.
+        engine_walk(root, None, tokens)
+        (legacy_count, _), legacy_time = timed(legacy_walk, root, None, tokens)
+        (engine_count, _), engine_time = timed(engine_walk, root, None, tokens)
+        print(f"os.walk + getsize : {legacy_count:>9} files in {legacy_time:6.2f}s ({legacy_count / legacy_time:,.0f}/s)")
+        print(f"scandir walker    : {engine_count:>9} files in {engine_time:6.2f}s ({engine_count / engine_time:,.0f}/s)")
+        print(f"speed-up          : {legacy_time / engine_time:.2f}x")
+    finally:
+        if generated and not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
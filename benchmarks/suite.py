@@ -0,0 +1,252 @@
+"""Headless benchmark suite: search, size grouping and hashing on a generated tree.
+
+Generates a deterministic tree (see ``benchmarks.treegen``), runs each
+scenario in a fresh process (best of ``--repeat``; the first run also warms
+the page cache) and reports files/s, MB/s and the scenario's peak RSS.
+Results can be saved as a JSON baseline and compared on a later commit:
+
+    python -m benchmarks.suite --files 50000 --root /tmp/suh-tree --save before.json
+    python -m benchmarks.suite --files 50000 --root /tmp/suh-tree --compare before.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.treegen import MANIFEST, add_spec_arguments, generate_tree, load_tree, spec_from_args  # noqa: E402
+from modules.engine.duplicates import collect_sizes, find_duplicates  # noqa: E402
+from modules.engine.hashing import DEFAULT_ALGORITHM, hash_file  # noqa: E402
+from modules.engine.options import DuplicateOptions, SearchFilters  # noqa: E402
+from modules.engine.search import search_matches  # noqa: E402
+from modules.engine.stats import ScanStats  # noqa: E402
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+SCENARIOS = ("search", "sizes", "dupes", "hash")
+# Higher is better for rates; lower is better for memory.
+RATE_METRICS = ("files_per_s", "mb_per_s")
+
+
+def peak_rss():
+    """Peak resident set size of this process in bytes, or ``None`` where it cannot be read."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class MemoryCounters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (name, ctypes.c_size_t)
+                for name in (
+                    "PeakWorkingSetSize",
+                    "WorkingSetSize",
+                    "QuotaPeakPagedPoolUsage",
+                    "QuotaPagedPoolUsage",
+                    "QuotaPeakNonPagedPoolUsage",
+                    "QuotaNonPagedPoolUsage",
+                    "PagefileUsage",
+                    "PeakPagefileUsage",
+                )
+            ]
+
+        counters = MemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        if ctypes.windll.psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize
+    return None
+
+
+def run_search(root, args):
+    matches = sum(1 for _match in search_matches([root], args.query, SearchFilters(walk_workers=args.walk_workers)))
+    # Every file is listed and tested against the query, matching or not.
+    return {"files": args.manifest["files"], "bytes": 0, "matches": matches}
+
+
+def _duplicate_options(args):
+    return DuplicateOptions(
+        excluded_folders=set(),
+        excluded_names={MANIFEST},
+        walk_workers=args.walk_workers,
+        workers=args.workers,
+        algorithm=args.algorithm,
+        use_cache=False,
+    )
+
+
+def run_sizes(root, args):
+    stats = ScanStats()
+    size_map = collect_sizes([root], _duplicate_options(args), stats=stats)
+    candidates = sum(len(paths) for paths in size_map.values() if len(paths) > 1)
+    return {"files": stats.files, "bytes": 0, "candidates": candidates}
+
+
+def run_dupes(root, args):
+    stats = ScanStats()
+    groups = list(find_duplicates([root], _duplicate_options(args), stats=stats))
+    return {"files": stats.files, "bytes": stats.bytes_read, "groups": len(groups)}
+
+
+def run_hash(root, args):
+    files = total = 0
+    for folder, _dirs, names in os.walk(root):
+        for name in names:
+            if name == MANIFEST:
+                continue
+            path = os.path.join(folder, name)
+            hash_file(path, args.algorithm)
+            files += 1
+            total += os.path.getsize(path)
+    return {"files": files, "bytes": total}
+
+
+RUNNERS = {"search": run_search, "sizes": run_sizes, "dupes": run_dupes, "hash": run_hash}
+
+
+def run_scenario(name, root, args):
+    """Run one scenario ``args.repeat`` times in this process and keep the fastest run."""
+    best = None
+    for _ in range(max(args.repeat, 1)):
+        started = time.perf_counter()
+        result = RUNNERS[name](root, args)
+        result["seconds"] = time.perf_counter() - started
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    seconds = max(best["seconds"], 1e-9)
+    best["files_per_s"] = best["files"] / seconds
+    best["mb_per_s"] = best["bytes"] / (1024 * 1024) / seconds if best["bytes"] else None
+    best["peak_rss"] = peak_rss()
+    return best
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _mb(value):
+    return "-" if value is None else f"{value / (1024 * 1024):.1f}"
+
+
+def report(results):
+    print(f"{'scenario':<8} {'files':>9} {'MB':>9} {'seconds':>8} {'files/s':>11} {'MB/s':>8} {'peak RSS MB':>12}")
+    for name, result in results.items():
+        rate = "-" if result["mb_per_s"] is None else f"{result['mb_per_s']:.1f}"
+        print(
+            f"{name:<8} {result['files']:>9} {_mb(result['bytes'] or None):>9} {result['seconds']:>8.2f} "
+            f"{result['files_per_s']:>11,.0f} {rate:>8} {_mb(result['peak_rss']):>12}"
+        )
+
+
+def compare(results, baseline, threshold):
+    """Print the change per metric against ``baseline``; return the regressions beyond ``threshold`` percent."""
+    regressions = []
+    print(f"\nagainst {baseline.get('commit') or 'baseline'} (threshold {threshold:g}%):")
+    for name, result in results.items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        changes = []
+        for metric in RATE_METRICS + ("peak_rss",):
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            worse = change < -threshold if metric in RATE_METRICS else change > threshold
+            changes.append(f"{metric} {change:+.1f}%{' REGRESSION' if worse else ''}")
+            if worse:
+                regressions.append((name, metric, change))
+        print(f"  {name:<8} " + ", ".join(changes))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_spec_arguments(parser)
+    parser.add_argument("--root", help="generate into (or reuse a matching tree in) this folder")
+    parser.add_argument("--keep", action="store_true", help="leave a temporary tree in place")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="scenario to run (repeatable)")
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs per scenario")
+    parser.add_argument("--query", default="report", help="name query for the search scenario")
+    parser.add_argument("--algorithm", default=DEFAULT_ALGORITHM)
+    parser.add_argument("--workers", type=int, default=DuplicateOptions().workers, help="hash workers for dupes")
+    parser.add_argument("--walk-workers", type=int, default=1)
+    parser.add_argument("--save", metavar="JSON", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="JSON", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change counted as a regression")
+    args = parser.parse_args(argv)
+
+    spec = spec_from_args(args)
+    root = args.root or tempfile.mkdtemp(prefix="suh-suite-")
+    temporary = args.root is None
+    try:
+        args.manifest = load_tree(root, spec)
+        if args.manifest is None:
+            if os.path.isdir(root) and os.listdir(root):
+                parser.error(f"{root} is not empty and holds no tree generated with this spec")
+            started = time.perf_counter()
+            args.manifest = generate_tree(root, spec)
+            print(f"generated {args.manifest['files']} files under {root} in {time.perf_counter() - started:.1f}s")
+        else:
+            print(f"reusing the tree under {root}")
+
+        results = {}
+        # A fresh process per scenario keeps each peak RSS to that scenario alone.
+        context = multiprocessing.get_context("spawn")
+        for name in args.scenario or SCENARIOS:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                results[name] = pool.submit(run_scenario, name, root, args).result()
+        report(results)
+
+        record = {
+            "commit": _git_commit(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "spec": asdict(spec),
+            "scenarios": results,
+        }
+        status = 0
+        if args.compare:
+            with open(args.compare, encoding="utf-8") as f:
+                baseline = json.load(f)
+            if baseline.get("spec") != record["spec"]:
+                print("warning: the baseline was measured on a tree with a different spec")
+            if compare(results, baseline, args.threshold):
+                status = 1
+        if args.save:
+            with open(args.save, "w", encoding="utf-8") as f:
+                json.dump(record, f, indent=2)
+            print(f"saved baseline to {args.save}")
+        return status
+    finally:
+        if temporary and not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
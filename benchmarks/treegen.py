@@ -0,0 +1,175 @@
+"""Deterministic synthetic file trees for the benchmark suite.
+
+The same ``TreeSpec`` always produces the same folders, names, sizes and
+contents, so timings from different commits describe the same work:
+
+    python -m benchmarks.treegen /tmp/suh-tree --files 20000 --depth 4 --fan-out 4 --dup-ratio 0.2
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass, fields
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_trigram import EXTENSIONS, WORDS  # noqa: E402
+
+MANIFEST = ".suh-tree.json"
+NAME_STYLES = ("words", "random", "numbered")
+SIZE_STYLES = ("fixed", "uniform", "lognormal")
+# Content is one seeded block repeated to length; large enough that partial
+# hashes of different files never collide by accident.
+BLOCK_SIZE = 256 * 1024
+
+
+@dataclass
+class TreeSpec:
+    files: int = 20_000
+    depth: int = 3
+    fan_out: int = 4
+    names: str = "words"
+    sizes: str = "lognormal"
+    mean_size: int = 64 * 1024
+    dup_ratio: float = 0.1
+    seed: int = 1
+
+
+def add_spec_arguments(parser):
+    defaults = TreeSpec()
+    parser.add_argument("--files", type=int, default=defaults.files)
+    parser.add_argument("--depth", type=int, default=defaults.depth, help="folder levels below the root")
+    parser.add_argument("--fan-out", type=int, default=defaults.fan_out, help="sub-folders per folder")
+    parser.add_argument("--names", choices=NAME_STYLES, default=defaults.names)
+    parser.add_argument("--sizes", choices=SIZE_STYLES, default=defaults.sizes)
+    parser.add_argument("--mean-kb", type=float, default=defaults.mean_size / 1024, help="mean file size")
+    parser.add_argument("--dup-ratio", type=float, default=defaults.dup_ratio, help="share of files that copy another")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def spec_from_args(args):
+    return TreeSpec(
+        files=args.files,
+        depth=args.depth,
+        fan_out=args.fan_out,
+        names=args.names,
+        sizes=args.sizes,
+        mean_size=int(args.mean_kb * 1024),
+        dup_ratio=min(max(args.dup_ratio, 0.0), 1.0),
+        seed=args.seed,
+    )
+
+
+def _folders(root, depth, fan_out):
+    folders = [root]
+    level = [root]
+    for d in range(depth):
+        level = [os.path.join(parent, f"dir{d}_{i:02d}") for parent in level for i in range(fan_out)]
+        folders.extend(level)
+    return folders
+
+
+def _name(rng, style, index):
+    if style == "numbered":
+        return f"file{index:08d}.dat"
+    if style == "random":
+        stem = "".join(rng.choices("abcdefghijklmnopqrstuvwxyz0123456789_-", k=rng.randint(6, 20)))
+        return f"{stem}_{index}{rng.choice(EXTENSIONS)}"
+    return f"{rng.choice(WORDS)}_{rng.choice(WORDS)}_{rng.randint(2000, 2025)}_{index:07d}{rng.choice(EXTENSIONS)}"
+
+
+def _size(rng, style, mean):
+    if style == "fixed":
+        return mean
+    if style == "uniform":
+        return rng.randint(0, 2 * mean)
+    # Median a little under the mean, with a long tail of large files.
+    return min(int(rng.lognormvariate(0, 1) * mean / 1.65), 64 * mean)
+
+
+def _write(path, content_id, size, seed):
+    block = random.Random(f"{seed}:{content_id}").randbytes(min(size, BLOCK_SIZE))
+    with open(path, "wb") as f:
+        remaining = size
+        while remaining > 0:
+            f.write(block[:remaining])
+            remaining -= len(block)
+
+
+def plan(root, spec):
+    """Yield ``(path, size, content_id)`` for every file ``spec`` describes, without touching the disk."""
+    rng = random.Random(spec.seed)
+    folders = _folders(root, spec.depth, spec.fan_out)
+    originals = []
+    for index in range(spec.files):
+        folder = rng.choice(folders)
+        name = _name(rng, spec.names, index)
+        if originals and rng.random() < spec.dup_ratio:
+            size, content_id = rng.choice(originals)
+        else:
+            size, content_id = _size(rng, spec.sizes, spec.mean_size), index
+            originals.append((size, content_id))
+        yield os.path.join(folder, name), size, content_id
+
+
+def generate_tree(root, spec):
+    """Create the tree for ``spec`` under ``root`` and return its manifest.
+
+    The manifest (also written to ``root/.suh-tree.json``) records the spec
+    with the file, byte and duplicate counts, so ``load_tree`` can reuse the
+    tree for a later run with the same spec.
+    """
+    os.makedirs(root, exist_ok=True)
+    for folder in _folders(root, spec.depth, spec.fan_out):
+        os.makedirs(folder, exist_ok=True)
+    files = total = duplicates = 0
+    seen = set()
+    for path, size, content_id in plan(root, spec):
+        _write(path, content_id, size, spec.seed)
+        files += 1
+        total += size
+        if content_id in seen:
+            duplicates += 1
+        seen.add(content_id)
+    manifest = {"spec": asdict(spec), "files": files, "bytes": total, "duplicates": duplicates}
+    with open(os.path.join(root, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_tree(root, spec=None):
+    """Return the manifest of a tree generated under ``root``, or ``None`` (also when its spec differs)."""
+    try:
+        with open(os.path.join(root, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if spec is not None and manifest.get("spec") != asdict(spec):
+        return None
+    return manifest
+
+
+def spec_from_manifest(manifest):
+    names = {f.name for f in fields(TreeSpec)}
+    return TreeSpec(**{key: value for key, value in manifest["spec"].items() if key in names})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root", help="folder to create the tree in")
+    add_spec_arguments(parser)
+    args = parser.parse_args(argv)
+
+    spec = spec_from_args(args)
+    started = time.perf_counter()
+    manifest = generate_tree(args.root, spec)
+    print(
+        f"generated {manifest['files']} files ({manifest['bytes'] / (1024 * 1024):.1f} MB, "
+        f"{manifest['duplicates']} duplicates) in {time.perf_counter() - started:.1f}s under {args.root}"
+    )
+
+
+if __name__ == "__main__":
+    main()
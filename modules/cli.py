@@ -0,0 +1,542 @@
+import argparse
+import csv
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from contextlib import nullcontext
+
+from modules.engine import (
+    ContentOptions,
+    DuplicateOptions,
+    HashCache,
+    ProgressReporter,
+    ScanProfiler,
+    ScanStats,
+    SearchFilters,
+    Watcher,
+    available_backends,
+    available_link_modes,
+    content_search,
+    find_duplicates,
+    find_similar_images,
+    images_available,
+    link_duplicates,
+    rollback_journal,
+    search,
+    sort_groups,
+    wasted_bytes,
+)
+from modules.engine.progress import start_ticker
+from modules.engine.search import make_result
+from modules.engine.storage import user_data_dir
+from modules.engine.filters import normalize_include_token
+from modules.engine.images import DEFAULT_IMAGE_HASH, IMAGE_HASHES
+from modules.engine.watch import BACKENDS, DEFAULT_DEBOUNCE, DEFAULT_POLL_INTERVAL, split_batch, update_indexes
+
+SEARCH_FIELDS = ("path", "folder", "name", "ext", "size")
+CONTENT_FIELDS = ("path", "line", "snippet", "folder", "name", "ext", "size")
+DUPE_FIELDS = ("hash", "size", "path")
+SIMILAR_FIELDS = ("hash", "size", "path", "distance")
+BLOCK_FIELDS = ("hash", "size", "path", "shared", "reclaimable")
+WATCH_FIELDS = ("event", "path", "is_dir")
+
+
+def _add_output_args(parser, progress=True):
+    if progress:
+        parser.add_argument(
+            "--progress",
+            action="store_true",
+            help="print folders/s, files/s, bytes/s and ETA to stderr twice a second",
+        )
+        parser.add_argument(
+            "--profile",
+            nargs="?",
+            const="",
+            default=None,
+            metavar="DIR",
+            help="time each scan stage and write a scan report (.txt, .json) to DIR "
+            "(default: the profiles folder in the app data)",
+        )
+        parser.add_argument(
+            "--profile-cpu",
+            action="store_true",
+            help="also run the scan under cProfile and write a .pstats file; implies --profile, slows the scan",
+        )
+        parser.add_argument(
+            "--profile-memory",
+            action="store_true",
+            help="also trace allocations with tracemalloc and write a .snapshot file; implies --profile, slows the scan",
+        )
+    fmt = parser.add_mutually_exclusive_group()
+    fmt.add_argument("--json", dest="fmt", action="store_const", const="json", help="JSON Lines output (default)")
+    fmt.add_argument("--csv", dest="fmt", action="store_const", const="csv", help="CSV output with a header row")
+    parser.set_defaults(fmt="json")
+
+
+def _add_filter_args(parser):
+    parser.add_argument("roots", nargs="+", metavar="ROOT", help="folder(s) to scan")
+    parser.add_argument("--max-depth", type=int, default=None, help="do not descend past this depth")
+    parser.add_argument(
+        "--exclude-folder", action="append", default=[], metavar="TOKEN", help="skip paths containing TOKEN"
+    )
+    parser.add_argument("--exclude-name", action="append", default=[], metavar="PATTERN", help="skip matching names")
+    parser.add_argument(
+        "--walk-workers",
+        type=int,
+        default=1,
+        metavar="N",
+        help="list folders on N threads (helps with several roots or network drives)",
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="smartutilityhub", description="Headless file search and duplicate scans for SmartUtilityHub."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p_search = commands.add_parser("search", help="find files by name or contents")
+    _add_filter_args(p_search)
+    p_search.add_argument(
+        "--query", "-q", default=None, help="substring or wildcard pattern (report*.pdf); optional with --content"
+    )
+    p_search.add_argument("--content", metavar="TEXT", help="search inside files for TEXT (one record per line)")
+    p_search.add_argument("--regex", action="store_true", help="treat --content as a regular expression")
+    p_search.add_argument("--case-sensitive", action="store_true", help="match --content case-sensitively")
+    p_search.add_argument(
+        "--max-filesize-mb",
+        type=float,
+        default=ContentOptions.max_file_size / (1024 * 1024),
+        metavar="MB",
+        help="skip files larger than this when searching contents (default 32)",
+    )
+    p_search.add_argument(
+        "--workers", type=int, default=None, metavar="N", help="files read concurrently for --content"
+    )
+    p_search.add_argument(
+        "--include", action="append", default=[], metavar="EXT", help="only these file types (.pdf or *.report)"
+    )
+    p_search.add_argument("--use-index", action="store_true", help="answer from the on-disk filename index")
+    _add_output_args(p_search)
+
+    p_dupes = commands.add_parser("dupes", help="find identical files")
+    _add_filter_args(p_dupes)
+    p_dupes.add_argument("--filter", default="", metavar="PATTERN", help="only consider matching names or paths")
+    p_dupes.add_argument(
+        "--partial-kb",
+        type=int,
+        default=64,
+        metavar="N",
+        help="hash the first and last N KB before full-hashing collisions (default 64)",
+    )
+    p_dupes.add_argument(
+        "--algorithm",
+        default="sha1",
+        help=f"hash backend: {', '.join(available_backends())} (falls back to sha1 if not installed)",
+    )
+    p_dupes.add_argument("--workers", type=int, default=None, metavar="N", help="concurrent hash jobs (1 = serial)")
+    p_dupes.add_argument("--processes", action="store_true", help="hash in a process pool instead of threads")
+    p_dupes.add_argument(
+        "--max-inflight-mb",
+        type=int,
+        default=256,
+        metavar="MB",
+        help="cap on bytes being read by queued hash jobs (default 256)",
+    )
+    p_dupes.add_argument("--no-cache", action="store_true", help="do not read or write the persistent hash cache")
+    p_dupes.add_argument("--verify", action="store_true", help="re-hash every file, refreshing the cache")
+    p_dupes.add_argument("--stats", action="store_true", help="print per-stage counts to stderr when done")
+    p_dupes.add_argument(
+        "--similar-images",
+        action="store_true",
+        help="group visually similar images by perceptual hash instead of identical bytes (needs Pillow)",
+    )
+    p_dupes.add_argument(
+        "--image-hash", choices=IMAGE_HASHES, default=DEFAULT_IMAGE_HASH, help="perceptual hash for --similar-images"
+    )
+    p_dupes.add_argument(
+        "--max-distance",
+        type=int,
+        default=DuplicateOptions.max_distance,
+        metavar="BITS",
+        help="largest Hamming distance (of 64 bits) between similar images (default 8)",
+    )
+    p_dupes.add_argument(
+        "--similar-blocks",
+        action="store_true",
+        help="group large files that share most of their content (content-defined chunks) instead of identical bytes",
+    )
+    p_dupes.add_argument(
+        "--min-shared",
+        type=int,
+        default=DuplicateOptions.min_shared,
+        metavar="PCT",
+        help="smallest percentage of shared chunks for --similar-blocks (default 50)",
+    )
+    p_dupes.add_argument(
+        "--chunk-kb",
+        type=int,
+        default=DuplicateOptions.chunk_size // 1024,
+        metavar="N",
+        help="average chunk size for --similar-blocks (default 64)",
+    )
+    p_dupes.add_argument(
+        "--block-min-mb",
+        type=float,
+        default=DuplicateOptions.block_min_size / (1024 * 1024),
+        metavar="MB",
+        help="skip files smaller than this in --similar-blocks (default 1)",
+    )
+    p_dupes.add_argument(
+        "--sort",
+        choices=("found", "name", "wasted"),
+        default="found",
+        help="stream sets as found (default), or collect and sort them by name or wasted bytes",
+    )
+    p_dupes.add_argument(
+        "--link",
+        choices=available_link_modes(),
+        default=None,
+        help="after the scan, replace every copy with a link to the first file of its set",
+    )
+    p_dupes.add_argument("--dry-run", action="store_true", help="with --link, re-verify and report without linking")
+    p_dupes.add_argument("--journal", default=None, metavar="PATH", help="where --link writes its rollback journal")
+    p_dupes.add_argument(
+        "--no-default-excludes",
+        action="store_true",
+        help="also scan .git, node_modules and Windows system folders",
+    )
+    _add_output_args(p_dupes)
+
+    p_rollback = commands.add_parser("rollback", help="undo a --link batch from its journal")
+    p_rollback.add_argument("journal", metavar="JOURNAL", help="journal file printed by dupes --link")
+
+    p_watch = commands.add_parser("watch", help="report file changes under ROOT as they happen")
+    p_watch.add_argument("roots", nargs="+", metavar="ROOT", help="folder(s) to watch")
+    p_watch.add_argument(
+        "--backend",
+        choices=("auto", *BACKENDS),
+        default="auto",
+        help="inotify (Linux) or poll; auto falls back to polling",
+    )
+    p_watch.add_argument(
+        "--debounce",
+        type=float,
+        default=DEFAULT_DEBOUNCE,
+        metavar="SECONDS",
+        help="report a batch once the tree has been quiet this long (default 0.5)",
+    )
+    p_watch.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        metavar="SECONDS",
+        help="seconds between snapshots with the poll backend (default 2)",
+    )
+    p_watch.add_argument("--update-index", action="store_true", help="keep each ROOT's filename index current")
+    p_watch.add_argument(
+        "--invalidate-cache", action="store_true", help="drop hash cache entries of files that change"
+    )
+    _add_output_args(p_watch, progress=False)
+    return parser
+
+
+class _Writer:
+    def __init__(self, stream, fmt, fields):
+        self.stream = stream
+        self.fmt = fmt
+        self.fields = fields
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.writer(stream, lineterminator="\n")
+            self._csv.writerow(fields)
+
+    def write(self, record):
+        if self._csv is not None:
+            self._csv.writerow([record.get(key, "") for key in self.fields])
+        else:
+            self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+
+def _progress_printer(stream):
+    interactive = stream.isatty()
+
+    def show(snapshot):
+        line = snapshot.describe()
+        if interactive:
+            width = shutil.get_terminal_size().columns - 1
+            stream.write("\r" + line[:width].ljust(width))
+        else:
+            stream.write(line + "\n")
+        stream.flush()
+
+    return show
+
+
+def _start_progress(args):
+    if not args.progress:
+        return None, None
+    reporter = ProgressReporter()
+    return reporter, start_ticker(reporter, _progress_printer(sys.stderr))
+
+
+def _stop_progress(reporter, ticker):
+    if ticker is None:
+        return
+    ticker.set()
+    if sys.stderr.isatty():
+        sys.stderr.write("\n")
+    print(reporter.snapshot().describe(), file=sys.stderr)
+
+
+def _finish_profiler(profiler, args):
+    profiler.stop()
+    paths = profiler.dump(args.profile or user_data_dir("profiles"))
+    print(profiler.report(), file=sys.stderr)
+    print(f"Scan report: {paths[0]}", file=sys.stderr)
+
+
+def run_search(args, out, profiler=None):
+    filters = SearchFilters(
+        include_exts={normalize_include_token(ext) for ext in args.include if ext.strip()},
+        excluded_folders={tok.lower() for tok in args.exclude_folder},
+        excluded_names={pat.lower() for pat in args.exclude_name},
+        max_depth=args.max_depth if args.max_depth is None or args.max_depth >= 0 else None,
+        use_index=args.use_index,
+        walk_workers=max(args.walk_workers, 1),
+    )
+    if args.content is not None:
+        run_content_search(args, filters, out, profiler)
+        return
+    writer = _Writer(out, args.fmt, SEARCH_FIELDS)
+    reporter, ticker = _start_progress(args)
+    try:
+        for item in search(args.roots, args.query, filters, progress=reporter, profiler=profiler):
+            writer.write({key: item[key] for key in SEARCH_FIELDS})
+    finally:
+        _stop_progress(reporter, ticker)
+
+
+def run_content_search(args, filters, out, profiler=None):
+    options = ContentOptions(
+        regex=args.regex,
+        case_sensitive=args.case_sensitive,
+        max_file_size=int(max(args.max_filesize_mb, 0) * 1024 * 1024),
+    )
+    if args.workers is not None:
+        options.workers = max(args.workers, 1)
+    writer = _Writer(out, args.fmt, CONTENT_FIELDS)
+    reporter, ticker = _start_progress(args)
+    try:
+        for folder, name, size, hits in content_search(
+            args.roots,
+            args.content,
+            filters,
+            options,
+            progress=reporter,
+            name_query=args.query or "",
+            profiler=profiler,
+        ):
+            item = make_result(folder, name, size)
+            for line, snippet in hits:
+                writer.write({**{key: item[key] for key in SEARCH_FIELDS}, "line": line, "snippet": snippet})
+    finally:
+        _stop_progress(reporter, ticker)
+
+
+def run_dupes(args, out, profiler=None):
+    options = DuplicateOptions(
+        pattern=args.filter.strip().lower(),
+        excluded_names={pat.lower() for pat in args.exclude_name},
+        max_depth=args.max_depth if args.max_depth is None or args.max_depth >= 0 else None,
+        walk_workers=max(args.walk_workers, 1),
+        partial_size=max(args.partial_kb, 1) * 1024,
+        algorithm=args.algorithm.lower(),
+        use_processes=args.processes,
+        use_cache=not args.no_cache,
+        verify=args.verify,
+        max_inflight_bytes=max(args.max_inflight_mb, 1) * 1024 * 1024,
+        similar_images=args.similar_images,
+        image_hash=args.image_hash,
+        max_distance=min(max(args.max_distance, 0), 64),
+        similar_blocks=args.similar_blocks,
+        min_shared=min(max(args.min_shared, 1), 100),
+        chunk_size=max(args.chunk_kb, 1) * 1024,
+        block_min_size=int(max(args.block_min_mb, 0) * 1024 * 1024),
+    )
+    if args.workers is not None:
+        options.workers = max(args.workers, 1)
+    if args.no_default_excludes:
+        options.excluded_folders = set()
+        options.skip_tokens = frozenset()
+    options.excluded_folders |= {tok.lower() for tok in args.exclude_folder}
+
+    if args.similar_blocks:
+        from modules.engine.chunks import find_similar_files
+
+        scan, fields = find_similar_files, BLOCK_FIELDS
+    elif args.similar_images:
+        scan, fields = find_similar_images, SIMILAR_FIELDS
+    else:
+        scan, fields = find_duplicates, DUPE_FIELDS
+    if args.sort == "wasted":
+        fields += ("wasted",)
+    writer = _Writer(out, args.fmt, fields)
+    stats = ScanStats()
+    reporter, ticker = _start_progress(args)
+    try:
+        groups = scan(args.roots, options, progress=reporter, stats=stats, profiler=profiler)
+        if args.sort != "found" or args.link:
+            groups = sort_groups(list(groups), "name" if args.sort == "found" else args.sort)
+        for group in groups:
+            distances = group.get("distances")
+            shared = group.get("shared")
+            if args.fmt == "csv":
+                for position, path in enumerate(group["paths"]):
+                    record = {"hash": group["hash"], "size": group["size"], "path": path}
+                    if distances is not None:
+                        record["distance"] = distances[position]
+                    if shared is not None:
+                        record["shared"] = shared[position]
+                        record["reclaimable"] = group["reclaimable"]
+                    if args.sort == "wasted":
+                        record["wasted"] = wasted_bytes(group)
+                    writer.write(record)
+            else:
+                record = {"hash": group["hash"], "size": group["size"], "paths": group["paths"]}
+                if distances is not None:
+                    record["distances"] = distances
+                if shared is not None:
+                    record["shared"] = shared
+                    record["reclaimable"] = group["reclaimable"]
+                    record["pairs"] = group["pairs"]
+                if args.sort == "wasted":
+                    record["wasted"] = wasted_bytes(group)
+                writer.write(record)
+        if args.link:
+            try:
+                result = link_duplicates(
+                    [(group["size"], group["paths"]) for group in groups],
+                    args.link,
+                    options.algorithm,
+                    journal_path=args.journal,
+                    workers=options.workers,
+                    dry_run=args.dry_run,
+                    progress=reporter,
+                )
+            except OSError as exc:
+                print(f"smartutilityhub: linking failed, every file was put back: {exc}", file=sys.stderr)
+                return 1
+    finally:
+        _stop_progress(reporter, ticker)
+    if args.stats:
+        print(stats.summary(), file=sys.stderr)
+    if args.link:
+        for path, reason in result.skipped:
+            print(f"skipped {path}: {reason}", file=sys.stderr)
+        print(result.summary(), file=sys.stderr)
+        if result.journal_path:
+            print(f"Journal: {result.journal_path}", file=sys.stderr)
+    return 0
+
+
+def run_rollback(args):
+    try:
+        restored, missing = rollback_journal(args.journal)
+    except (OSError, ValueError, KeyError) as exc:
+        print(f"smartutilityhub: cannot roll back {args.journal}: {exc}", file=sys.stderr)
+        return 1
+    print(f"Restored {restored} file(s).", file=sys.stderr)
+    if missing:
+        for path in missing:
+            print(f"not found: {path}", file=sys.stderr)
+        print(
+            f"smartutilityhub: {len(missing)} file(s) not found; the journal was not marked undone", file=sys.stderr
+        )
+        return 1
+    return 0
+
+
+def run_watch(args, out):
+    writer = _Writer(out, args.fmt, WATCH_FIELDS)
+
+    def on_batch(events):
+        for event in events:
+            writer.write({"event": event.kind, "path": event.path, "is_dir": event.is_dir})
+        if args.update_index:
+            update_indexes(args.roots, events)
+        if args.invalidate_cache:
+            touched = split_batch(events).touched
+            if touched:
+                with HashCache() as cache:
+                    cache.invalidate(touched)
+
+    watcher = Watcher(
+        args.roots,
+        on_batch,
+        backend=args.backend,
+        debounce=max(args.debounce, 0),
+        poll_interval=max(args.poll_interval, 0.1),
+        on_error=lambda exc: print(f"smartutilityhub: could not handle a batch: {exc}", file=sys.stderr),
+    )
+    try:
+        watcher.start()
+    except OSError as exc:
+        print(f"smartutilityhub: cannot watch: {exc}", file=sys.stderr)
+        return 1
+    print(f"Watching {len(args.roots)} folder(s) with {watcher.backend_name}; Ctrl+C to stop.", file=sys.stderr)
+    try:
+        while watcher.running:
+            time.sleep(0.5)
+    finally:
+        watcher.stop()
+    return 0
+
+
+def main(argv=None, out=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "search" and args.query is None and args.content is None:
+        parser.error("search needs --query, --content or both")
+    if args.command == "dupes" and args.similar_images and args.similar_blocks:
+        parser.error("--similar-images and --similar-blocks cannot be combined")
+    if args.command == "dupes" and args.link and (args.similar_images or args.similar_blocks):
+        parser.error("--link only applies to sets of identical files")
+    if args.command == "dupes" and args.similar_images and not images_available():
+        parser.error("--similar-images needs Pillow (pip install Pillow)")
+    out = out or sys.stdout
+    profiler = None
+    cpu = getattr(args, "profile_cpu", False)
+    memory = getattr(args, "profile_memory", False)
+    if getattr(args, "profile", None) is not None or cpu or memory:
+        profiler = ScanProfiler(cpu=cpu, memory=memory).start()
+    try:
+        # The CLI drives the whole scan from this thread, so cProfile sees all of it but the worker pools.
+        with profiler.capture() if profiler else nullcontext():
+            if args.command == "search":
+                run_search(args, out, profiler)
+            elif args.command == "watch":
+                return run_watch(args, out)
+            elif args.command == "rollback":
+                return run_rollback(args)
+            else:
+                return run_dupes(args, out, profiler)
+    except re.error as exc:
+        print(f"smartutilityhub: invalid --content pattern: {exc}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        return 130
+    except BrokenPipeError:
+        # The reader went away (e.g. `| head`); point stdout at devnull so the
+        # interpreter's final flush does not raise a second time.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 0
+    finally:
+        if profiler is not None:
+            _finish_profiler(profiler, args)
+    return 0
@@ -1,6 +1,4 @@
 import os
-import hashlib
-import fnmatch
 import tkinter as tk
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
@@ -8,30 +6,62 @@ from tkinter import filedialog, messagebox
 import threading
 import subprocess
 import platform
+import sqlite3
+import time
+from contextlib import nullcontext
+
+from modules.engine import (
+    DuplicateOptions,
+    DuplicateStore,
+    HashCache,
+    ProgressReporter,
+    ScanControl,
+    ScanProfiler,
+    ScanStats,
+    Watcher,
+    available_link_modes,
+    find_duplicates,
+    find_similar_files,
+    find_similar_images,
+    format_size,
+    images_available,
+    link_duplicates,
+    parse_max_depth,
+)
+from modules.engine.hashing import DEFAULT_ALGORITHM, available_backends, default_workers
+from modules.engine.images import DEFAULT_IMAGE_HASH, IMAGE_HASHES, similarity
+from modules.engine.options import DEFAULT_SYSTEM_SKIP_TOKENS, parse_workers
+from modules.engine.rows import GroupedRows
+from modules.engine.watch import split_batch
+from modules.scan_report import ScanReport
+from modules.virtual_tree import VirtualTree
 
 
 class DuplicateTool(ttk.Frame):
+    PROGRESS_POLL_MS = 250
+    SORT_ORDERS = {"Name": "name", "Wasted space": "wasted"}
+
     def __init__(self, master):
         super().__init__(master)
         self.folder_paths = []
         self.exclusions = {"folders": {"git", "node_modules"}, "names": set()}
-        self.stop_event = threading.Event()
+        self.stop_event = ScanControl()
         self.scan_thread = None
-        self.duplicate_groups = []
-        self.group_display_count = 0
-        self.group_nodes = {}
-        self.page_size = 50
-        self.system_skip_tokens = {
-            "\\windows",
-            "\\program files",
-            "\\program files (x86)",
-            "\\programdata",
-            "\\appdata",
-            "\\$recycle.bin",
-            "\\system volume information",
-        }
+        self.scan_stats = ScanStats()
+        self.scan_progress = None
+        self.duplicate_groups = DuplicateStore()
+        self.group_rows = GroupedRows()
+        self.system_skip_tokens = set(DEFAULT_SYSTEM_SKIP_TOKENS)
+        self.last_scan = None
+        self.watcher = None
+        self.sort_by = "name"
         self.create_widgets()
 
+    def destroy(self):
+        # Switching tools destroys this view; the watcher must not call back into it.
+        self._stop_watch()
+        super().destroy()
+
     def create_widgets(self):
         ttk.Label(self, text="🧩 Duplicate Finder", font=("Segoe UI", 12, "bold")).pack(pady=10)
 
@@ -55,6 +85,15 @@ class DuplicateTool(ttk.Frame):
         )
         self.btn_stop.pack(side=LEFT, padx=5)
 
+        self.btn_pause = ttk.Button(
+            frm_top,
+            text="Pause",
+            bootstyle="secondary-outline",
+            command=self.toggle_pause,
+            state=DISABLED,
+        )
+        self.btn_pause.pack(side=LEFT, padx=5)
+
         ttk.Button(frm_top, text="Clear Folders", bootstyle="secondary-outline", command=self.clear_folders).pack(
             side=LEFT, padx=5
         )
@@ -78,6 +117,92 @@ class DuplicateTool(ttk.Frame):
         self.filter_entry.pack(side=LEFT, padx=5)
         self._set_placeholder(self.filter_entry, "optional pattern")
 
+        hash_row = ttk.Frame(self)
+        hash_row.pack(fill=X, padx=10, pady=(0, 6))
+        ttk.Label(hash_row, text="Walk threads:").pack(side=LEFT)
+        self.walk_workers_var = tk.StringVar(value="1")
+        ttk.Entry(hash_row, textvariable=self.walk_workers_var, width=4).pack(side=LEFT, padx=5)
+
+        ttk.Label(hash_row, text="Hash workers:").pack(side=LEFT, padx=(12, 5))
+        self.workers_var = tk.StringVar(value=str(default_workers()))
+        ttk.Entry(hash_row, textvariable=self.workers_var, width=4).pack(side=LEFT, padx=5)
+
+        ttk.Label(hash_row, text="Hash:").pack(side=LEFT, padx=(12, 5))
+        self.algorithm_var = tk.StringVar(value=DEFAULT_ALGORITHM)
+        ttk.Combobox(
+            hash_row, textvariable=self.algorithm_var, values=available_backends(), width=8, state="readonly"
+        ).pack(side=LEFT, padx=5)
+
+        self.var_use_cache = tk.BooleanVar(value=True)
+        ttk.Checkbutton(
+            hash_row, text="Use hash cache", variable=self.var_use_cache, bootstyle="round-toggle"
+        ).pack(side=LEFT, padx=(12, 5))
+        self.var_verify = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            hash_row, text="Verify (re-read all)", variable=self.var_verify, bootstyle="round-toggle"
+        ).pack(side=LEFT, padx=5)
+        self.var_watch = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            hash_row,
+            text="Keep results live",
+            variable=self.var_watch,
+            bootstyle="round-toggle",
+            command=self._toggle_watch,
+        ).pack(side=LEFT, padx=5)
+        self.var_profile = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            hash_row, text="Profile scan", variable=self.var_profile, bootstyle="round-toggle"
+        ).pack(side=LEFT, padx=5)
+        # cProfile and tracemalloc slow the scan several-fold, so they stay off the plain stage timing.
+        self.var_profile_cpu = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            hash_row, text="with cProfile", variable=self.var_profile_cpu, bootstyle="round-toggle"
+        ).pack(side=LEFT, padx=5)
+        self.var_profile_memory = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            hash_row, text="with tracemalloc", variable=self.var_profile_memory, bootstyle="round-toggle"
+        ).pack(side=LEFT, padx=5)
+
+        image_row = ttk.Frame(self)
+        image_row.pack(fill=X, padx=10, pady=(0, 6))
+        self.var_similar = tk.BooleanVar(value=False)
+        chk_similar = ttk.Checkbutton(
+            image_row,
+            text="Similar images",
+            variable=self.var_similar,
+            bootstyle="round-toggle",
+            command=lambda: self.var_blocks.set(False),
+        )
+        chk_similar.pack(side=LEFT)
+        ttk.Label(image_row, text="Image hash:").pack(side=LEFT, padx=(12, 5))
+        self.image_hash_var = tk.StringVar(value=DEFAULT_IMAGE_HASH)
+        ttk.Combobox(
+            image_row, textvariable=self.image_hash_var, values=IMAGE_HASHES, width=7, state="readonly"
+        ).pack(side=LEFT, padx=5)
+        ttk.Label(image_row, text="Max distance (bits of 64):").pack(side=LEFT, padx=(12, 5))
+        self.max_distance_var = tk.StringVar(value=str(DuplicateOptions.max_distance))
+        ttk.Entry(image_row, textvariable=self.max_distance_var, width=4).pack(side=LEFT, padx=5)
+        if not images_available():
+            chk_similar.config(state=DISABLED)
+            ttk.Label(image_row, text="(install Pillow to enable)", bootstyle="secondary").pack(side=LEFT, padx=5)
+
+        block_row = ttk.Frame(self)
+        block_row.pack(fill=X, padx=10, pady=(0, 6))
+        self.var_blocks = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            block_row,
+            text="Similar large files",
+            variable=self.var_blocks,
+            bootstyle="round-toggle",
+            command=lambda: self.var_similar.set(False),
+        ).pack(side=LEFT)
+        ttk.Label(block_row, text="Min shared %:").pack(side=LEFT, padx=(12, 5))
+        self.min_shared_var = tk.StringVar(value=str(DuplicateOptions.min_shared))
+        ttk.Entry(block_row, textvariable=self.min_shared_var, width=4).pack(side=LEFT, padx=5)
+        ttk.Label(block_row, text="Min size (MB):").pack(side=LEFT, padx=(12, 5))
+        self.block_min_mb_var = tk.StringVar(value=str(DuplicateOptions.block_min_size // (1024 * 1024)))
+        ttk.Entry(block_row, textvariable=self.block_min_mb_var, width=6).pack(side=LEFT, padx=5)
+
         self.lbl_selected = ttk.Label(self, text="No folders selected", bootstyle="secondary")
         self.lbl_selected.pack(fill=X, padx=10, pady=5)
 
@@ -127,35 +252,39 @@ class DuplicateTool(ttk.Frame):
         self.progress = ttk.Progressbar(self, mode="indeterminate")
         self.progress.pack(fill=X, padx=10, pady=5)
 
-        result_frame = ttk.Frame(self)
-        result_frame.pack(fill=BOTH, expand=True, padx=10, pady=5)
-
-        scrollbar = ttk.Scrollbar(result_frame, orient=VERTICAL)
-        scrollbar.pack(side=RIGHT, fill=Y)
-
-        self.result_tree = ttk.Treeview(
-            result_frame,
+        self.result_view = VirtualTree(
+            self,
             columns=("full_path",),
-            show="tree",
-            yscrollcommand=scrollbar.set,
-            selectmode="browse",
+            row_count=lambda: len(self.group_rows),
+            render_row=self._render_row,
+            on_activate=self._on_row_activate,
+            on_toggle=self._on_row_toggle,
         )
+        self.result_view.pack(fill=BOTH, expand=True, padx=10, pady=5)
+        self.result_tree = self.result_view.tree
         self.result_tree.column("#0", stretch=True, anchor="w")
         self.result_tree.heading("#0", text="")
         self.result_tree.column("full_path", width=0, stretch=False)
-        self.result_tree.pack(fill=BOTH, expand=True)
-        scrollbar.configure(command=self.result_tree.yview)
-        self.result_tree.bind("<Double-1>", lambda _event: self.open_file())
 
         controls_frame = ttk.Frame(self)
         controls_frame.pack(fill=X, padx=10, pady=5)
 
         ttk.Button(controls_frame, text="Open File", command=self.open_file).pack(side=LEFT, padx=5)
         ttk.Button(controls_frame, text="Delete File", command=self.delete_file).pack(side=LEFT, padx=5)
-        self.btn_dup_show_more = ttk.Button(
-            controls_frame, text="Show More", command=lambda: self._render_duplicate_groups(reset=False), state=DISABLED
+        ttk.Button(controls_frame, text="Link Duplicates...", command=self.link_copies).pack(side=LEFT, padx=(12, 5))
+        ttk.Label(controls_frame, text="as").pack(side=LEFT)
+        self.link_mode_var = tk.StringVar(value="hardlink")
+        ttk.Combobox(
+            controls_frame, textvariable=self.link_mode_var, values=available_link_modes(), width=9, state="readonly"
+        ).pack(side=LEFT, padx=5)
+
+        self.sort_var = tk.StringVar(value="Name")
+        sort_box = ttk.Combobox(
+            controls_frame, textvariable=self.sort_var, values=list(self.SORT_ORDERS), width=13, state="readonly"
         )
-        self.btn_dup_show_more.pack(side=RIGHT)
+        sort_box.pack(side=RIGHT, padx=5)
+        sort_box.bind("<<ComboboxSelected>>", self._on_sort_change)
+        ttk.Label(controls_frame, text="Sort sets by:").pack(side=RIGHT)
 
         self._refresh_chips()
 
@@ -228,21 +357,6 @@ class DuplicateTool(ttk.Frame):
                     var.set(False)
         self._refresh_chips()
 
-    def _path_excluded(self, folder, name):
-        full_lower = os.path.join(folder, name).lower()
-        base = name.lower()
-        for tok in self.exclusions["folders"]:
-            if tok in full_lower:
-                return True
-        for pattern in self.exclusions["names"]:
-            if any(ch in pattern for ch in "*?"):
-                if fnmatch.fnmatch(base, pattern) or fnmatch.fnmatch(full_lower, pattern):
-                    return True
-            else:
-                if pattern in base or pattern in full_lower:
-                    return True
-        return False
-
     def _exclusion_summary(self):
         items = list(self.exclusions["folders"]) + list(self.exclusions["names"])
         return ", ".join(sorted(items))
@@ -285,6 +399,7 @@ class DuplicateTool(ttk.Frame):
         if self.scan_thread and self.scan_thread.is_alive():
             messagebox.showinfo("Scan Running", "Please wait for the current scan to finish or stop it first.")
             return
+        self._stop_watch()
         self._reset_duplicate_view()
         self.stop_event.clear()
         summary = self._exclusion_summary()
@@ -294,210 +409,387 @@ class DuplicateTool(ttk.Frame):
             self._set_status("Scanning duplicates...")
         self.btn_scan.config(state=DISABLED)
         self.btn_stop.config(state=NORMAL)
-        self.scan_thread = threading.Thread(target=self.scan_duplicates, daemon=True)
+        self.btn_pause.config(state=NORMAL, text="Pause")
+        self.progress.start()
+        self.scan_progress = ProgressReporter()
+        self.last_scan = (list(self.folder_paths), self._build_options())
+        profiler = None
+        cpu, memory = self.var_profile_cpu.get(), self.var_profile_memory.get()
+        if self.var_profile.get() or cpu or memory:
+            profiler = ScanProfiler(cpu=cpu, memory=memory).start()
+        self.scan_thread = threading.Thread(
+            target=self.scan_duplicates,
+            args=(*self.last_scan, self.scan_progress, profiler),
+            daemon=True,
+        )
         self.scan_thread.start()
+        self.after(self.PROGRESS_POLL_MS, lambda: self._poll_progress(self.scan_progress))
 
     def stop_scan(self):
         if self.scan_thread and self.scan_thread.is_alive():
             self.stop_event.set()
+            self.btn_pause.config(state=DISABLED, text="Pause")
             self._set_status("Stopping scan...")
 
-    def hash_file(self, path):
-        try:
-            sha = hashlib.sha1()
-            with open(path, "rb") as f:
-                while chunk := f.read(8192):
-                    sha.update(chunk)
-            return sha.hexdigest()
-        except Exception:
-            return None
-
-    def scan_duplicates(self):
-        self._set_status("Indexing files...")
-        self.progress.start()
-        stopped = False
+    def toggle_pause(self):
+        # Workers hold at their next checkpoint, which includes between the buffers of a file being hashed.
+        if not (self.scan_thread and self.scan_thread.is_alive()):
+            return
+        if self.stop_event.paused:
+            self.stop_event.resume()
+            self.btn_pause.config(text="Pause")
+        else:
+            self.stop_event.pause()
+            self.btn_pause.config(text="Resume")
 
+    def _build_options(self):
         pattern = ""
         if hasattr(self, "filter_entry"):
             value = self.filter_entry.get().strip().lower()
             placeholder = getattr(self.filter_entry, "placeholder_text", "")
             if value and value != placeholder.lower():
                 pattern = value
-        pattern_has_wildcard = any(ch in pattern for ch in "*?") if pattern else False
-
-        size_map = {}
-        max_depth = self._get_max_depth()
-        folder_tokens = set(self.exclusions["folders"])
-
-        for folder in self.folder_paths:
-            if self.stop_event.is_set():
-                stopped = True
-                break
-            for root, dirs, files in self._limited_walk(folder, max_depth, folder_tokens | self.system_skip_tokens):
-                self._set_status(f"Indexing: {root}")
-                if self.stop_event.is_set():
-                    stopped = True
-                    break
-                for f in files:
-                    if self.stop_event.is_set():
-                        stopped = True
-                        break
-                    full_path = os.path.join(root, f)
-                    if pattern and not self._matches_filter(full_path, f, pattern, pattern_has_wildcard):
-                        continue
-                    if self._path_excluded(root, f):
-                        continue
-                    try:
-                        size = os.path.getsize(full_path)
-                    except (OSError, PermissionError):
-                        continue
-                    size_map.setdefault(size, []).append(full_path)
-                if stopped:
-                    break
-            if stopped:
-                break
-
-        groups_map = {}
-        if not stopped:
-            self._set_status("Comparing candidates...")
-            for size_paths in size_map.values():
-                if len(size_paths) < 2:
-                    continue
-                hash_map = {}
-                for path in size_paths:
-                    self._set_status(f"Hashing: {path}")
-                    if self.stop_event.is_set():
-                        stopped = True
-                        break
-                    h = self.hash_file(path)
-                    if not h:
-                        continue
-                    hash_map.setdefault(h, []).append(path)
-                if stopped:
-                    break
-                for h, same_paths in hash_map.items():
-                    if len(same_paths) > 1:
-                        groups_map.setdefault(h, set()).update(same_paths)
+        return DuplicateOptions(
+            pattern=pattern,
+            excluded_folders=set(self.exclusions["folders"]),
+            excluded_names=set(self.exclusions["names"]),
+            skip_tokens=frozenset(self.system_skip_tokens),
+            max_depth=self._get_max_depth(),
+            walk_workers=parse_workers(self.walk_workers_var.get()),
+            workers=parse_workers(self.workers_var.get(), default_workers()),
+            algorithm=self.algorithm_var.get(),
+            use_cache=self.var_use_cache.get(),
+            verify=self.var_verify.get(),
+            similar_images=self.var_similar.get() and images_available(),
+            image_hash=self.image_hash_var.get(),
+            max_distance=self._get_max_distance(),
+            similar_blocks=self.var_blocks.get(),
+            min_shared=self._get_min_shared(),
+            block_min_size=self._get_block_min_size(),
+        )
 
+    def _poll_progress(self, reporter):
+        # Sample the scan's counters at a fixed rate instead of per file.
+        if reporter is not self.scan_progress:
+            return
+        if self.stop_event.is_set():
+            self._safe_set_status("Stopping scan...")
+        elif self.stop_event.paused:
+            self._safe_set_status(f"Paused · {reporter.snapshot().describe()}")
+        else:
+            self._safe_set_status(reporter.snapshot().describe())
+        self.after(self.PROGRESS_POLL_MS, lambda: self._poll_progress(reporter))
+
+    def scan_duplicates(self, folders, options, reporter, profiler=None):
+        self.scan_stats = ScanStats()
+        groups = DuplicateStore()
+        if options.similar_blocks:
+            scan = find_similar_files
+        elif options.similar_images:
+            scan = find_similar_images
+        else:
+            scan = find_duplicates
+        error = None
+        try:
+            with profiler.capture() if profiler else nullcontext():
+                for group in scan(
+                    folders,
+                    options,
+                    progress=reporter,
+                    stop_event=self.stop_event,
+                    stats=self.scan_stats,
+                    profiler=profiler,
+                ):
+                    groups.add(group)
+        except (OSError, sqlite3.Error, RuntimeError) as exc:
+            # A failing hash cache or an unreadable data folder must not leave the controls locked.
+            error = exc
+        stopped = self.stop_event.is_set()
+        self.after(0, lambda: self._on_scan_complete(groups, stopped, profiler, error))
+
+    def _on_scan_complete(self, duplicate_groups, stopped, profiler=None, error=None):
+        started = time.perf_counter()
+        duplicate_groups.sort(self.sort_by)
+        if profiler is not None:
+            profiler.add("sort", time.perf_counter() - started, len(duplicate_groups))
+        self.scan_progress = None
         self.progress.stop()
         self.btn_scan.config(state=NORMAL)
         self.btn_stop.config(state=DISABLED)
+        self.btn_pause.config(state=DISABLED, text="Pause")
         self.stop_event.clear()
 
+        if error is not None:
+            if profiler is not None:
+                profiler.stop()
+            self._set_status("Scan failed.")
+            messagebox.showerror("Scan Failed", f"The duplicate scan stopped with an error.\n{error}")
+            return
+
         if stopped:
+            self._show_profile(profiler)
             self._set_status("Scan stopped.")
             messagebox.showinfo("Scan Stopped", "Duplicate scan was stopped before completion.")
             return
 
-        if groups_map:
-            duplicate_groups = []
-            for h, paths_set in groups_map.items():
-                paths = sorted(paths_set)
-                duplicate_groups.append(
-                    {
-                        "hash": h,
-                        "name": os.path.basename(paths[0]) or "(unknown file)",
-                        "paths": paths,
-                    }
-                )
-            duplicate_groups.sort(key=lambda g: g["name"].lower())
+        if duplicate_groups:
+            started = time.perf_counter()
             self.duplicate_groups = duplicate_groups
-            self._render_duplicate_groups(reset=True)
-            total_files = sum(len(g["paths"]) for g in duplicate_groups)
+            self.group_rows.set_sizes(len(g) for g in duplicate_groups)
+            self.result_view.reset()
+            if profiler is not None:
+                profiler.add("render", time.perf_counter() - started, len(duplicate_groups))
+            self._show_profile(profiler)
+            total_files = duplicate_groups.file_count()
+            if self.var_watch.get():
+                self._start_watch()
             messagebox.showinfo(
                 "Scan Complete",
                 f"Found {len(duplicate_groups)} duplicate set(s) covering {total_files} files.",
             )
-            self._set_status(f"{len(duplicate_groups)} duplicate set(s) found.")
+            self._set_status(
+                f"{len(duplicate_groups)} duplicate set(s) found, "
+                f"{format_size(duplicate_groups.wasted_bytes())} reclaimable. {self.scan_stats.summary()}"
+            )
         else:
+            self._show_profile(profiler)
             messagebox.showinfo("Scan Complete", "No duplicates found.")
-            self._set_status("No duplicates found.")
+            self._set_status(f"No duplicates found. {self.scan_stats.summary()}")
+
+    def _show_profile(self, profiler):
+        if profiler is not None:
+            profiler.stop()
+            ScanReport(self, profiler, "Duplicate Scan Report")
+
+    def _toggle_watch(self):
+        if not self.var_watch.get():
+            self._stop_watch()
+        elif self.duplicate_groups and not (self.scan_thread and self.scan_thread.is_alive()):
+            self._start_watch()
+
+    def _start_watch(self):
+        self._stop_watch()
+        folders, options = self.last_scan
+        watcher = Watcher(
+            folders,
+            lambda events: self._on_watch_batch(watcher, options, events),
+            on_error=lambda exc: self.after(0, lambda: self._on_watch_error(watcher, exc)),
+        )
+        try:
+            watcher.start()
+        except OSError as exc:
+            self.var_watch.set(False)
+            messagebox.showerror("Keep Results Live", f"Unable to watch the selected folders.\n{exc}")
+            return
+        self.watcher = watcher
+
+    def _stop_watch(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+
+    def _on_watch_batch(self, watcher, options, events):
+        # Watcher thread: a modified file can no longer vouch for its digest.
+        changes = split_batch(events)
+        if options.use_cache and changes.touched:
+            with HashCache(options.cache_path) as cache:
+                cache.invalidate(changes.touched)
+        self.after(0, lambda: self._apply_watch_batch(watcher, changes))
+
+    def _on_watch_error(self, watcher, exc):
+        # The watcher keeps running; only the failed batch is lost.
+        if watcher is self.watcher:
+            self._set_status(f"Keep results live: could not apply changes: {exc}")
+
+    def _apply_watch_batch(self, watcher, changes):
+        if watcher is not self.watcher:
+            return
+        # Changed files leave their sets until the next scan re-hashes them.
+        updates = self.duplicate_groups.discard(changes.deleted | changes.touched, changes.deleted_dirs)
+        for index, remaining in updates:
+            if remaining:
+                self.group_rows.resize(index, remaining)
+            else:
+                self.group_rows.remove_group(index)
+        if updates:
+            self.result_view.selected_row = None
+            self.result_view.refresh()
+        status = (
+            f"Watching for changes: {len(self.duplicate_groups)} duplicate set(s), "
+            f"updated {time.strftime('%H:%M:%S')}. Scan again to include new or edited files."
+        )
+        if changes.rescans:
+            status += " Some changes were missed."
+        self._safe_set_status(status)
 
     def _reset_duplicate_view(self):
-        self.result_tree.delete(*self.result_tree.get_children())
-        self.group_nodes = {}
-        self.duplicate_groups = []
-        self.group_display_count = 0
-        self.btn_dup_show_more.config(state=DISABLED)
-
-    def _render_duplicate_groups(self, reset):
-        if reset:
-            self.result_tree.delete(*self.result_tree.get_children())
-            self.group_nodes = {}
-            self.group_display_count = 0
-
-        target = min(len(self.duplicate_groups), self.group_display_count + self.page_size)
-        for idx in range(self.group_display_count, target):
-            group = self.duplicate_groups[idx]
-            label = self._group_label(group)
-            node = self.result_tree.insert("", tk.END, text=label, open=False)
-            group["node"] = node
-            self.group_nodes[node] = group
-            for path in group["paths"]:
-                self.result_tree.insert(node, tk.END, text=path, values=(path,))
-
-        self.group_display_count = target
-        if self.group_display_count >= len(self.duplicate_groups):
-            self.btn_dup_show_more.config(state=DISABLED)
+        self.duplicate_groups = DuplicateStore()
+        self.group_rows.set_sizes(())
+        self.result_view.reset()
+
+    def _render_row(self, row):
+        index, child = self.group_rows.locate(row)
+        group = self.duplicate_groups[index]
+        if child < 0:
+            marker = "▾" if self.group_rows.is_open(index) else "▸"
+            return f"{marker} {self._group_label(group)}", ("",)
+        path = group.path(child)
+        if self.duplicate_groups.scored:
+            return f"    {path}  ({similarity(group.distance(child))}% similar)", (path,)
+        if self.duplicate_groups.partial:
+            return f"    {path}  ({group.shared(child)}% shared)", (path,)
+        return f"    {path}", (path,)
+
+    def _on_row_activate(self, row):
+        index, child = self.group_rows.locate(row)
+        if child < 0:
+            self._on_row_toggle(row, not self.group_rows.is_open(index))
         else:
-            self.btn_dup_show_more.config(state=NORMAL)
+            self.open_file()
 
-    def _group_label(self, group):
-        name = group.get("name") or "(unknown)"
-        count = len(group.get("paths", []))
-        return f"{name} ({count} copies)"
-
-    def _update_group_label(self, group):
-        if group.get("node"):
-            self.result_tree.item(group["node"], text=self._group_label(group))
-
-    def _matches_filter(self, full_path, filename, pattern, has_wildcard):
-        if not pattern:
-            return True
-        full_lower = full_path.lower()
-        file_lower = filename.lower()
-        if has_wildcard:
-            return fnmatch.fnmatch(file_lower, pattern) or fnmatch.fnmatch(full_lower, pattern)
-        return pattern in file_lower or pattern in full_lower
+    def _on_row_toggle(self, row, expand):
+        index, child = self.group_rows.locate(row)
+        if child >= 0 and expand:
+            return
+        self.group_rows.set_open(index, expand)
+        self.result_view.selected_row = self.group_rows.row_of(index)
+        self.result_view.see(self.result_view.selected_row)
 
-    def _get_max_depth(self):
-        value = self.max_depth_var.get().strip()
-        if not value:
+    def _selected_location(self):
+        row = self.result_view.selected_row
+        if row is None or row >= len(self.group_rows):
             return None
+        return self.group_rows.locate(row)
+
+    def _group_label(self, group):
+        name = group.name or "(unknown)"
+        count = len(group)
+        if self.duplicate_groups.scored:
+            return f"{name} ({count} similar images, ≥{similarity(group.max_distance)}% similar)"
+        if self.duplicate_groups.partial:
+            return f"{name} ({count} similar files, {format_size(group.reclaimable)} reclaimable)"
+        return f"{name} ({count} copies, {format_size(group.wasted)} wasted)"
+
+    def _on_sort_change(self, _event=None):
+        self.sort_by = self.SORT_ORDERS.get(self.sort_var.get(), "name")
+        if self.scan_thread and self.scan_thread.is_alive():
+            return
+        self.duplicate_groups.sort(self.sort_by)
+        self.group_rows.set_sizes(len(g) for g in self.duplicate_groups)
+        self.result_view.reset()
+
+    def link_copies(self):
+        if self.scan_thread and self.scan_thread.is_alive():
+            messagebox.showinfo("Scan Running", "Please wait for the current scan to finish or stop it first.")
+            return
+        groups = self.duplicate_groups
+        if not groups:
+            messagebox.showinfo("Link Duplicates", "Scan for duplicates first.")
+            return
+        if groups.scored or groups.partial:
+            messagebox.showinfo(
+                "Link Duplicates",
+                "Only sets of identical files can be linked. Scan again without Similar images or Similar large files.",
+            )
+            return
+        mode = self.link_mode_var.get()
+        confirm = messagebox.askyesno(
+            "Confirm Link",
+            f"Replace {groups.file_count() - len(groups)} duplicate file(s) with {mode}s to the first file of "
+            f"each set, reclaiming up to {format_size(groups.wasted_bytes())}?\n\n"
+            "Every file is re-hashed first and files that changed are skipped. Paths stay in place, and a "
+            "journal is kept so `python -m smartutilityhub rollback JOURNAL` can undo the batch.",
+        )
+        if not confirm:
+            return
+        self._stop_watch()
+        self.stop_event.clear()
+        _folders, options = self.last_scan
+        batch = [(group.size, group.paths) for group in groups]
+        self._set_status("Linking duplicates...")
+        self.btn_scan.config(state=DISABLED)
+        self.btn_stop.config(state=NORMAL)
+        self.btn_pause.config(state=NORMAL, text="Pause")
+        self.progress.start()
+        self.scan_progress = ProgressReporter()
+        self.scan_thread = threading.Thread(
+            target=self._run_link, args=(batch, mode, options, self.scan_progress), daemon=True
+        )
+        self.scan_thread.start()
+        self.after(self.PROGRESS_POLL_MS, lambda: self._poll_progress(self.scan_progress))
+
+    def _run_link(self, batch, mode, options, reporter):
         try:
-            depth = int(value)
-            return depth if depth >= 0 else None
-        except ValueError:
-            return None
+            result = link_duplicates(
+                batch,
+                mode,
+                options.algorithm,
+                workers=options.workers,
+                progress=reporter,
+                stop_event=self.stop_event,
+            )
+            error = None
+        except OSError as exc:
+            result, error = None, exc
+        self.after(0, lambda: self._on_link_complete(result, error))
 
-    def _limited_walk(self, root_folder, max_depth, tokens):
-        for current_root, dirs, files in os.walk(root_folder):
-            rel = os.path.relpath(current_root, root_folder)
-            depth = 0 if rel == "." else rel.count(os.sep)
+    def _on_link_complete(self, result, error):
+        self.scan_progress = None
+        self.progress.stop()
+        self.btn_scan.config(state=NORMAL)
+        self.btn_stop.config(state=DISABLED)
+        self.btn_pause.config(state=DISABLED, text="Pause")
+        self.stop_event.clear()
+        if error is not None:
+            self._set_status("Linking failed; every file was put back.")
+            messagebox.showerror("Link Duplicates", f"Linking failed and every file was put back.\n{error}")
+            return
+        if result.stopped:
+            self._set_status("Linking stopped; no files were changed.")
+            return
+        linked = set(result.linked)
+        groups = self.duplicate_groups
+        for index in range(len(groups) - 1, -1, -1):
+            group = groups[index]
+            if all(group.path(position) in linked for position in range(1, len(group))):
+                groups.remove(index)
+                self.group_rows.remove_group(index)
+        self.result_view.selected_row = None
+        self.result_view.refresh()
+        self._set_status(f"{result.summary()}. Journal: {result.journal_path}")
+        messagebox.showinfo("Link Duplicates", f"{result.summary()}.\n\nJournal: {result.journal_path}")
 
-            if tokens:
-                dirs[:] = [
-                    d for d in dirs if not any(tok in os.path.join(current_root, d).lower() for tok in tokens)
-                ]
+    def _get_max_depth(self):
+        return parse_max_depth(self.max_depth_var.get())
+
+    def _get_max_distance(self):
+        try:
+            return min(max(int(self.max_distance_var.get().strip()), 0), 64)
+        except ValueError:
+            return DuplicateOptions.max_distance
 
-            if max_depth is not None and depth >= max_depth:
-                dirs[:] = []
+    def _get_min_shared(self):
+        try:
+            return min(max(int(self.min_shared_var.get().strip()), 1), 100)
+        except ValueError:
+            return DuplicateOptions.min_shared
 
-            yield current_root, dirs, files
+    def _get_block_min_size(self):
+        try:
+            return int(max(float(self.block_min_mb_var.get().strip()), 0) * 1024 * 1024)
+        except ValueError:
+            return DuplicateOptions.block_min_size
 
     def open_file(self):
-        selection = self.result_tree.selection()
-        if not selection:
+        selected = self._selected_location()
+        if not selected:
             messagebox.showwarning("Select File", "Please select a file from the list.")
             return
-        item_id = selection[0]
-        if self.result_tree.get_children(item_id):
+        index, child = selected
+        if child < 0:
             messagebox.showinfo("Select File", "Expand a folder and choose a file.")
             return
-        path = self.result_tree.set(item_id, "full_path")
-        if not path:
-            messagebox.showwarning("Select File", "Please select a file from the list.")
-            return
+        path = self.duplicate_groups[index].path(child)
         try:
             if platform.system() == "Windows":
                 os.startfile(path)
@@ -507,35 +799,30 @@ class DuplicateTool(ttk.Frame):
             messagebox.showerror("Open File", f"Unable to open file.\n{exc}")
 
     def delete_file(self):
-        selection = self.result_tree.selection()
-        if not selection:
+        selected = self._selected_location()
+        if not selected:
             messagebox.showwarning("Select File", "Please select a file from the list.")
             return
-        item_id = selection[0]
-        if self.result_tree.get_children(item_id):
+        index, child = selected
+        if child < 0:
             messagebox.showwarning("Select File", "Please select a file (not a folder).")
             return
-        path = self.result_tree.set(item_id, "full_path")
-        if not path:
-            messagebox.showwarning("Select File", "Please select a file from the list.")
-            return
-        parent = self.result_tree.parent(item_id)
-        group = self.group_nodes.get(parent)
-        if not group:
-            messagebox.showwarning("Delete File", "Unable to determine duplicate group.")
-            return
+        group = self.duplicate_groups[index]
+        path = group.path(child)
         confirm = messagebox.askyesno("Confirm Delete", f"Delete this file?\n{path}")
         if not confirm:
             return
         try:
             os.remove(path)
-            self.result_tree.delete(item_id)
-            if parent and not self.result_tree.get_children(parent):
-                self.result_tree.delete(parent)
-                self.group_nodes.pop(parent, None)
-                group["paths"] = []
-            else:
-                group["paths"] = [p for p in group["paths"] if p != path]
-                self._update_group_label(group)
         except Exception as exc:
             messagebox.showerror("Delete File", f"Unable to delete file.\n{exc}")
+            return
+        self.duplicate_groups.remove_path(index, child)
+        if len(group):
+            self.group_rows.resize(index, len(group))
+            self.result_view.selected_row = self.group_rows.row_of(index)
+        else:
+            self.duplicate_groups.remove(index)
+            self.group_rows.remove_group(index)
+            self.result_view.selected_row = None
+        self.result_view.refresh()
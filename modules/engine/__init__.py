@@ -0,0 +1,66 @@
+from .content import content_search, grep_file
+from .control import ScanControl
+from .dedupe import LinkResult, available_link_modes, link_duplicates, rollback_journal
+from .duplicates import find_duplicates, sort_groups, wasted_bytes
+from .hash_cache import HashCache
+from .hashing import available_backends, hash_file
+from .images import find_similar_images, images_available
+from .index import FileIndex
+from .orchestrator import ScanJob, ScanOrchestrator
+from .options import ContentOptions, DuplicateOptions, SearchFilters, parse_max_depth
+from .profiling import ScanProfiler
+from .progress import ProgressReporter, ProgressSnapshot
+from .result_cache import ResultCache
+from .results import ContentStore, DuplicateStore, ResultStore
+from .search import search, search_matches, sort_results
+from .stats import ScanStats, format_size
+from .watch import Watcher, available_watch_backends
+
+__all__ = [
+    "ContentOptions",
+    "ContentStore",
+    "DuplicateOptions",
+    "DuplicateStore",
+    "FileIndex",
+    "HashCache",
+    "LinkResult",
+    "ProgressReporter",
+    "ProgressSnapshot",
+    "ResultCache",
+    "ResultStore",
+    "ScanControl",
+    "ScanJob",
+    "ScanOrchestrator",
+    "ScanProfiler",
+    "ScanStats",
+    "SearchFilters",
+    "Watcher",
+    "available_backends",
+    "available_link_modes",
+    "available_watch_backends",
+    "content_search",
+    "find_duplicates",
+    "find_similar_files",
+    "find_similar_images",
+    "format_size",
+    "grep_file",
+    "hash_file",
+    "images_available",
+    "link_duplicates",
+    "parse_max_depth",
+    "rollback_journal",
+    "search",
+    "search_matches",
+    "sort_groups",
+    "sort_results",
+    "wasted_bytes",
+]
+
+
+def __getattr__(name):
+    # The chunking mode is loaded on first use, so plain searches do not pay for it.
+    if name == "find_similar_files":
+        from .chunks import find_similar_files
+
+        return find_similar_files
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
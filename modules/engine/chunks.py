@@ -0,0 +1,274 @@
+import hashlib
+import os
+from array import array
+from functools import lru_cache, partial
+
+from .control import stopped
+from .duplicates import collect_sizes
+from .hashing import HashPool
+from .options import DuplicateOptions
+from .profiling import timed_call
+from .stats import ScanStats
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+READ_SIZE = 1024 * 1024
+# The rolling hash covers the last 32 bytes: older bytes shift out of the word.
+WINDOW = 32
+HASH_MASK = 0xFFFFFFFF
+# FastCDC normalisation level: masks are this many bits harder (easier) below (above) the average size.
+NORMALIZATION = 2
+GEAR = [int.from_bytes(hashlib.blake2b(bytes([i]), digest_size=4).digest(), "big") for i in range(256)]
+# Chunks found in more files than this are treated as common filler (zeroed
+# blocks, shared headers) and do not make files similar on their own.
+MAX_CHUNK_FANOUT = 256
+
+
+def _top_bits(count):
+    return ((1 << count) - 1) << (32 - count)
+
+
+class _PythonScanner:
+    def __init__(self, weak_mask, strong_mask):
+        self.weak_mask = weak_mask
+        self.strong_mask = strong_mask
+        self.h = 0
+
+    def scan(self, data):
+        """Return ``(end, strong)`` for every offset in ``data`` where a chunk may end."""
+        h = self.h
+        gear = GEAR
+        weak_mask, strong_mask = self.weak_mask, self.strong_mask
+        found = []
+        for i, byte in enumerate(data):
+            h = (h + h + gear[byte]) & HASH_MASK
+            if not h & weak_mask:
+                found.append((i + 1, not h & strong_mask))
+        self.h = h
+        return found
+
+
+@lru_cache(maxsize=None)
+def _numpy():
+    # Imported on first use: numpy alone costs more than the rest of the CLI's startup.
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class _NumpyScanner:
+    # Same gear hash as _PythonScanner, computed for a whole buffer by
+    # doubling: after the shift-by-s pass each value covers 2*s bytes.
+
+    def __init__(self, weak_mask, strong_mask):
+        self.weak_mask = weak_mask
+        self.strong_mask = strong_mask
+        self.numpy = numpy = _numpy()
+        self.gear = numpy.array(GEAR, dtype=numpy.uint32)
+        self.tail = numpy.zeros(0, dtype=numpy.uint8)
+
+    def scan(self, data):
+        numpy = self.numpy
+        block = numpy.concatenate((self.tail, numpy.frombuffer(data, dtype=numpy.uint8)))
+        h = self.gear[block]
+        shift = 1
+        while shift < WINDOW:
+            h[shift:] += h[:-shift] << numpy.uint32(shift)
+            shift *= 2
+        h = h[len(self.tail) :]
+        self.tail = block[-(WINDOW - 1) :].copy()
+        ends = numpy.flatnonzero((h & numpy.uint32(self.weak_mask)) == 0)
+        strong = (h[ends] & numpy.uint32(self.strong_mask)) == 0
+        return list(zip((ends + 1).tolist(), strong.tolist()))
+
+
+def chunk_file(path, avg_size=DEFAULT_CHUNK_SIZE):
+    """Split ``path`` into content-defined chunks; return ``(digests, lengths)`` arrays, or ``None``.
+
+    Boundaries follow a gear rolling hash with FastCDC-style normalisation:
+    chunks are at least ``avg_size / 4`` and at most ``avg_size * 4`` bytes,
+    and a stricter mask applies below ``avg_size`` so lengths cluster around
+    it. An insert or delete therefore only changes the chunks around it. The
+    file is streamed through one ``READ_SIZE`` buffer and each chunk is
+    summarised by a 64-bit BLAKE2b digest.
+    """
+    avg_size = max(int(avg_size), 256)
+    min_size, max_size = avg_size // 4, avg_size * 4
+    bits = avg_size.bit_length() - 1
+    scanner_type = _NumpyScanner if _numpy() is not None else _PythonScanner
+    scanner = scanner_type(_top_bits(bits - NORMALIZATION), _top_bits(bits + NORMALIZATION))
+    digests = array("Q")
+    lengths = array("q")
+    try:
+        with open(path, "rb") as f:
+            view = memoryview(bytearray(READ_SIZE))
+            hasher = hashlib.blake2b(digest_size=8)
+            start = offset = pos = 0
+            data = None
+
+            def cut(end):
+                # Ends the current chunk at ``end`` within ``data``.
+                nonlocal hasher, start, pos
+                hasher.update(data[pos:end])
+                digests.append(int.from_bytes(hasher.digest(), "little"))
+                lengths.append(offset + end - start)
+                hasher = hashlib.blake2b(digest_size=8)
+                start = offset + end
+                pos = end
+
+            while True:
+                n = f.readinto(view)
+                if not n:
+                    break
+                data = view[:n]
+                pos = 0
+                for end, strong in scanner.scan(data):
+                    while offset + end - start > max_size:
+                        cut(start + max_size - offset)
+                    length = offset + end - start
+                    if length >= avg_size or (strong and length >= min_size):
+                        cut(end)
+                while offset + n - start > max_size:
+                    cut(start + max_size - offset)
+                hasher.update(data[pos:])
+                offset += n
+            if offset > start:
+                digests.append(int.from_bytes(hasher.digest(), "little"))
+                lengths.append(offset - start)
+    except OSError:
+        return None
+    return digests, lengths
+
+
+def _distinct(digests, lengths):
+    chunks = {}
+    for digest, length in zip(digests, lengths):
+        chunks[digest] = length
+    return chunks
+
+
+def _shared_pairs(files):
+    """Return ``(pair_bytes, distinct_bytes)`` for ``files`` of ``(path, size, digests, lengths)``.
+
+    ``pair_bytes[a, b]`` sums the distinct chunks files ``a < b`` have in
+    common; ``distinct_bytes[f]`` is the size of file ``f``'s distinct chunks.
+    """
+    owners = {}
+    shared = {}
+    distinct_bytes = []
+    for file_id, (_path, _size, digests, lengths) in enumerate(files):
+        chunks = _distinct(digests, lengths)
+        distinct_bytes.append(sum(chunks.values()))
+        for digest, length in chunks.items():
+            first = owners.setdefault(digest, file_id)
+            if first != file_id:
+                entry = shared.get(digest)
+                if entry is None:
+                    entry = shared[digest] = (length, [first])
+                entry[1].append(file_id)
+    pair_bytes = {}
+    for length, file_ids in shared.values():
+        if len(file_ids) > MAX_CHUNK_FANOUT:
+            continue
+        for i, a in enumerate(file_ids):
+            for b in file_ids[i + 1 :]:
+                pair_bytes[a, b] = pair_bytes.get((a, b), 0) + length
+    return pair_bytes, distinct_bytes
+
+
+def group_similar_files(files, min_shared):
+    """Yield groups of ``files`` (``(path, size, digests, lengths)``) sharing at least ``min_shared`` percent.
+
+    Two files are similar when their common distinct chunks make up
+    ``min_shared`` percent of the larger file's distinct chunks. The largest
+    unassigned file leads each group and takes every unassigned file similar
+    to it; ``pairs`` lists every similar pair inside the group.
+    """
+    pair_bytes, distinct_bytes = _shared_pairs(files)
+    neighbours = {}
+    for (a, b), nbytes in pair_bytes.items():
+        percent = nbytes * 100 // max(distinct_bytes[a], distinct_bytes[b], 1)
+        if percent >= min_shared:
+            neighbours.setdefault(a, {})[b] = (nbytes, percent)
+            neighbours.setdefault(b, {})[a] = (nbytes, percent)
+
+    assigned = set()
+    for leader in sorted(neighbours, key=lambda f: (-files[f][1], files[f][0])):
+        if leader in assigned:
+            continue
+        links = neighbours[leader]
+        members = sorted((b for b in links if b not in assigned), key=lambda b: (-links[b][0], files[b][0]))
+        if not members:
+            continue
+        group = [leader] + members
+        assigned.update(group)
+
+        pairs = []
+        for i, a in enumerate(group):
+            for b in group[i + 1 :]:
+                link = neighbours[a].get(b)
+                if link is not None:
+                    pairs.append({"paths": [files[a][0], files[b][0]], "shared_bytes": link[0], "shared": link[1]})
+        union = {}
+        for member in group:
+            union.update(_distinct(files[member][2], files[member][3]))
+        path, size, digests, _lengths = files[leader]
+        yield {
+            "hash": hashlib.blake2b(digests.tobytes(), digest_size=8).hexdigest(),
+            "name": os.path.basename(path) or "(unknown file)",
+            "size": size,
+            "paths": [files[member][0] for member in group],
+            "shared": [100] + [links[member][1] for member in members],
+            "reclaimable": max(sum(files[member][1] for member in group) - sum(union.values()), 0),
+            "pairs": pairs,
+        }
+
+
+def find_similar_files(roots, options=None, progress=None, stop_event=None, stats=None, profiler=None):
+    """Yield groups of large files that are mostly, but not byte-for-byte, identical.
+
+    Files of at least ``options.block_min_size`` bytes are split into
+    content-defined chunks (averaging ``options.chunk_size``) on a process
+    ``HashPool``, streaming each file through a fixed buffer. Groups are
+    ``{"hash", "name", "size", "paths", "shared", "reclaimable", "pairs"}``:
+    ``shared`` is each path's percentage in common with the first path,
+    ``reclaimable`` the bytes a chunk-deduplicating store would save on the
+    whole set, and ``pairs`` every ``{"paths", "shared_bytes", "shared"}``
+    pair of members at or above ``options.min_shared`` percent.
+    """
+    options = options or DuplicateOptions()
+    stats = stats if stats is not None else ScanStats()
+    size_map = collect_sizes(roots, options, progress, stop_event, stats, profiler)
+    if size_map is None:
+        return
+
+    min_size = max(int(options.block_min_size), 1)
+    sizes = {path: size for size, paths in size_map.items() if size >= min_size for path in paths}
+    if progress is not None:
+        progress.set_stage("chunk", sum(sizes.values()))
+
+    files = []
+    with HashPool(options.workers, use_processes=True, max_inflight_bytes=options.max_inflight_bytes) as pool:
+        # Chunking streams through one buffer, so that is what a job holds in memory.
+        jobs = ((min(size, READ_SIZE), (path, options.chunk_size)) for path, size in sorted(sizes.items()))
+        func = chunk_file if profiler is None else partial(timed_call, chunk_file)
+        for (path, _avg_size), result in pool.imap(func, jobs, stop_event):
+            size = sizes[path]
+            if profiler is not None:
+                result, seconds = result
+                profiler.add("chunk", seconds, 1, size)
+            if progress is not None:
+                progress.hashed(path, size)
+            if result is None:
+                continue
+            stats.chunked_files += 1
+            stats.chunked_bytes += size
+            stats.chunks += len(result[1])
+            files.append((path, size, *result))
+    if stopped(stop_event):
+        return
+
+    if progress is not None:
+        progress.set_stage("compare")
+    yield from group_similar_files(files, min(max(int(options.min_shared), 1), 100))
@@ -0,0 +1,148 @@
+import mmap
+import os
+import re
+from functools import partial
+from time import perf_counter
+
+from .hashing import HashPool
+from .options import ContentOptions
+from .profiling import timed_call
+from .search import iter_candidates, match_paths
+
+SNIFF_BYTES = 8192
+MMAP_THRESHOLD = 1024 * 1024
+SNIPPET_CONTEXT = 80
+
+
+def compile_content_query(text, regex=False, case_sensitive=False):
+    """Compile ``text`` into a bytes pattern; raises ``re.error`` for a bad regex.
+
+    Files are searched as raw bytes, so the query is matched as UTF-8 and
+    case folding only applies to ASCII letters.
+    """
+    source = text.encode("utf-8")
+    if not regex:
+        source = re.escape(source)
+    flags = re.MULTILINE
+    if not case_sensitive:
+        flags |= re.IGNORECASE
+    return re.compile(source, flags)
+
+
+def is_binary(head):
+    return b"\0" in head
+
+
+def grep_file(path, pattern, max_matches=100):
+    """Return ``[(line, snippet), ...]`` for lines of ``path`` matching ``pattern``.
+
+    Returns ``None`` for files that look binary (a NUL byte in the first
+    8 KB) or cannot be read. Large files are mapped rather than read.
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(SNIFF_BYTES)
+            if is_binary(head):
+                return None
+            if len(head) < SNIFF_BYTES:
+                return _scan(head, pattern, max_matches)
+            size = os.fstat(f.fileno()).st_size
+            if size >= MMAP_THRESHOLD:
+                try:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                        return _scan(data, pattern, max_matches)
+                except (OSError, ValueError):
+                    pass
+            f.seek(0)
+            return _scan(f.read(), pattern, max_matches)
+    except OSError:
+        return None
+
+
+def _count_newlines(data, start, end):
+    if isinstance(data, bytes):
+        return data.count(b"\n", start, end)
+    return data[start:end].count(b"\n")
+
+
+def _scan(data, pattern, max_matches):
+    hits = []
+    line = 1
+    counted = 0
+    line_end = -1
+    for match in pattern.finditer(data):
+        start = match.start()
+        if start <= line_end:
+            # One hit per line, however many matches it holds.
+            continue
+        line += _count_newlines(data, counted, start)
+        counted = start
+        line_start = data.rfind(b"\n", 0, start) + 1
+        line_end = data.find(b"\n", start)
+        if line_end < 0:
+            line_end = len(data)
+        lo = max(line_start, start - SNIPPET_CONTEXT)
+        hi = min(line_end, max(match.end(), start) + SNIPPET_CONTEXT)
+        snippet = data[lo:hi].decode("utf-8", "replace").strip()
+        hits.append((line, snippet))
+        if len(hits) >= max_matches:
+            break
+    return hits
+
+
+def _grep_candidate(root, name, _size, pattern, max_matches):
+    return grep_file(os.path.join(root, name), pattern, max_matches)
+
+
+def content_search(
+    roots, text, filters=None, options=None, progress=None, stop_event=None, name_query="", profiler=None
+):
+    """Yield ``(folder, name, size, hits)`` for files under ``roots`` containing ``text``.
+
+    ``hits`` is the ``grep_file`` list of ``(line, snippet)`` pairs. The name
+    query, includes and exclusions in ``filters`` pick the candidates before
+    any file is opened; files over ``options.max_file_size`` are skipped.
+    Candidates are read on a ``HashPool`` and reported in walk order;
+    ``profiler`` times the walk, filter, stat and read (``grep``) stages.
+    """
+    options = options or ContentOptions()
+    pattern = compile_content_query(text, options.regex, options.case_sensitive)
+    max_file_size = options.max_file_size
+
+    def jobs():
+        for root, entry in iter_candidates(roots, name_query, filters, progress, stop_event, "grep", profiler):
+            started = profiler is not None and perf_counter()
+            try:
+                size = entry.stat().st_size
+            except OSError:
+                continue
+            if profiler is not None:
+                profiler.add("stat", perf_counter() - started)
+            if not size or (max_file_size and size > max_file_size):
+                continue
+            yield size, (root, entry.name, size, pattern, options.max_matches)
+
+    with HashPool(options.workers, options.use_processes, max_inflight_bytes=options.max_inflight_bytes) as pool:
+        func = _grep_candidate if profiler is None else partial(timed_call, _grep_candidate)
+        for (root, name, size, _pattern, _max), hits in pool.imap(func, jobs(), stop_event):
+            if profiler is not None:
+                hits, seconds = hits
+                profiler.add("grep", seconds, 1, size)
+            if progress is not None:
+                progress.hashed(os.path.join(root, name), size)
+            if hits:
+                if progress is not None:
+                    progress.matched()
+                yield root, name, size, hits
+
+
+def grep_paths(paths, roots, text, filters=None, options=None, name_query=""):
+    """Like ``content_search`` for just ``paths`` (files a watcher reports as changed), read in order."""
+    options = options or ContentOptions()
+    pattern = compile_content_query(text, options.regex, options.case_sensitive)
+    for folder, name, size in match_paths(paths, roots, name_query, filters):
+        if not size or (options.max_file_size and size > options.max_file_size):
+            continue
+        hits = grep_file(os.path.join(folder, name), pattern, options.max_matches)
+        if hits:
+            yield folder, name, size, hits
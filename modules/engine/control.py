@@ -0,0 +1,57 @@
+import threading
+
+
+class ScanControl:
+    """Cancel and pause switch shared by every thread of one scan.
+
+    ``set`` / ``is_set`` / ``wait`` behave like ``threading.Event``, so a
+    ``ScanControl`` can be passed wherever the engine takes a ``stop_event``.
+    ``pause`` holds each worker at its next ``checkpoint`` (every place the
+    engine checks for a stop, including between the buffers of a file being
+    hashed) until ``resume`` or ``set``.
+    """
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+
+    def set(self):
+        self._stop.set()
+        self._running.set()
+
+    def is_set(self):
+        return self._stop.is_set()
+
+    def clear(self):
+        self._stop.clear()
+        self._running.set()
+
+    def wait(self, timeout=None):
+        return self._stop.wait(timeout)
+
+    def pause(self):
+        if not self._stop.is_set():
+            self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    def checkpoint(self):
+        """Block while paused; return ``True`` once the scan is cancelled."""
+        self._running.wait()
+        return self._stop.is_set()
+
+
+def stopped(stop_event):
+    """True once ``stop_event`` is set; a paused ``ScanControl`` holds the caller here first."""
+    if stop_event is None:
+        return False
+    checkpoint = getattr(stop_event, "checkpoint", None)
+    if checkpoint is not None:
+        return checkpoint()
+    return stop_event.is_set()
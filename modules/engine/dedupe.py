@@ -0,0 +1,311 @@
+import itertools
+import json
+import os
+import shutil
+import stat
+import sys
+import time
+from dataclasses import dataclass, field
+
+from .control import stopped
+from .hashing import DEFAULT_ALGORITHM, HashPool, hash_file, resolve_backend
+from .stats import format_size
+from .storage import user_data_dir
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+LINK_MODES = ("hardlink", "reflink")
+# ioctl(dest, FICLONE, src) makes dest share src's extents (Btrfs, XFS, bcachefs).
+FICLONE = 0x40049409
+_batch_numbers = itertools.count(1)
+
+
+def reflink_available():
+    return fcntl is not None and sys.platform.startswith("linux")
+
+
+def available_link_modes():
+    return [mode for mode in LINK_MODES if mode != "reflink" or reflink_available()]
+
+
+@dataclass
+class LinkResult:
+    linked: list = field(default_factory=list)
+    skipped: list = field(default_factory=list)
+    reclaimed: int = 0
+    journal_path: str = None
+    stopped: bool = False
+
+    def summary(self):
+        verb = "Would link" if self.journal_path is None else "Linked"
+        text = f"{verb} {len(self.linked)} file(s), reclaiming {format_size(self.reclaimed)}"
+        if self.skipped:
+            text += f"; skipped {len(self.skipped)}"
+        return text
+
+
+class _Journal:
+    """Append-only JSON Lines log, flushed to disk after every record."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+
+def _new_batch():
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_batch_numbers)}"
+
+
+def default_journal_path(batch):
+    return os.path.join(user_data_dir("journals"), f"dedupe-{batch}.jsonl")
+
+
+def _backup_path(path, batch):
+    folder, name = os.path.split(path)
+    return os.path.join(folder, f".{name}.{batch}.dedupe")
+
+
+def _clone(source, target):
+    with open(source, "rb") as src, open(target, "xb") as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+def _replace_with_link(keeper, path, backup, mode):
+    # The copy is renamed aside first, so a failure can always put it back.
+    os.rename(path, backup)
+    try:
+        if mode == "reflink":
+            _clone(keeper, path)
+            shutil.copystat(backup, path)
+        else:
+            os.link(keeper, path)
+    except BaseException:
+        if os.path.lexists(path):
+            os.remove(path)
+        os.rename(backup, path)
+        raise
+
+
+def _candidates(size, paths, result):
+    """Return ``(keeper, keeper_stat, [(path, stat)])`` for the copies of one group that can be linked."""
+    keeper = paths[0]
+    try:
+        keeper_stat = os.lstat(keeper)
+    except OSError as exc:
+        result.skipped.extend((path, f"keeper unavailable: {exc.strerror}") for path in paths[1:])
+        return keeper, None, []
+    if not stat.S_ISREG(keeper_stat.st_mode) or keeper_stat.st_size != size:
+        result.skipped.extend((path, "keeper changed since the scan") for path in paths[1:])
+        return keeper, None, []
+    copies = []
+    for path in paths[1:]:
+        try:
+            st = os.lstat(path)
+        except OSError as exc:
+            result.skipped.append((path, exc.strerror or "unavailable"))
+            continue
+        if not stat.S_ISREG(st.st_mode) or st.st_size != size:
+            result.skipped.append((path, "changed since the scan"))
+        elif (st.st_dev, st.st_ino) == (keeper_stat.st_dev, keeper_stat.st_ino):
+            result.skipped.append((path, "already linked"))
+        elif st.st_dev != keeper_stat.st_dev:
+            result.skipped.append((path, "on a different volume"))
+        else:
+            copies.append((path, st))
+    return keeper, keeper_stat, copies
+
+
+def _unchanged(path, before):
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return (st.st_ino, st.st_size, st.st_mtime_ns) == (before.st_ino, before.st_size, before.st_mtime_ns)
+
+
+def link_duplicates(
+    groups,
+    mode="hardlink",
+    algorithm=DEFAULT_ALGORITHM,
+    journal_path=None,
+    workers=1,
+    dry_run=False,
+    progress=None,
+    stop_event=None,
+):
+    """Replace the copies in ``groups`` with links to each group's first path, as one batch.
+
+    ``groups`` are ``(size, paths)`` pairs from a duplicate scan. Right
+    before a group is linked, its files are re-hashed with ``algorithm`` and
+    only copies whose digest, size and modified time still match the first
+    path are replaced; the rest are listed in ``LinkResult.skipped``. Each
+    copy is renamed aside, then a hardlink (or, with ``mode="reflink"``, a
+    ``FICLONE`` clone keeping the copy's permissions and times) takes its
+    path. Every step goes to a JSON Lines journal first; the renamed copies
+    are deleted only once the whole batch succeeded. Any ``OSError`` (or a
+    set ``stop_event``) puts every copy back before returning or raising.
+    ``rollback_journal`` can also undo the batch later. ``dry_run`` verifies
+    without changing anything.
+    """
+    if mode not in LINK_MODES:
+        raise ValueError(f"unknown link mode: {mode}")
+    if mode == "reflink" and not reflink_available():
+        raise OSError("reflinks need Linux and a filesystem with FICLONE support")
+    algorithm = resolve_backend(algorithm)
+    groups = list(groups)
+    result = LinkResult()
+    if progress is not None:
+        progress.set_stage("verify", sum(size * len(paths) for size, paths in groups))
+
+    batch = _new_batch()
+    journal = None
+    if not dry_run:
+        result.journal_path = journal_path or default_journal_path(batch)
+        journal = _Journal(result.journal_path)
+        journal.write({"op": "begin", "mode": mode, "batch": batch, "time": time.time()})
+    done = []
+    try:
+        with HashPool(workers) as pool:
+            for size, paths in groups:
+                if stopped(stop_event):
+                    result.stopped = True
+                    break
+                keeper, keeper_stat, copies = _candidates(size, paths, result)
+                if not copies:
+                    continue
+                files = [(keeper, keeper_stat)] + copies
+                jobs = ((size, (path, algorithm, stop_event)) for path, _st in files)
+                digests = {}
+                for (path, _algorithm, _stop), digest in pool.imap(hash_file, jobs, stop_event):
+                    digests[path] = digest
+                    if progress is not None:
+                        progress.hashed(path, size)
+                if stopped(stop_event):
+                    result.stopped = True
+                    break
+                expected = digests.get(keeper) if _unchanged(keeper, keeper_stat) else None
+                for path, st in copies:
+                    if expected is None or digests.get(path) != expected:
+                        result.skipped.append((path, "content differs"))
+                        continue
+                    if not _unchanged(path, st):
+                        result.skipped.append((path, "changed while verifying"))
+                        continue
+                    if not dry_run:
+                        # Absolute paths, so ``rollback_journal`` works from any working directory.
+                        target = os.path.abspath(path)
+                        entry = {
+                            "op": "link",
+                            "path": target,
+                            "keeper": os.path.abspath(keeper),
+                            "backup": _backup_path(target, batch),
+                            "st_mode": st.st_mode,
+                            "atime_ns": st.st_atime_ns,
+                            "mtime_ns": st.st_mtime_ns,
+                        }
+                        journal.write(entry)
+                        _replace_with_link(keeper, path, entry["backup"], mode)
+                        done.append(entry)
+                    result.linked.append(path)
+                    # A copy that has other names keeps its blocks until those go too.
+                    if st.st_nlink == 1:
+                        result.reclaimed += size
+    except BaseException:
+        _abort(done, journal)
+        raise
+    if result.stopped:
+        _abort(done, journal)
+        result.linked = []
+        result.reclaimed = 0
+        return result
+
+    if journal is not None:
+        for entry in done:
+            try:
+                os.remove(entry["backup"])
+            except OSError as exc:
+                result.skipped.append((entry["backup"], f"could not remove backup: {exc.strerror}"))
+        journal.write({"op": "commit", "time": time.time()})
+        journal.close()
+    return result
+
+
+def _restore(entries):
+    restored = 0
+    for entry in reversed(entries):
+        if os.path.lexists(entry["backup"]):
+            os.replace(entry["backup"], entry["path"])
+            restored += 1
+    return restored
+
+
+def _abort(done, journal):
+    _restore(done)
+    if journal is not None:
+        journal.write({"op": "rollback", "time": time.time()})
+        journal.close()
+
+
+def _detach(entry):
+    # Swap the shared file for an independent copy with the original metadata.
+    path = entry["path"]
+    temp = f"{path}.undo"
+    shutil.copyfile(path, temp)
+    os.chmod(temp, stat.S_IMODE(entry["st_mode"]))
+    os.utime(temp, ns=(entry["atime_ns"], entry["mtime_ns"]))
+    os.replace(temp, path)
+
+
+def rollback_journal(path):
+    """Undo the link batch recorded in the journal at ``path``; returns ``(restored, missing)``.
+
+    A batch that never committed (it crashed part-way) gets its renamed
+    copies moved back. A committed batch has its links replaced by
+    independent copies with their original permissions and times, which
+    needs the disk space the batch reclaimed. ``missing`` lists the paths
+    found neither linked nor renamed aside; while there are any, the batch
+    is not marked undone, so it can be rolled back again.
+    """
+    entries = []
+    state = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record["op"] == "link":
+                entries.append(record)
+            else:
+                state = record["op"]
+    if state in ("rollback", "undone"):
+        return 0, []
+    if state != "commit":
+        missing = [
+            entry["path"]
+            for entry in entries
+            if not os.path.lexists(entry["backup"]) and not os.path.lexists(entry["path"])
+        ]
+        restored = _restore(entries)
+    else:
+        missing = []
+        restored = 0
+        for entry in entries:
+            if os.path.exists(entry["path"]):
+                _detach(entry)
+                restored += 1
+            else:
+                missing.append(entry["path"])
+    if not missing:
+        journal = _Journal(path)
+        journal.write({"op": "undone" if state == "commit" else "rollback", "time": time.time()})
+        journal.close()
+    return restored, missing
@@ -0,0 +1,242 @@
+import os
+from functools import partial
+from time import perf_counter
+
+from .control import stopped
+from .filters import DuplicateMatcher
+from .hash_cache import HashCache, file_signature
+from .hashing import HashPool, hash_file, partial_hash, resolve_backend
+from .options import DuplicateOptions
+from .profiling import timed_call
+from .stats import ScanStats
+from .walk import walk_roots
+
+
+def collect_sizes(roots, options, progress=None, stop_event=None, stats=None, profiler=None):
+    """Group candidate files by size; returns ``None`` if stopped part-way."""
+    folder_tokens = set(options.excluded_folders)
+    walk_tokens = folder_tokens | set(options.skip_tokens)
+    matcher = DuplicateMatcher(options.pattern, folder_tokens, options.excluded_names)
+
+    size_map = {}
+    seen = set()
+    if progress is not None:
+        progress.set_stage("walk")
+    walk = walk_roots(roots, options.max_depth, walk_tokens, workers=options.walk_workers, stop_event=stop_event)
+    if profiler is not None:
+        walk = profiler.timed("walk", walk, lambda listing: len(listing[2]))
+    for root, _dirs, files in walk:
+        if progress is not None:
+            progress.dir_visited(root, len(files))
+        if stopped(stop_event):
+            return None
+        accept = matcher.for_folder(root)
+        if accept is None:
+            continue
+        if profiler is not None:
+            files = profiler.filter(accept, files)
+            started = perf_counter()
+        for entry in files:
+            if profiler is None and not accept(entry.name):
+                continue
+            full_path = entry.path
+            if full_path in seen:
+                continue
+            try:
+                size = entry.stat().st_size
+            except OSError:
+                continue
+            seen.add(full_path)
+            if stats is not None:
+                stats.files += 1
+            size_map.setdefault(size, []).append(full_path)
+        if profiler is not None:
+            profiler.add("stat", perf_counter() - started, len(files))
+    if stopped(stop_event):
+        return None
+    return size_map
+
+
+def _hash_stage(pool, func, items, make_job, cache, kind_of, algorithm, block, verify, stop_event, stats, timing=None):
+    """Hash ``(path, size)`` items, serving unchanged files from ``cache``.
+
+    Yields ``(path, size, digest, cached)``; cache hits come first, then the
+    misses in submission order as the pool finishes them. ``timing(size,
+    seconds)`` is called with each miss's hashing time, measured in the worker.
+    """
+    misses = {}
+    for path, size in items:
+        if stopped(stop_event):
+            return
+        signature = file_signature(path) if cache is not None else None
+        if signature is not None and not verify:
+            digest = cache.get(signature, kind_of(size), algorithm, block if kind_of(size) == "partial" else 0)
+            if digest is not None:
+                stats.cache_hits += 1
+                yield path, size, digest, True
+                continue
+        misses[path] = (size, signature)
+
+    jobs = (make_job(path, size) for path, (size, _signature) in misses.items())
+    if timing is not None:
+        func = partial(timed_call, func)
+    for args, digest in pool.imap(func, jobs, stop_event):
+        path = args[0]
+        size, signature = misses[path]
+        if timing is not None:
+            digest, seconds = digest
+            timing(size, seconds)
+        if digest and signature is not None:
+            kind = kind_of(size)
+            cache.put(signature, kind, algorithm, digest, block if kind == "partial" else 0)
+        yield path, size, digest, False
+
+
+def find_duplicates(roots, options=None, progress=None, stop_event=None, stats=None, profiler=None):
+    """Yield ``{"hash", "name", "size", "paths"}`` for every set of identical files under ``roots``.
+
+    Candidates go through three stages: files are grouped by size, same-size
+    files are hashed on their first and last ``options.partial_size`` bytes,
+    and only files whose partial hashes collide are hashed in full. Both hash
+    stages run on a ``HashPool`` sized by ``options.workers`` and consult the
+    persistent ``HashCache`` first unless ``options.use_cache`` is off;
+    ``options.verify`` re-reads every file and refreshes the cache. Pass a
+    ``ScanStats`` as ``stats`` to receive per-stage file and byte counts, and a
+    ``ScanProfiler`` as ``profiler`` to time the walk, stat, filter and both
+    hash stages.
+
+    ``progress`` is an optional ``ProgressReporter``; it sees the walk, then
+    each hash stage with the bytes it expects to read, so consumers can show
+    rates and an ETA. The generator simply ends when ``stop_event`` is set; callers check the event
+    to tell a stopped scan from a finished one.
+    """
+    options = options or DuplicateOptions()
+    stats = stats if stats is not None else ScanStats()
+    block = max(int(options.partial_size), 1)
+    algorithm = resolve_backend(options.algorithm)
+    size_map = collect_sizes(roots, options, progress, stop_event, stats, profiler)
+    if size_map is None:
+        return
+
+    buckets = [(size, paths) for size, paths in size_map.items() if len(paths) > 1]
+    for size, paths in buckets:
+        stats.size_candidates += len(paths)
+        stats.candidate_bytes += size * len(paths)
+    if progress is not None:
+        progress.set_stage("partial", sum(min(size, 2 * block) * len(paths) for size, paths in buckets))
+
+    # Thread workers stop mid-file; a process pool only between files.
+    control = None if options.use_processes else stop_event
+    cache = HashCache(options.cache_path) if options.use_cache else None
+    partial_timing = full_timing = None
+    if profiler is not None:
+
+        def partial_timing(size, seconds):
+            profiler.add("partial", seconds, 1, min(size, 2 * block))
+
+        def full_timing(size, seconds):
+            profiler.add("hash", seconds, 1, size)
+
+    try:
+        with HashPool(options.workers, options.use_processes, max_inflight_bytes=options.max_inflight_bytes) as pool:
+            def partial_kind(size):
+                # Files no larger than two blocks are read end to end by the partial pass.
+                return "full" if size <= 2 * block else "partial"
+
+            partial_maps = {}
+            for path, size, h, cached in _hash_stage(
+                pool,
+                partial_hash,
+                ((path, size) for size, paths in buckets for path in paths),
+                lambda path, size: (min(size, 2 * block), (path, size, block, algorithm, control)),
+                cache,
+                partial_kind,
+                algorithm,
+                block,
+                options.verify,
+                stop_event,
+                stats,
+                partial_timing,
+            ):
+                if progress is not None:
+                    progress.hashed(path, min(size, 2 * block), cached)
+                if not h:
+                    continue
+                if not cached:
+                    stats.partial_files += 1
+                    stats.partial_bytes += min(size, 2 * block)
+                partial_maps.setdefault(size, {}).setdefault(h, []).append(path)
+            if stopped(stop_event):
+                return
+
+            collisions = []
+            for size, _paths in buckets:
+                for partial, same_partial in partial_maps.get(size, {}).items():
+                    if len(same_partial) < 2:
+                        continue
+                    if size <= 2 * block:
+                        yield make_group(partial, size, same_partial)
+                    else:
+                        collisions.append((size, same_partial))
+
+            if progress is not None:
+                progress.set_stage("hash", sum(size * len(same) for size, same in collisions))
+            hash_maps = {}
+            for path, size, h, cached in _hash_stage(
+                pool,
+                hash_file,
+                ((path, size) for size, same_partial in collisions for path in same_partial),
+                lambda path, size: (size, (path, algorithm, control)),
+                cache,
+                lambda _size: "full",
+                algorithm,
+                block,
+                options.verify,
+                stop_event,
+                stats,
+                full_timing,
+            ):
+                if progress is not None:
+                    progress.hashed(path, size, cached)
+                if not h:
+                    continue
+                if not cached:
+                    stats.full_files += 1
+                    stats.full_bytes += size
+                hash_maps.setdefault(size, {}).setdefault(h, []).append(path)
+            if stopped(stop_event):
+                return
+    finally:
+        if cache is not None:
+            cache.close()
+
+    for size, _same_partial in collisions:
+        for h, same_paths in hash_maps.pop(size, {}).items():
+            if len(same_paths) > 1:
+                yield make_group(h, size, same_paths)
+
+
+def make_group(digest, size, paths):
+    paths = sorted(paths)
+    return {
+        "hash": digest,
+        "name": os.path.basename(paths[0]) or "(unknown file)",
+        "size": size,
+        "paths": paths,
+    }
+
+
+def wasted_bytes(group):
+    """Bytes held by every copy but one; partial duplicates report their ``reclaimable`` bytes."""
+    if "reclaimable" in group:
+        return group["reclaimable"]
+    return group["size"] * max(len(group["paths"]) - 1, 0)
+
+
+def sort_groups(groups, by="name"):
+    """Sort group dicts by name then first path, or with ``by="wasted"`` by wasted bytes (largest first)."""
+    if by == "wasted":
+        groups.sort(key=lambda g: (-wasted_bytes(g), g["name"].lower(), g["paths"][0]))
+    else:
+        groups.sort(key=lambda g: (g["name"].lower(), g["paths"][0]))
+    return groups
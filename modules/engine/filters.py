@@ -0,0 +1,171 @@
+import fnmatch
+import os
+import re
+
+
+def normalize_query(query):
+    lowered_query = query.strip().lower()
+    return lowered_query, any(ch in lowered_query for ch in "*?")
+
+
+def normalize_include_token(value):
+    value = value.strip().lower()
+    if value and not value.startswith(".") and not value.startswith("*"):
+        value = "." + value
+    return value
+
+
+def normalize_include_filters(include_exts):
+    if not include_exts:
+        return []
+
+    filters = []
+    for token in include_exts:
+        if token.startswith("*") or any(ch in token for ch in "*?"):
+            filters.append(("pattern", token.lower()))
+        elif token.startswith("."):
+            filters.append(("ext", token.lower()))
+        else:
+            filters.append(("ext", f".{token.lower()}"))
+    return filters
+
+
+def compile_globs(patterns):
+    """Combine fnmatch-style ``patterns`` into one regex, or ``None`` if there are none.
+
+    Patterns go through ``os.path.normcase`` first, as ``fnmatch.fnmatch`` does.
+    """
+    patterns = sorted({os.path.normcase(p) for p in patterns})
+    if not patterns:
+        return None
+    return re.compile("|".join(fnmatch.translate(p) for p in patterns))
+
+
+def compile_substrings(needles):
+    """Return ``(regex, longest)`` that finds any of ``needles``; ``(None, 0)`` if empty."""
+    needles = sorted(set(needles), key=len, reverse=True)
+    if not needles:
+        return None, 0
+    return re.compile("|".join(re.escape(n) for n in needles)), len(needles[0])
+
+
+def _tail(prefix, width):
+    # A match of up to ``width + 1`` chars that reaches into the file name can
+    # start no earlier than the last ``width`` chars of the folder prefix.
+    if width <= 0:
+        return ""
+    return prefix[-width:]
+
+
+def _has_wildcard(pattern):
+    return any(ch in pattern for ch in "*?")
+
+
+class SearchMatcher:
+    """File Search query, include and exclusion rules, compiled once per search.
+
+    ``for_folder(root)`` does the per-directory work and returns a predicate
+    over file names in ``root``, or ``None`` when the folder tokens exclude
+    every file there. Matches exactly what the per-file checks used to:
+    query substring or glob on the name, includes by extension or glob,
+    folder tokens anywhere in the lowered full path, name globs on the name.
+    """
+
+    def __init__(self, query, include_exts=(), folder_tokens=(), name_patterns=()):
+        lowered_query, use_wildcards = normalize_query(query)
+        self.query_text = lowered_query
+        self.query_glob = compile_globs([lowered_query]) if use_wildcards else None
+        includes = normalize_include_filters(include_exts)
+        self.has_includes = bool(includes)
+        self.include_exts = frozenset(value for kind, value in includes if kind == "ext")
+        self.include_glob = compile_globs(value for kind, value in includes if kind == "pattern")
+        self.folder_tokens, self.token_width = compile_substrings(folder_tokens)
+        self.name_glob = compile_globs(name_patterns)
+
+    def for_folder(self, root):
+        prefix = os.path.join(root, "").lower()
+        tokens = self.folder_tokens
+        tail = ""
+        if tokens is not None:
+            if tokens.search(prefix):
+                return None
+            tail = _tail(prefix, self.token_width - 1)
+        query_text = self.query_text
+        query_glob = self.query_glob
+        has_includes = self.has_includes
+        include_exts = self.include_exts
+        include_glob = self.include_glob
+        name_glob = self.name_glob
+        splitext = os.path.splitext
+
+        def accept(name):
+            lname = name.lower()
+            if query_glob is not None:
+                if query_glob.match(lname) is None:
+                    return False
+            elif query_text not in lname:
+                return False
+            if has_includes and splitext(lname)[1] not in include_exts:
+                if include_glob is None or include_glob.match(lname) is None:
+                    return False
+            if tokens is not None and tokens.search(tail + lname):
+                return False
+            if name_glob is not None and name_glob.match(lname):
+                return False
+            return True
+
+        return accept
+
+
+class DuplicateMatcher:
+    """Duplicate Finder name filter and exclusion rules, compiled once per scan.
+
+    Same ``for_folder(root)`` contract as ``SearchMatcher``. Plain folder
+    tokens and plain name patterns both exclude on a substring of the lowered
+    full path, so they share one regex; wildcard patterns are tried against
+    the name and the full path.
+    """
+
+    def __init__(self, pattern="", folder_tokens=(), name_patterns=()):
+        pattern = (pattern or "").strip().lower()
+        wildcard = _has_wildcard(pattern)
+        self.pattern_text = pattern if pattern and not wildcard else None
+        self.pattern_glob = compile_globs([pattern]) if wildcard else None
+        plain_names = [p for p in name_patterns if not _has_wildcard(p)]
+        self.excluded, self.excluded_width = compile_substrings([*folder_tokens, *plain_names])
+        self.name_glob = compile_globs(p for p in name_patterns if _has_wildcard(p))
+
+    def for_folder(self, root):
+        prefix = os.path.join(root, "").lower()
+        excluded = self.excluded
+        excluded_tail = ""
+        if excluded is not None:
+            if excluded.search(prefix):
+                return None
+            excluded_tail = _tail(prefix, self.excluded_width - 1)
+        pattern_text = self.pattern_text
+        pattern_tail = ""
+        if pattern_text is not None:
+            if pattern_text in prefix:
+                pattern_text = None
+            else:
+                pattern_tail = _tail(prefix, len(pattern_text) - 1)
+        pattern_glob = self.pattern_glob
+        name_glob = self.name_glob
+        glob_prefix = os.path.normcase(prefix)
+
+        def accept(name):
+            lname = name.lower()
+            if pattern_text is not None and pattern_text not in pattern_tail + lname:
+                return False
+            if pattern_glob is not None:
+                if pattern_glob.match(lname) is None and pattern_glob.match(glob_prefix + lname) is None:
+                    return False
+            if excluded is not None and excluded.search(excluded_tail + lname):
+                return False
+            if name_glob is not None:
+                if name_glob.match(lname) or name_glob.match(glob_prefix + lname):
+                    return False
+            return True
+
+        return accept
@@ -0,0 +1,151 @@
+import os
+import sqlite3
+import time
+
+from .storage import user_data_dir
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    algorithm TEXT NOT NULL,
+    block INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (dev, ino, kind, algorithm, block)
+);
+CREATE INDEX IF NOT EXISTS hashes_last_used ON hashes(last_used);
+"""
+
+DEFAULT_MAX_ENTRIES = 2_000_000
+BATCH_SIZE = 500
+
+
+def file_signature(path):
+    """``(device, inode, size, mtime_ns)`` for ``path``, or ``None`` if it cannot be cached."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not st.st_ino:
+        # Some network and FAT filesystems report no stable file id.
+        return None
+    return st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns
+
+
+class HashCache:
+    """SQLite store of file digests keyed on (device, inode, size, mtime).
+
+    Reads and writes are buffered and flushed in batches; ``close`` trims the
+    least recently used rows once the table grows past ``max_entries``.
+    """
+
+    def __init__(self, path=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path or os.path.join(user_data_dir("cache"), "hashes.sqlite3")
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes = []
+        self._touches = []
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        self.close()
+
+    def get(self, signature, kind, algorithm, block=0):
+        dev, ino, size, mtime_ns = signature
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, digest FROM hashes WHERE dev = ? AND ino = ? AND kind = ? AND algorithm = ? "
+            "AND block = ?",
+            (dev, ino, kind, algorithm, block),
+        ).fetchone()
+        if row is None or row[0] != size or row[1] != mtime_ns:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touches.append((time.time(), dev, ino, kind, algorithm, block))
+        if len(self._touches) >= BATCH_SIZE:
+            self.flush()
+        return row[2]
+
+    def put(self, signature, kind, algorithm, digest, block=0):
+        dev, ino, size, mtime_ns = signature
+        self._writes.append((dev, ino, kind, algorithm, block, size, mtime_ns, digest, time.time()))
+        if len(self._writes) >= BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self._writes:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO hashes(dev, ino, kind, algorithm, block, size, mtime_ns, digest, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._writes,
+            )
+            self._writes = []
+        if self._touches:
+            self.conn.executemany(
+                "UPDATE hashes SET last_used = ? WHERE dev = ? AND ino = ? AND kind = ? AND algorithm = ? "
+                "AND block = ?",
+                self._touches,
+            )
+            self._touches = []
+        self.conn.commit()
+
+    def invalidate(self, paths):
+        """Drop digests cached for the inodes of ``paths`` that no longer match the file.
+
+        Meant for files a watcher reports as modified; rows of deleted files
+        cannot be found by path and age out through ``evict``. Returns the
+        number of rows removed.
+        """
+        self.flush()
+        removed = 0
+        for path in paths:
+            signature = file_signature(path)
+            if signature is None:
+                continue
+            dev, ino, size, mtime_ns = signature
+            removed += self.conn.execute(
+                "DELETE FROM hashes WHERE dev = ? AND ino = ? AND (size != ? OR mtime_ns != ?)",
+                (dev, ino, size, mtime_ns),
+            ).rowcount
+        self.conn.commit()
+        return removed
+
+    def evict(self):
+        count = self.conn.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                "DELETE FROM hashes WHERE rowid IN (SELECT rowid FROM hashes ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+            self.conn.commit()
+        return max(excess, 0)
+
+    def clear(self):
+        self._writes = []
+        self._touches = []
+        self.conn.execute("DELETE FROM hashes")
+        self.conn.commit()
+
+    def close(self):
+        if self.conn is None:
+            return
+        try:
+            self.flush()
+            self.evict()
+        finally:
+            self.conn.close()
+            self.conn = None
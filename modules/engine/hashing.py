@@ -0,0 +1,217 @@
+import os
+import hashlib
+import importlib
+import mmap
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from .control import stopped
+
+
+# How long a waiting consumer sleeps before re-checking the stop event.
+POLL_INTERVAL = 0.1
+
+DEFAULT_ALGORITHM = "sha1"
+MIN_BUFFER = 64 * 1024
+MAX_BUFFER = 1024 * 1024
+MMAP_THRESHOLD = 64 * 1024 * 1024
+MMAP_SLICE = 8 * 1024 * 1024
+
+
+def _optional(module_name, attr):
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError:
+        return None
+    return getattr(module, attr, None)
+
+
+HASH_BACKENDS = {
+    "sha1": hashlib.sha1,
+    "blake2b": lambda: hashlib.blake2b(digest_size=20),
+}
+for _name, _module, _attr in (("xxh3", "xxhash", "xxh3_128"), ("blake3", "blake3", "blake3")):
+    _factory = _optional(_module, _attr)
+    if _factory is not None:
+        HASH_BACKENDS[_name] = _factory
+
+
+def available_backends():
+    return list(HASH_BACKENDS)
+
+
+def resolve_backend(name):
+    """Return ``name`` if it is installed, otherwise the default algorithm."""
+    return name if name in HASH_BACKENDS else DEFAULT_ALGORITHM
+
+
+_local = threading.local()
+
+
+def _buffer(size):
+    # One reusable buffer per worker thread, sized to the file within bounds.
+    wanted = min(max(size, MIN_BUFFER), MAX_BUFFER)
+    buf = getattr(_local, "buffer", None)
+    if buf is None or len(buf) < wanted:
+        buf = bytearray(wanted)
+        _local.buffer = buf
+    return memoryview(buf)[:wanted]
+
+
+def _update_from(hasher, f, size_hint, limit=None, stop_event=None):
+    # Reads ``limit`` bytes, or to end of file when ``limit`` is None; False if stopped part-way.
+    view = _buffer(size_hint if limit is None else limit)
+    remaining = limit
+    while remaining is None or remaining > 0:
+        if stopped(stop_event):
+            return False
+        want = len(view) if remaining is None else min(len(view), remaining)
+        n = f.readinto(view[:want])
+        if not n:
+            break
+        hasher.update(view[:n])
+        if remaining is not None:
+            remaining -= n
+    return True
+
+
+def hash_file(path, algorithm=DEFAULT_ALGORITHM, stop_event=None):
+    """Hex digest of ``path``; ``None`` if it cannot be read or ``stop_event`` fires part-way.
+
+    ``stop_event`` is checked between buffers (and pauses there when it is a
+    ``ScanControl``); it cannot cross into a process pool, so pass ``None`` there.
+    """
+    try:
+        hasher = HASH_BACKENDS[resolve_backend(algorithm)]()
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size >= MMAP_THRESHOLD:
+                try:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        view = memoryview(mapped)
+                        try:
+                            for offset in range(0, len(view), MMAP_SLICE):
+                                if stopped(stop_event):
+                                    return None
+                                hasher.update(view[offset : offset + MMAP_SLICE])
+                        finally:
+                            view.release()
+                    return hasher.hexdigest()
+                except (OSError, ValueError):
+                    hasher = HASH_BACKENDS[resolve_backend(algorithm)]()
+                    f.seek(0)
+            if not _update_from(hasher, f, size, stop_event=stop_event):
+                return None
+        return hasher.hexdigest()
+    except Exception:
+        return None
+
+
+def partial_hash(path, size, block, algorithm=DEFAULT_ALGORITHM, stop_event=None):
+    """Hash of the first and last ``block`` bytes; the full-file hash when ``size <= 2 * block``."""
+    if size <= 2 * block:
+        return hash_file(path, algorithm, stop_event)
+    try:
+        hasher = HASH_BACKENDS[resolve_backend(algorithm)]()
+        with open(path, "rb") as f:
+            if not _update_from(hasher, f, block, block, stop_event):
+                return None
+            f.seek(size - block)
+            if not _update_from(hasher, f, block, block, stop_event):
+                return None
+        return hasher.hexdigest()
+    except Exception:
+        return None
+
+
+def default_workers():
+    return max(1, min(8, os.cpu_count() or 1))
+
+
+class HashPool:
+    """Bounded worker pool that runs hash jobs concurrently and yields results in job order.
+
+    At most ``max_pending`` jobs are queued at once and, unless the queue is
+    empty, no job is submitted that would push the bytes being read past
+    ``max_inflight_bytes``. Threads are used by default because ``hashlib``
+    releases the GIL while hashing; ``use_processes`` switches to a process
+    pool. With ``workers <= 1`` jobs run inline on the calling thread.
+    """
+
+    def __init__(self, workers=1, use_processes=False, max_pending=None, max_inflight_bytes=256 * 1024 * 1024):
+        self.workers = max(int(workers or 1), 1)
+        self.use_processes = use_processes
+        self.max_pending = max_pending or self.workers * 4
+        self.max_inflight_bytes = max_inflight_bytes
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        self.shutdown()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.use_processes:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hash")
+        return self._executor
+
+    def imap(self, func, jobs, stop_event=None):
+        """Run ``func(*args)`` for each ``(weight, args)`` in ``jobs``; yield ``(args, result)`` in order.
+
+        ``weight`` is the number of bytes the job will read. The generator
+        returns early, cancelling queued jobs, as soon as ``stop_event`` is set.
+        """
+        if self.workers <= 1:
+            for _weight, args in jobs:
+                if stopped(stop_event):
+                    return
+                yield args, func(*args)
+            return
+
+        executor = self._get_executor()
+        jobs = iter(jobs)
+        pending = deque()
+        inflight = 0
+        upcoming = None
+        exhausted = False
+        try:
+            while True:
+                if stopped(stop_event):
+                    return
+                while not exhausted and len(pending) < self.max_pending:
+                    if upcoming is None:
+                        try:
+                            upcoming = next(jobs)
+                        except StopIteration:
+                            exhausted = True
+                            break
+                    weight, args = upcoming
+                    if pending and inflight + weight > self.max_inflight_bytes:
+                        break
+                    pending.append((weight, args, executor.submit(func, *args)))
+                    inflight += weight
+                    upcoming = None
+                if not pending:
+                    return
+                weight, args, future = pending[0]
+                try:
+                    result = future.result(timeout=POLL_INTERVAL)
+                except FutureTimeout:
+                    continue
+                pending.popleft()
+                inflight -= weight
+                yield args, result
+        finally:
+            for _weight, _args, future in pending:
+                future.cancel()
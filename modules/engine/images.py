@@ -0,0 +1,255 @@
+import importlib.util
+import math
+import os
+from functools import lru_cache
+
+from .control import stopped
+from .duplicates import _hash_stage, collect_sizes
+from .hash_cache import HashCache
+from .hashing import HashPool
+from .options import DuplicateOptions
+from .stats import ScanStats
+
+IMAGE_EXTENSIONS = frozenset({".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tif", ".tiff", ".webp"})
+IMAGE_HASHES = ("phash", "dhash", "ahash")
+DEFAULT_IMAGE_HASH = "phash"
+HASH_BITS = 64
+# pHash keeps the 8x8 lowest frequencies of a 32x32 DCT.
+DCT_SIZE = 32
+DCT_KEEP = 8
+DCT_COS = [[math.cos(math.pi * (2 * x + 1) * u / (2 * DCT_SIZE)) for x in range(DCT_SIZE)] for u in range(DCT_KEEP)]
+
+
+def images_available():
+    """True when Pillow is installed, which the similar-images mode needs; checked without importing it."""
+    return importlib.util.find_spec("PIL") is not None
+
+
+@lru_cache(maxsize=None)
+def _pillow():
+    # Imported on first decode so that scans not using this mode never load Pillow.
+    from PIL import Image, ImageOps
+
+    resample = Image.Resampling.LANCZOS if hasattr(Image, "Resampling") else Image.LANCZOS
+    return Image, ImageOps, resample
+
+
+def _gray_pixels(path, width, height):
+    Image, ImageOps, resample = _pillow()
+    with Image.open(path) as img:
+        # Lets JPEG decode at 1/2 .. 1/8 scale instead of full resolution.
+        img.draft("L", (width * 4, height * 4))
+        img = ImageOps.exif_transpose(img).convert("L")
+        return list(img.resize((width, height), resample).getdata())
+
+
+def _to_int(bits):
+    value = 0
+    for bit in bits:
+        value = (value << 1) | bit
+    return value
+
+
+def average_hash(pixels):
+    mean = sum(pixels) / len(pixels)
+    return _to_int(p > mean for p in pixels)
+
+
+def difference_hash(pixels, width=9):
+    rows = (pixels[i : i + width] for i in range(0, len(pixels), width))
+    return _to_int(row[col] < row[col + 1] for row in rows for col in range(width - 1))
+
+
+def dct_hash(pixels):
+    rows = [pixels[y * DCT_SIZE : (y + 1) * DCT_SIZE] for y in range(DCT_SIZE)]
+    # Separable DCT-II, computing only the low-frequency corner.
+    partial = [[sum(p * c for p, c in zip(row, cos_u)) for cos_u in DCT_COS] for row in rows]
+    coeffs = [
+        sum(partial[y][u] * cos_v[y] for y in range(DCT_SIZE)) for cos_v in DCT_COS for u in range(DCT_KEEP)
+    ]
+    median = sorted(coeffs)[len(coeffs) // 2]
+    return _to_int(c > median for c in coeffs)
+
+
+def image_hash(path, method=DEFAULT_IMAGE_HASH):
+    """64-bit perceptual hash of the image at ``path`` as an ``int``; ``None`` if it cannot be decoded."""
+    try:
+        if method == "ahash":
+            return average_hash(_gray_pixels(path, 8, 8))
+        if method == "dhash":
+            return difference_hash(_gray_pixels(path, 9, 8))
+        return dct_hash(_gray_pixels(path, DCT_SIZE, DCT_SIZE))
+    except Exception:
+        return None
+
+
+def image_digest(path, method=DEFAULT_IMAGE_HASH):
+    # Hex form, so results cross process boundaries and fit the hash cache.
+    value = image_hash(path, method)
+    return None if value is None else f"{value:016x}"
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def similarity(distance):
+    """Percentage of matching hash bits for a Hamming ``distance``."""
+    return round(100 * (HASH_BITS - distance) / HASH_BITS)
+
+
+class BKTree:
+    """Burkhard-Keller tree over integer hashes under Hamming distance.
+
+    ``search`` only descends into children whose edge distance is within
+    ``radius`` of the query's distance to the node, so a lookup with a small
+    radius visits a fraction of the tree instead of every hash.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, value, item):
+        self.size += 1
+        if self.root is None:
+            self.root = (value, [item], {})
+            return
+        node = self.root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = (value, [item], {})
+                return
+            node = child
+
+    def search(self, value, radius):
+        """Return ``[(distance, item), ...]`` for every item within ``radius`` bits of ``value``."""
+        found = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node_value, items, children = stack.pop()
+            distance = hamming(value, node_value)
+            if distance <= radius:
+                found.extend((distance, item) for item in items)
+            low, high = distance - radius, distance + radius
+            stack.extend(child for edge, child in children.items() if low <= edge <= high)
+        return found
+
+
+def group_similar(hashes, max_distance):
+    """Group ``(item, hash)`` pairs whose hashes lie within ``max_distance`` bits.
+
+    Each group is led by the first unassigned item in ``hashes`` and holds
+    every other unassigned item within range of it, so all members are
+    scored against the same image. Returns lists of ``(distance, item)``,
+    leader first with distance 0.
+    """
+    tree = BKTree()
+    for item, value in hashes:
+        tree.add(value, item)
+    assigned = set()
+    groups = []
+    for item, value in hashes:
+        if item in assigned:
+            continue
+        members = sorted(
+            (distance, other)
+            for distance, other in tree.search(value, max_distance)
+            if other != item and other not in assigned
+        )
+        if not members:
+            continue
+        assigned.add(item)
+        assigned.update(other for _distance, other in members)
+        groups.append([(0, item)] + members)
+    return groups
+
+
+def find_similar_images(roots, options=None, progress=None, stop_event=None, stats=None, profiler=None):
+    """Yield ``{"hash", "name", "size", "paths", "distances"}`` for sets of visually similar images.
+
+    Images under ``roots`` that pass the usual filters are decoded to small
+    grayscale thumbnails and hashed with ``options.image_hash`` (``phash``,
+    ``dhash`` or ``ahash``) on a process ``HashPool``; hashes are kept in the
+    ``HashCache`` like file digests. Images within ``options.max_distance``
+    bits of a group's first image join it; ``distances`` gives each path's
+    distance to that image. Raises ``RuntimeError`` when Pillow is missing.
+    """
+    if not images_available():
+        raise RuntimeError("Similar-image search needs Pillow (pip install Pillow).")
+    options = options or DuplicateOptions()
+    stats = stats if stats is not None else ScanStats()
+    method = options.image_hash if options.image_hash in IMAGE_HASHES else DEFAULT_IMAGE_HASH
+    size_map = collect_sizes(roots, options, progress, stop_event, stats, profiler)
+    if size_map is None:
+        return
+
+    images = sorted(
+        (path, size)
+        for size, paths in size_map.items()
+        for path in paths
+        if size and os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS
+    )
+    stats.images = len(images)
+    if progress is not None:
+        progress.set_stage("image", sum(size for _path, size in images))
+
+    hashes = []
+    sizes = {}
+    cache = HashCache(options.cache_path) if options.use_cache else None
+    timing = None
+    if profiler is not None:
+
+        def timing(size, seconds):
+            profiler.add("image", seconds, 1, size)
+
+    try:
+        with HashPool(options.workers, use_processes=True, max_inflight_bytes=options.max_inflight_bytes) as pool:
+            for path, size, digest, cached in _hash_stage(
+                pool,
+                image_digest,
+                images,
+                lambda path, size: (size, (path, method)),
+                cache,
+                lambda _size: "image",
+                method,
+                0,
+                options.verify,
+                stop_event,
+                stats,
+                timing,
+            ):
+                if progress is not None:
+                    progress.hashed(path, size, cached)
+                if not cached:
+                    stats.images_decoded += 1
+                if digest:
+                    hashes.append((path, int(digest, 16)))
+                    sizes[path] = size
+            if stopped(stop_event):
+                return
+    finally:
+        if cache is not None:
+            cache.close()
+
+    if progress is not None:
+        progress.set_stage("compare")
+    hashes.sort()
+    values = dict(hashes)
+    for members in group_similar(hashes, max(int(options.max_distance), 0)):
+        leader = members[0][1]
+        yield {
+            "hash": f"{values[leader]:016x}",
+            "name": os.path.basename(leader) or "(unknown file)",
+            "size": sizes[leader],
+            "paths": [path for _distance, path in members],
+            "distances": [distance for distance, _path in members],
+        }
@@ -0,0 +1,337 @@
+import os
+import hashlib
+import sqlite3
+import threading
+import time
+
+from .control import stopped
+from .storage import user_data_dir
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    parent INTEGER,
+    mtime_ns INTEGER NOT NULL,
+    link INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs(parent);
+CREATE TABLE IF NOT EXISTS files (
+    dir INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    ext TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    PRIMARY KEY (dir, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Directories that could not be listed are stored with this mtime so the next
+# refresh always retries them and walks skip them, exactly like os.walk does.
+UNREADABLE = -1
+
+
+class FileIndex:
+    """SQLite filename index for one root folder, refreshed by directory mtime."""
+
+    def __init__(self, root, index_dir=None):
+        self.root = root
+        key = os.path.normcase(os.path.abspath(root))
+        digest = hashlib.sha1(key.encode("utf-8", "surrogatepass")).hexdigest()[:16]
+        self.db_path = os.path.join(index_dir or user_data_dir("index"), f"{digest}.sqlite3")
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.execute("INSERT OR IGNORE INTO meta(key, value) VALUES ('root', ?)", (root,))
+        self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        self.close()
+
+    # ------------------------------------------------------------------ STATE
+    def is_empty(self):
+        # A first build cut short leaves rows behind but no 'refreshed' stamp.
+        return self.last_refresh() is None
+
+    def last_refresh(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'refreshed'").fetchone()
+        return float(row[0]) if row else None
+
+    def stats(self):
+        dirs = self.conn.execute("SELECT COUNT(*) FROM dirs").fetchone()[0]
+        files = self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        return {"dirs": dirs, "files": files, "refreshed": self.last_refresh()}
+
+    def _full(self, rel):
+        return os.path.join(self.root, rel) if rel else self.root
+
+    def _relative(self, path):
+        try:
+            rel = os.path.relpath(path, self.root)
+        except ValueError:
+            return None
+        if rel == os.curdir:
+            return ""
+        if rel == os.pardir or rel.startswith(os.pardir + os.sep):
+            return None
+        return rel
+
+    # ------------------------------------------------------------------ REFRESH
+    def refresh(self, stop_event=None, progress=None):
+        """Bring the index up to date; returns the number of directories re-listed.
+
+        If ``stop_event`` stops it first, the folders listed so far are kept
+        but ``last_refresh`` is left alone and ``None`` is returned.
+        """
+        with self._lock:
+            cur = self.conn.cursor()
+            known = {}
+            children = {}
+            for dir_id, path, parent, mtime_ns, link in cur.execute(
+                "SELECT id, path, parent, mtime_ns, link FROM dirs"
+            ):
+                known[path] = (dir_id, mtime_ns)
+                if not link:
+                    children.setdefault(parent, []).append(path)
+
+            rescanned = 0
+            stack = [("", None)]
+            while stack:
+                if stopped(stop_event):
+                    self.conn.commit()
+                    return None
+                rel, parent_id = stack.pop()
+                full = self._full(rel)
+                try:
+                    mtime_ns = os.stat(full).st_mtime_ns
+                except OSError:
+                    mtime_ns = UNREADABLE
+
+                row = known.get(rel)
+                if row is not None and mtime_ns != UNREADABLE and row[1] == mtime_ns:
+                    stack.extend((child, row[0]) for child in children.get(row[0], ()))
+                    continue
+
+                if progress is not None:
+                    progress(full)
+                rescanned += 1
+                dir_id = self._rescan_dir(cur, rel, full, parent_id, row, mtime_ns, known)
+                for child in self._child_dirs(cur, dir_id):
+                    stack.append((child, dir_id))
+
+            cur.execute("INSERT OR REPLACE INTO meta(key, value) VALUES ('refreshed', ?)", (repr(time.time()),))
+            self.conn.commit()
+            return rescanned
+
+    def update(self, paths, progress=None):
+        """Re-list only the folders holding ``paths`` (files or folders that changed).
+
+        A path whose folder is not indexed yet is traced to its nearest indexed
+        ancestor, and new sub-folders met on the way are listed too. Returns the
+        re-listed folders as paths relative to the root.
+        """
+        with self._lock:
+            cur = self.conn.cursor()
+            known = {}
+            links = set()
+            for dir_id, path, mtime_ns, link in cur.execute("SELECT id, path, mtime_ns, link FROM dirs"):
+                known[path] = (dir_id, mtime_ns)
+                if link:
+                    links.add(path)
+
+            targets = set()
+            for path in paths:
+                rel = self._relative(path)
+                if rel:
+                    rel = self._relative(os.path.dirname(path))
+                while rel is not None and rel not in known:
+                    rel = os.path.dirname(rel) if rel else None
+                if rel is not None and rel not in links:
+                    targets.add(rel)
+
+            relisted = []
+            done = set()
+            stack = sorted(targets, reverse=True)
+            while stack:
+                rel = stack.pop()
+                row = known.get(rel)
+                # Skip folders dropped along with a parent listed earlier.
+                if row is None or rel in done:
+                    continue
+                done.add(rel)
+                full = self._full(rel)
+                try:
+                    mtime_ns = os.stat(full).st_mtime_ns
+                except OSError:
+                    mtime_ns = UNREADABLE
+                if progress is not None:
+                    progress(full)
+                relisted.append(rel)
+                dir_id = self._rescan_dir(cur, rel, full, None, row, mtime_ns, known)
+                stack.extend(child for child in self._child_dirs(cur, dir_id) if known[child][1] == UNREADABLE)
+
+            if relisted:
+                cur.execute("INSERT OR REPLACE INTO meta(key, value) VALUES ('refreshed', ?)", (repr(time.time()),))
+            self.conn.commit()
+            return relisted
+
+    def _rescan_dir(self, cur, rel, full, parent_id, row, mtime_ns, known):
+        file_rows = []
+        sub_dirs = {}
+        if mtime_ns != UNREADABLE:
+            try:
+                with os.scandir(full) as it:
+                    for entry in it:
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            is_dir = False
+                        if is_dir:
+                            try:
+                                sub_dirs[entry.name] = entry.is_symlink()
+                            except OSError:
+                                sub_dirs[entry.name] = False
+                            continue
+                        try:
+                            st = entry.stat()
+                            size, f_mtime = st.st_size, st.st_mtime_ns
+                        except OSError:
+                            size, f_mtime = 0, 0
+                        file_rows.append((entry.name, os.path.splitext(entry.name)[1].lower(), size, f_mtime))
+            except OSError:
+                mtime_ns = UNREADABLE
+
+        if row is None:
+            cur.execute(
+                "INSERT INTO dirs(path, parent, mtime_ns) VALUES (?, ?, ?)",
+                (rel, parent_id, mtime_ns),
+            )
+            dir_id = cur.lastrowid
+        else:
+            dir_id = row[0]
+            cur.execute("UPDATE dirs SET mtime_ns = ? WHERE id = ?", (mtime_ns, dir_id))
+        known[rel] = (dir_id, mtime_ns)
+
+        cur.execute("DELETE FROM files WHERE dir = ?", (dir_id,))
+        cur.executemany(
+            "INSERT OR REPLACE INTO files(dir, name, ext, size, mtime_ns) VALUES (?, ?, ?, ?, ?)",
+            ((dir_id, name, ext, size, f_mtime) for name, ext, size, f_mtime in file_rows),
+        )
+
+        existing = {
+            os.path.basename(path): (child_id, link)
+            for child_id, path, link in cur.execute("SELECT id, path, link FROM dirs WHERE parent = ?", (dir_id,))
+        }
+        for name, (child_id, link) in existing.items():
+            if name not in sub_dirs or bool(link) != sub_dirs[name]:
+                self._drop_subtree(cur, os.path.join(rel, name) if rel else name, known)
+        for name, is_link in sub_dirs.items():
+            child_rel = os.path.join(rel, name) if rel else name
+            if child_rel in known:
+                continue
+            # New directories get a placeholder mtime so the refresh loop lists them.
+            cur.execute(
+                "INSERT INTO dirs(path, parent, mtime_ns, link) VALUES (?, ?, ?, ?)",
+                (child_rel, dir_id, UNREADABLE, 1 if is_link else 0),
+            )
+            known[child_rel] = (cur.lastrowid, UNREADABLE)
+        return dir_id
+
+    def _child_dirs(self, cur, dir_id):
+        return [
+            path for (path,) in cur.execute("SELECT path FROM dirs WHERE parent = ? AND link = 0", (dir_id,))
+        ]
+
+    def _drop_subtree(self, cur, rel, known):
+        lo = rel + os.sep
+        hi = rel + chr(ord(os.sep) + 1)
+        ids = [
+            dir_id
+            for dir_id, path in cur.execute(
+                "SELECT id, path FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (rel, lo, hi)
+            )
+        ]
+        for dir_id in ids:
+            cur.execute("DELETE FROM files WHERE dir = ?", (dir_id,))
+            cur.execute("DELETE FROM dirs WHERE id = ?", (dir_id,))
+        for path in [p for p in known if p == rel or p.startswith(lo)]:
+            known.pop(path, None)
+
+    # ------------------------------------------------------------------ QUERY
+    def listed(self, rel):
+        """``(name, size, mtime_ns)`` rows of one indexed folder, or ``None`` if it is not listed."""
+        with self._lock:
+            row = self.conn.execute("SELECT id, mtime_ns FROM dirs WHERE path = ?", (rel,)).fetchone()
+            if row is None or row[1] == UNREADABLE:
+                return None
+            return self.conn.execute("SELECT name, size, mtime_ns FROM files WHERE dir = ?", (row[0],)).fetchall()
+
+    def listed_dirs(self):
+        """Relative paths of every folder a ``walk`` would visit."""
+        with self._lock:
+            rows = self.conn.execute("SELECT id, path, parent, mtime_ns, link FROM dirs").fetchall()
+        children = {}
+        for dir_id, path, parent, mtime_ns, link in rows:
+            if mtime_ns != UNREADABLE and not link:
+                children.setdefault(parent, []).append((dir_id, path))
+        listed = set()
+        stack = [(dir_id, path) for dir_id, path in children.get(None, ()) if path == ""]
+        while stack:
+            dir_id, path = stack.pop()
+            listed.add(path)
+            stack.extend(children.get(dir_id, ()))
+        return listed
+
+    def walk(self):
+        """Replay the indexed tree top-down like ``os.walk``.
+
+        Yields ``(root, level, dirs, files)`` where ``level`` is 0 for the
+        root, and ``files`` holds ``(name, size, mtime_ns)`` rows from the last
+        refresh. Callers may prune ``dirs`` in place to stop the walk descending.
+        """
+        with self._lock:
+            cur = self.conn.cursor()
+            rows = cur.execute("SELECT id, path, parent, mtime_ns, link FROM dirs").fetchall()
+
+        by_path = {}
+        children = {}
+        for dir_id, path, parent, mtime_ns, link in rows:
+            by_path[path] = (dir_id, mtime_ns, link)
+            children.setdefault(parent, []).append(path)
+
+        root_row = by_path.get("")
+        if root_row is None or root_row[1] == UNREADABLE:
+            return
+
+        stack = [("", 0)]
+        while stack:
+            rel, level = stack.pop()
+            dir_id, mtime_ns, _link = by_path[rel]
+            if mtime_ns == UNREADABLE:
+                continue
+            dirs = sorted(os.path.basename(p) for p in children.get(dir_id, ()))
+            with self._lock:
+                files = self.conn.execute(
+                    "SELECT name, size, mtime_ns FROM files WHERE dir = ?", (dir_id,)
+                ).fetchall()
+            yield self._full(rel), level, dirs, files
+            for name in reversed(dirs):
+                child_rel = os.path.join(rel, name) if rel else name
+                child = by_path.get(child_rel)
+                if child is None or child[2]:
+                    continue
+                stack.append((child_rel, level + 1))
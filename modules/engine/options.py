@@ -0,0 +1,80 @@
+from dataclasses import dataclass, field
+
+from .hashing import DEFAULT_ALGORITHM, default_workers
+
+
+DEFAULT_SYSTEM_SKIP_TOKENS = frozenset(
+    {
+        "\\windows",
+        "\\program files",
+        "\\program files (x86)",
+        "\\programdata",
+        "\\appdata",
+        "\\$recycle.bin",
+        "\\system volume information",
+    }
+)
+
+
+@dataclass
+class SearchFilters:
+    include_exts: set = field(default_factory=set)
+    excluded_folders: set = field(default_factory=set)
+    excluded_names: set = field(default_factory=set)
+    max_depth: int = None
+    use_index: bool = False
+    walk_workers: int = 1
+
+
+@dataclass
+class DuplicateOptions:
+    pattern: str = ""
+    excluded_folders: set = field(default_factory=lambda: {"git", "node_modules"})
+    excluded_names: set = field(default_factory=set)
+    skip_tokens: frozenset = DEFAULT_SYSTEM_SKIP_TOKENS
+    max_depth: int = None
+    walk_workers: int = 1
+    partial_size: int = 64 * 1024
+    algorithm: str = DEFAULT_ALGORITHM
+    workers: int = field(default_factory=default_workers)
+    use_processes: bool = False
+    max_inflight_bytes: int = 256 * 1024 * 1024
+    use_cache: bool = True
+    verify: bool = False
+    cache_path: str = None
+    similar_images: bool = False
+    image_hash: str = "phash"
+    max_distance: int = 8
+    similar_blocks: bool = False
+    chunk_size: int = 64 * 1024
+    min_shared: int = 50
+    block_min_size: int = 1024 * 1024
+
+
+@dataclass
+class ContentOptions:
+    regex: bool = False
+    case_sensitive: bool = False
+    max_file_size: int = 32 * 1024 * 1024
+    max_matches: int = 100
+    workers: int = field(default_factory=default_workers)
+    use_processes: bool = False
+    max_inflight_bytes: int = 256 * 1024 * 1024
+
+
+def parse_workers(value, default=1):
+    try:
+        return max(int(str(value).strip()), 1)
+    except ValueError:
+        return default
+
+
+def parse_max_depth(value):
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        depth = int(value)
+        return depth if depth >= 0 else None
+    except ValueError:
+        return None
@@ -0,0 +1,223 @@
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from .control import ScanControl, stopped
+
+DEFAULT_BATCH_SIZE = 256
+# A timer on the loop hands on whatever has been produced this often, so the first results show up quickly.
+DEFAULT_BATCH_INTERVAL = 0.05
+DEFAULT_QUEUE_BATCHES = 8
+_DONE = object()
+
+
+class ScanJob:
+    """One pipeline run: cancel or pause it, and drain its output from the UI thread."""
+
+    def __init__(self, name, max_batches):
+        self.name = name
+        self.control = ScanControl()
+        self.error = None
+        self._max_batches = max_batches
+        self._output = deque()
+        self._ready = threading.Condition()
+        self._finished = False
+        self._done = threading.Event()
+
+    def cancel(self):
+        self.control.set()
+
+    def pause(self):
+        self.control.pause()
+
+    def resume(self):
+        self.control.resume()
+
+    @property
+    def paused(self):
+        return self.control.paused
+
+    @property
+    def cancelled(self):
+        return self.control.is_set()
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def drain(self):
+        """Return ``(items, finished)``: every item ready so far, and whether the run has ended with nothing left."""
+        items = []
+        with self._ready:
+            while self._output:
+                items.extend(self._output.popleft())
+            finished = self._finished
+            self._ready.notify_all()
+        return items, finished
+
+    def _put(self, batch):
+        # Executor thread: wait while the consumer is ``max_batches`` behind.
+        with self._ready:
+            while len(self._output) >= self._max_batches and not self.control.is_set():
+                self._ready.wait(0.1)
+            if self.control.is_set():
+                return
+            self._output.append(batch)
+
+    def _fail(self, exc):
+        if self.error is None:
+            self.error = exc
+        self.control.set()
+
+    def _finish(self):
+        with self._ready:
+            self._finished = True
+        self._done.set()
+
+
+class _Pending:
+    # Items the producer thread has collected since the last flush.
+    __slots__ = ("items", "lock")
+
+    def __init__(self):
+        self.items = []
+        self.lock = threading.Lock()
+
+    def take(self):
+        with self.lock:
+            items, self.items = self.items, []
+        return items
+
+
+class ScanOrchestrator:
+    """Runs scan pipelines on an asyncio loop in a background thread.
+
+    A pipeline is a blocking ``source(control)`` iterable, usually an engine
+    generator given ``control`` as its ``stop_event``. The source runs in a
+    thread executor and its items are handed on in batches of ``batch_size``,
+    or every ``interval`` seconds by a timer on the loop, whichever comes
+    first, through an asyncio queue of ``queue_batches`` batches into the
+    job's output buffer, which is just as bounded. A full queue suspends the
+    source, so a consumer that drains slowly holds back the walk and hashing
+    rather than letting results pile up in memory. Starting a job under the
+    name of one still running cancels the older job.
+    """
+
+    def __init__(self, workers=None):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan")
+        self._loop = asyncio.new_event_loop()
+        self._jobs = {}
+        self._closed = False
+        self._thread = threading.Thread(target=self._loop.run_forever, name="scan-loop", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def run(
+        self,
+        name,
+        source,
+        batch_size=DEFAULT_BATCH_SIZE,
+        interval=DEFAULT_BATCH_INTERVAL,
+        queue_batches=DEFAULT_QUEUE_BATCHES,
+    ):
+        self.cancel(name)
+        job = ScanJob(name, max(int(queue_batches), 1))
+        self._jobs[name] = job
+        pipeline = self._pipeline(job, source, max(int(batch_size), 1), interval)
+        asyncio.run_coroutine_threadsafe(pipeline, self._loop)
+        return job
+
+    def job(self, name):
+        return self._jobs.get(name)
+
+    def cancel(self, name):
+        job = self._jobs.get(name)
+        if job is not None:
+            job.cancel()
+
+    def close(self):
+        self._closed = True
+        for job in list(self._jobs.values()):
+            job.cancel()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _pipeline(self, job, source, batch_size, interval):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(job._max_batches)
+        pending = _Pending()
+        # Every flush, from the timer or the producer, takes the pending items under this lock, so batches keep their order.
+        flushing = asyncio.Lock()
+
+        async def flush(done=False):
+            async with flushing:
+                items = pending.take()
+                if items:
+                    await queue.put(items)
+                if done:
+                    await queue.put(_DONE)
+
+        async def tick():
+            while True:
+                await asyncio.sleep(interval)
+                await flush()
+
+        timer = asyncio.ensure_future(tick())
+        try:
+            await asyncio.gather(
+                loop.run_in_executor(self._executor, self._produce, job, source, pending, flush, batch_size),
+                self._deliver(job, queue),
+            )
+        finally:
+            timer.cancel()
+        if self._jobs.get(job.name) is job:
+            del self._jobs[job.name]
+        job._finish()
+
+    def _produce(self, job, source, pending, flush, batch_size):
+        def hand_on(done=False):
+            future = asyncio.run_coroutine_threadsafe(flush(done), self._loop)
+            while True:
+                try:
+                    return future.result(0.1)
+                except FutureTimeout:
+                    if self._closed:
+                        future.cancel()
+                        return
+
+        try:
+            for item in source(job.control):
+                if stopped(job.control):
+                    break
+                with pending.lock:
+                    pending.items.append(item)
+                    full = len(pending.items) >= batch_size
+                if full:
+                    hand_on()
+        except Exception as exc:
+            job._fail(exc)
+        finally:
+            hand_on(done=True)
+
+    async def _deliver(self, job, queue):
+        # Once the job is cancelled, batches are drained and dropped so the producer never blocks.
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await queue.get()
+            if batch is _DONE:
+                break
+            if job.control.is_set():
+                continue
+            try:
+                await loop.run_in_executor(self._executor, job._put, batch)
+            except Exception as exc:
+                job._fail(exc)
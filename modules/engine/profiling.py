@@ -0,0 +1,248 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from .stats import format_size
+
+# Stages in report order; anything else a caller records is listed after them.
+STAGES = ("walk", "stat", "filter", "grep", "partial", "hash", "image", "chunk", "render", "sort")
+# Log2 buckets of microseconds: bucket ``i`` holds spans shorter than ``2**i`` µs.
+BUCKETS = 32
+
+
+def timed_call(func, *args):
+    """Return ``(func(*args), seconds)``; picklable, so process-pool jobs can be timed where they run."""
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+class StageTimer:
+    __slots__ = ("calls", "items", "nbytes", "seconds", "longest", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.items = 0
+        self.nbytes = 0
+        self.seconds = 0.0
+        self.longest = 0.0
+        self.buckets = [0] * BUCKETS
+
+    def add(self, seconds, items, nbytes):
+        self.calls += 1
+        self.items += items
+        self.nbytes += nbytes
+        self.seconds += seconds
+        if seconds > self.longest:
+            self.longest = seconds
+        self.buckets[min(int(seconds * 1_000_000).bit_length(), BUCKETS - 1)] += 1
+
+    def percentile(self, fraction):
+        """Upper bound in seconds of the histogram bucket holding the ``fraction`` quantile."""
+        target = fraction * self.calls
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return min((1 << index) / 1_000_000, self.longest)
+        return self.longest
+
+    def to_dict(self):
+        return {
+            "calls": self.calls,
+            "items": self.items,
+            "bytes": self.nbytes,
+            "seconds": self.seconds,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+            "max": self.longest,
+            "histogram_us": {str(1 << i): count for i, count in enumerate(self.buckets) if count},
+        }
+
+
+def _ms(seconds):
+    return f"{seconds * 1000:.2f}"
+
+
+class ScanProfiler:
+    """Opt-in timing spans, counters and histograms per scan stage.
+
+    Engine scans take it as ``profiler`` and record ``walk`` (waiting for
+    directory listings), ``stat``, ``filter`` and the hash or read stages;
+    the tools add ``render``. Spans from worker threads add up, so a stage's
+    total can exceed the wall time. With ``cpu`` the thread driving the scan
+    runs under ``cProfile`` (see ``capture`` and ``profiled``); with
+    ``memory`` ``tracemalloc`` runs from ``start`` to ``stop``. ``dump``
+    writes the report with ``.pstats`` and ``.snapshot`` files next to it.
+    """
+
+    def __init__(self, cpu=False, memory=False):
+        self.cpu = cpu
+        self.memory = memory
+        self.stages = {}
+        self.started = None
+        self.elapsed = 0.0
+        self.peak_memory = None
+        self.snapshot = None
+        self._lock = threading.Lock()
+        self._cpu_lock = threading.Lock()
+        self._cpu_profile = cProfile.Profile() if cpu else None
+        self._cpu_captured = False
+        self._traced = False
+
+    def start(self):
+        self.started = time.perf_counter()
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._traced = True
+        return self
+
+    def stop(self):
+        if self.started is not None:
+            self.elapsed = time.perf_counter() - self.started
+        if self.memory and tracemalloc.is_tracing():
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            self.snapshot = tracemalloc.take_snapshot().filter_traces(
+                (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap*"))
+            )
+            if self._traced:
+                tracemalloc.stop()
+                self._traced = False
+        return self
+
+    def add(self, stage, seconds, items=1, nbytes=0):
+        with self._lock:
+            timer = self.stages.get(stage)
+            if timer is None:
+                timer = self.stages[stage] = StageTimer()
+            timer.add(seconds, items, nbytes)
+
+    @contextmanager
+    def span(self, stage, items=1, nbytes=0):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started, items, nbytes)
+
+    def timed(self, stage, iterable, count=None):
+        """Yield from ``iterable``, recording the time spent in each ``next`` under ``stage``.
+
+        ``count(item)`` gives the items an element stands for (1 by default).
+        """
+        iterator = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.add(stage, time.perf_counter() - started, 1 if count is None else count(item))
+            yield item
+
+    def filter(self, accept, entries):
+        """Return the entries whose name passes ``accept``, recorded as one ``filter`` span."""
+        started = time.perf_counter()
+        matched = [entry for entry in entries if accept(entry.name)]
+        self.add("filter", time.perf_counter() - started, len(entries))
+        return matched
+
+    @contextmanager
+    def capture(self):
+        """Run the block under ``cProfile`` when ``cpu`` is on; one thread at a time, others run unprofiled."""
+        if self._cpu_profile is None or not self._cpu_lock.acquire(blocking=False):
+            yield
+            return
+        try:
+            self._cpu_profile.enable()
+        except ValueError:
+            # Another profiler (a debugger, an outer cProfile) already owns this thread.
+            self._cpu_lock.release()
+            yield
+            return
+        self._cpu_captured = True
+        try:
+            yield
+        finally:
+            self._cpu_profile.disable()
+            self._cpu_lock.release()
+
+    def profiled(self, iterable):
+        """Yield from ``iterable`` with each ``next`` under ``capture``, for generators resumed on pool threads."""
+        iterator = iter(iterable)
+        while True:
+            with self.capture():
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def to_dict(self):
+        ordered = [stage for stage in STAGES if stage in self.stages]
+        ordered += sorted(stage for stage in self.stages if stage not in STAGES)
+        return {
+            "elapsed": self.elapsed,
+            "peak_memory": self.peak_memory,
+            "stages": {stage: self.stages[stage].to_dict() for stage in ordered},
+        }
+
+    def report(self, top=15):
+        data = self.to_dict()
+        lines = [f"Scan report · {data['elapsed']:.2f}s wall"]
+        if data["stages"]:
+            lines.append(
+                f"{'stage':<8} {'calls':>8} {'items':>10} {'total s':>9} {'share':>6} "
+                f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>9} {'MB/s':>8}"
+            )
+        for stage, timer in data["stages"].items():
+            share = f"{timer['seconds'] / data['elapsed'] * 100:.0f}%" if data["elapsed"] else "-"
+            rate = "-"
+            if timer["bytes"] and timer["seconds"]:
+                rate = f"{timer['bytes'] / (1024 * 1024) / timer['seconds']:.1f}"
+            lines.append(
+                f"{stage:<8} {timer['calls']:>8} {timer['items']:>10} {timer['seconds']:>9.3f} {share:>6} "
+                f"{_ms(timer['p50']):>8} {_ms(timer['p90']):>8} {_ms(timer['p99']):>8} {_ms(timer['max']):>9} {rate:>8}"
+            )
+        if sum(timer["seconds"] for timer in data["stages"].values()) > data["elapsed"]:
+            lines.append("Stages on worker threads overlap, so shares can add up to more than 100%.")
+        if self._cpu_captured:
+            stream = io.StringIO()
+            pstats.Stats(self._cpu_profile, stream=stream).strip_dirs().sort_stats("cumulative").print_stats(top)
+            lines.append("")
+            lines.append("CPU profile of the scanning thread (cumulative):")
+            lines.extend(line for line in stream.getvalue().splitlines() if line.strip())
+        if self.snapshot is not None:
+            lines.append("")
+            lines.append(f"Memory: peak {format_size(self.peak_memory)} traced; largest allocation sites still held:")
+            for statistic in self.snapshot.statistics("lineno")[:10]:
+                frame = statistic.traceback[0]
+                lines.append(
+                    f"  {format_size(statistic.size):>10}  {statistic.count:>8} block(s)  "
+                    f"{os.path.basename(frame.filename)}:{frame.lineno}"
+                )
+        return "\n".join(lines)
+
+    def dump(self, folder, name=None):
+        """Write ``<name>.txt`` and ``.json`` (plus ``.pstats`` / ``.snapshot`` when captured); returns the paths."""
+        os.makedirs(folder, exist_ok=True)
+        base = os.path.join(folder, name or time.strftime("scan-%Y%m%d-%H%M%S"))
+        paths = [base + ".txt", base + ".json"]
+        with open(paths[0], "w", encoding="utf-8") as f:
+            f.write(self.report() + "\n")
+        with open(paths[1], "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        if self._cpu_captured:
+            paths.append(base + ".pstats")
+            self._cpu_profile.dump_stats(paths[-1])
+        if self.snapshot is not None:
+            paths.append(base + ".snapshot")
+            self.snapshot.dump(paths[-1])
+        return paths
@@ -0,0 +1,152 @@
+import threading
+import time
+from dataclasses import dataclass
+
+from .stats import format_size
+
+STAGE_LABELS = {
+    "walk": "Scanning",
+    "index": "Building index",
+    "grep": "Searching contents",
+    "compare": "Comparing candidates",
+    "partial": "Partial hashing",
+    "hash": "Full hashing",
+    "image": "Hashing images",
+    "chunk": "Chunking files",
+    "verify": "Verifying copies",
+    "done": "Done",
+}
+
+
+@dataclass
+class ProgressSnapshot:
+    stage: str
+    path: str
+    elapsed: float
+    dirs: int
+    files: int
+    matches: int
+    hashed_files: int
+    hashed_bytes: int
+    dirs_per_sec: float
+    files_per_sec: float
+    bytes_per_sec: float
+    eta: float = None
+
+    def describe(self):
+        parts = [STAGE_LABELS.get(self.stage, self.stage.title())]
+        if self.stage in ("partial", "hash", "image", "chunk", "verify"):
+            parts.append(f"{self.hashed_files} file(s), {format_size(self.hashed_bytes)} ({format_size(self.bytes_per_sec)}/s)")
+            if self.eta is not None:
+                parts.append(f"ETA {format_duration(self.eta)}")
+        else:
+            parts.append(f"{self.dirs} folder(s) ({self.dirs_per_sec:.0f}/s)")
+            parts.append(f"{self.files} file(s) ({self.files_per_sec:.0f}/s)")
+            if self.stage == "grep":
+                parts.append(f"{format_size(self.hashed_bytes)} read ({format_size(self.bytes_per_sec)}/s)")
+        if self.matches:
+            parts.append(f"{self.matches} match(es)")
+        text = " · ".join(parts)
+        return f"{text} · {self.path}" if self.path else text
+
+
+def format_duration(seconds):
+    seconds = int(max(seconds, 0))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m"
+
+
+class ProgressReporter:
+    """Thread-safe scan counters that consumers sample at their own rate.
+
+    The engine only bumps counters; nothing is pushed to the UI per file or
+    per directory. Tk frames poll ``snapshot()`` from an ``after`` loop and
+    the CLI prints it from a ticker thread, so updates are coalesced to a
+    fixed rate however fast the scan runs.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._started = clock()
+        self.stage = "walk"
+        self.path = ""
+        self.dirs = 0
+        self.files = 0
+        self.matches = 0
+        self.hashed_files = 0
+        self.hashed_bytes = 0
+        self._stage_started = self._started
+        self._stage_bytes = 0
+        self._stage_done = 0
+        self._stage_total = None
+
+    def set_stage(self, stage, total_bytes=None):
+        with self._lock:
+            self.stage = stage
+            self.path = ""
+            self._stage_started = self._clock()
+            self._stage_bytes = 0
+            self._stage_done = 0
+            self._stage_total = total_bytes
+
+    def dir_visited(self, path, files=0):
+        with self._lock:
+            self.path = path
+            self.dirs += 1
+            self.files += files
+
+    def matched(self, count=1):
+        with self._lock:
+            self.matches += count
+
+    def hashed(self, path, nbytes, cached=False):
+        # Cached digests advance the stage (for the ETA) without counting as reads.
+        with self._lock:
+            self.path = path
+            self._stage_done += nbytes
+            if not cached:
+                self.hashed_files += 1
+                self.hashed_bytes += nbytes
+                self._stage_bytes += nbytes
+
+    def snapshot(self):
+        with self._lock:
+            now = self._clock()
+            elapsed = max(now - self._started, 1e-9)
+            stage_elapsed = max(now - self._stage_started, 1e-9)
+            bytes_per_sec = self._stage_bytes / stage_elapsed
+            eta = None
+            if self._stage_total is not None and bytes_per_sec > 0:
+                eta = max(self._stage_total - self._stage_done, 0) / bytes_per_sec
+            return ProgressSnapshot(
+                stage=self.stage,
+                path=self.path,
+                elapsed=elapsed,
+                dirs=self.dirs,
+                files=self.files,
+                matches=self.matches,
+                hashed_files=self.hashed_files,
+                hashed_bytes=self.hashed_bytes,
+                dirs_per_sec=self.dirs / elapsed,
+                files_per_sec=self.files / elapsed,
+                bytes_per_sec=bytes_per_sec,
+                eta=eta,
+            )
+
+
+def start_ticker(reporter, callback, interval=0.5):
+    """Call ``callback(reporter.snapshot())`` every ``interval`` seconds until the returned event is set."""
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            callback(reporter.snapshot())
+
+    threading.Thread(target=run, name="progress", daemon=True).start()
+    return stop
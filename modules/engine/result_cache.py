@@ -0,0 +1,121 @@
+import os
+from collections import OrderedDict
+
+from .filters import normalize_query
+from .options import SearchFilters
+from .stats import format_size
+from .walk import owning_root
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def search_key(roots, query, filters=None):
+    """Cache key of a name search: roots, normalised query, includes, exclusions, depth and index use."""
+    filters = filters or SearchFilters()
+    lowered_query, _wildcard = normalize_query(query)
+    return (
+        tuple(roots),
+        lowered_query,
+        frozenset(token.lower() for token in filters.include_exts),
+        frozenset(filters.excluded_folders),
+        frozenset(filters.excluded_names),
+        filters.max_depth,
+        # Index-served and walked results differ until the index is refreshed.
+        filters.use_index,
+    )
+
+
+def roots_signature(roots):
+    """Modified time of each root (``None`` when it cannot be read); take it before the walk starts."""
+    signature = []
+    for root in roots:
+        try:
+            signature.append(os.stat(root).st_mtime_ns)
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+class ResultCache:
+    """Recent search results kept in memory within ``max_bytes``, least recently used out first.
+
+    Values are stored with the byte size the caller reports and the
+    ``roots_signature`` taken when their search started; ``get`` drops an
+    entry once a root's modified time no longer matches. Only changes
+    directly inside a root move its time, so callers that see deeper changes
+    (a watcher, an index refresh) should ``invalidate`` the paths involved.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and entry[2] != roots_signature(key[0]):
+            self._drop(key)
+            self.invalidations += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, value, nbytes, signature=None):
+        """Store ``value``; returns ``False`` when it alone exceeds the budget."""
+        self._drop(key)
+        if nbytes > self.max_bytes:
+            return False
+        if signature is None:
+            signature = roots_signature(key[0])
+        self._entries[key] = (value, nbytes, signature)
+        self.nbytes += nbytes
+        self._evict()
+        return True
+
+    def resize(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def invalidate(self, paths):
+        """Drop every entry searching a root that contains one of ``paths``; returns how many went."""
+        paths = list(paths)
+        stale = [key for key in self._entries if any(owning_root(key[0], path) is not None for path in paths)]
+        for key in stale:
+            self._drop(key)
+        self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+    def describe(self):
+        return (
+            f"Result cache: {self.hits} hit(s), {self.misses} miss(es), "
+            f"{len(self._entries)} set(s) in {format_size(self.nbytes)} of {format_size(self.max_bytes)}"
+        )
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry[1]
+
+    def _evict(self):
+        while self.nbytes > self.max_bytes and self._entries:
+            _key, (_value, nbytes, _signature) = self._entries.popitem(last=False)
+            self.nbytes -= nbytes
+            self.evictions += 1
@@ -0,0 +1,501 @@
+import copy
+import os
+import sys
+from array import array
+
+
+class FolderTable:
+    """Interns folder paths so each distinct folder string is stored once."""
+
+    __slots__ = ("folders", "_ids")
+
+    def __init__(self):
+        self.folders = []
+        self._ids = {}
+
+    def __len__(self):
+        return len(self.folders)
+
+    def __getitem__(self, folder_id):
+        return self.folders[folder_id]
+
+    def intern(self, folder):
+        folder_id = self._ids.get(folder)
+        if folder_id is None:
+            folder_id = self._ids[folder] = len(self.folders)
+            self.folders.append(folder)
+        return folder_id
+
+    def lookup(self, paths, folders=()):
+        """Map ``paths`` (and every folder at or below ``folders``) onto interned ids.
+
+        Returns ``(names_by_id, dropped_ids)``: the file names to drop per
+        folder id, and the ids of folders whose files all go.
+        """
+        names_by_id = {}
+        for path in paths:
+            folder, name = os.path.split(path)
+            folder_id = self._ids.get(folder)
+            if folder_id is not None:
+                names_by_id.setdefault(folder_id, set()).add(name)
+        dropped = set()
+        if folders:
+            prefixes = tuple(os.path.join(folder, "") for folder in folders)
+            folders = set(folders)
+            for folder_id, folder in enumerate(self.folders):
+                if folder in folders or folder.startswith(prefixes):
+                    dropped.add(folder_id)
+        return names_by_id, dropped
+
+    def ranks(self):
+        """Return ``(lower_rank, exact_rank)`` arrays indexed by folder id.
+
+        Folders that differ only in case share a ``lower_rank``; ``exact_rank``
+        breaks those ties the way a plain string comparison would.
+        """
+        folders = self.folders
+        order = sorted(range(len(folders)), key=lambda f: (folders[f].lower(), folders[f]))
+        lower_rank = array("l", bytes(len(folders) * array("l").itemsize))
+        exact_rank = array("l", lower_rank)
+        rank = -1
+        previous = None
+        for position, folder_id in enumerate(order):
+            lowered = folders[folder_id].lower()
+            if lowered != previous:
+                rank += 1
+                previous = lowered
+            lower_rank[folder_id] = rank
+            exact_rank[folder_id] = position
+        return lower_rank, exact_rank
+
+
+class SearchResult:
+    """Read-only view of one row in a ``ResultStore``."""
+
+    __slots__ = ("_store", "index")
+
+    def __init__(self, store, index):
+        self._store = store
+        self.index = index
+
+    @property
+    def folder(self):
+        return self._store.folder(self.index)
+
+    @property
+    def name(self):
+        return self._store.names[self.index]
+
+    @property
+    def size(self):
+        return self._store.sizes[self.index]
+
+    @property
+    def ext(self):
+        return os.path.splitext(self.name)[1].lower()
+
+    @property
+    def parent(self):
+        return os.path.basename(self.folder)
+
+    @property
+    def path(self):
+        return self._store.path(self.index)
+
+    def as_dict(self):
+        return {
+            "folder": self.folder,
+            "parent": self.parent,
+            "name": self.name,
+            "ext": self.ext,
+            "size": self.size,
+            "path": self.path,
+        }
+
+
+class ContentHit(SearchResult):
+    """Read-only view of one matching line in a ``ContentStore``."""
+
+    __slots__ = ()
+
+    @property
+    def line(self):
+        return self._store.lines[self.index]
+
+    @property
+    def snippet(self):
+        return self._store.snippets[self.index]
+
+    def as_dict(self):
+        record = super().as_dict()
+        record["line"] = self.line
+        record["snippet"] = self.snippet
+        return record
+
+
+class ResultStore:
+    """Search results held column-wise instead of one dict per file.
+
+    Folders are interned in a ``FolderTable`` and referenced by integer id,
+    names sit in a list and sizes in an ``array``; ``ext``, ``parent`` and
+    ``path`` are derived when a row is read.
+    """
+
+    record_type = SearchResult
+
+    def __init__(self):
+        self.table = FolderTable()
+        self.folder_ids = array("l")
+        self.names = []
+        self.sizes = array("q")
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.names)
+        if not 0 <= index < len(self.names):
+            raise IndexError("result index out of range")
+        return self.record_type(self, index)
+
+    def __iter__(self):
+        for index in range(len(self.names)):
+            yield self.record_type(self, index)
+
+    def append(self, folder, name, size):
+        self.folder_ids.append(self.table.intern(folder))
+        self.names.append(name)
+        self.sizes.append(size)
+        return len(self.names) - 1
+
+    def folder(self, index):
+        return self.table.folders[self.folder_ids[index]]
+
+    def path(self, index):
+        return os.path.join(self.folder(index), self.names[index])
+
+    def page(self, start, count):
+        return [self.record_type(self, index) for index in range(start, min(start + count, len(self.names)))]
+
+    def nbytes(self):
+        """Approximate bytes held by the rows and their folder table."""
+        getsizeof = sys.getsizeof
+        return (
+            getsizeof(self.names)
+            + sum(map(getsizeof, self.names))
+            + sum(map(getsizeof, self.table.folders))
+            + self.folder_ids.itemsize * len(self.folder_ids)
+            + self.sizes.itemsize * len(self.sizes)
+        )
+
+    def subset(self, indices):
+        """Return a new store with the rows at ``indices``, in that order; the folder table is shared."""
+        store = copy.copy(self)
+        store._reorder(indices)
+        return store
+
+    def filter(self, predicate):
+        """Return an array of the indices whose row view satisfies ``predicate``."""
+        record = self.record_type
+        return array("l", (index for index in range(len(self.names)) if predicate(record(self, index))))
+
+    def discard(self, paths, folders=()):
+        """Drop the rows of ``paths`` and of everything under ``folders``; returns how many went."""
+        names_by_id, dropped = self.table.lookup(paths, folders)
+        if not names_by_id and not dropped:
+            return 0
+        folder_ids = self.folder_ids
+        names = self.names
+        kept = [
+            index
+            for index in range(len(names))
+            if folder_ids[index] not in dropped and names[index] not in names_by_id.get(folder_ids[index], ())
+        ]
+        removed = len(names) - len(kept)
+        if removed:
+            self._reorder(kept)
+        return removed
+
+    def sort(self):
+        """Reorder rows in place by folder, then name (case-insensitive), then path.
+
+        Matches ``sort_results`` on the equivalent dicts.
+        """
+        lower_rank, exact_rank = self.table.ranks()
+        folder_ids = self.folder_ids
+        names = self.names
+        order = sorted(
+            range(len(names)),
+            key=lambda i: (lower_rank[folder_ids[i]], names[i].lower(), exact_rank[folder_ids[i]], names[i]),
+        )
+        self._reorder(order)
+        return self
+
+    def _reorder(self, order):
+        folder_ids = self.folder_ids
+        names = self.names
+        sizes = self.sizes
+        self.folder_ids = array("l", (folder_ids[i] for i in order))
+        self.names = [names[i] for i in order]
+        self.sizes = array("q", (sizes[i] for i in order))
+
+
+class ContentStore(ResultStore):
+    """``ResultStore`` with one row per matching line plus line and snippet columns.
+
+    Sorting keeps each file's lines in the order they were found.
+    """
+
+    record_type = ContentHit
+
+    def __init__(self):
+        super().__init__()
+        self.lines = array("l")
+        self.snippets = []
+
+    def append(self, folder, name, size, line=0, snippet=""):
+        self.lines.append(line)
+        self.snippets.append(snippet)
+        return super().append(folder, name, size)
+
+    def nbytes(self):
+        getsizeof = sys.getsizeof
+        snippets = getsizeof(self.snippets) + sum(map(getsizeof, self.snippets))
+        return super().nbytes() + snippets + self.lines.itemsize * len(self.lines)
+
+    def _reorder(self, order):
+        super()._reorder(order)
+        lines = self.lines
+        snippets = self.snippets
+        self.lines = array("l", (lines[i] for i in order))
+        self.snippets = [snippets[i] for i in order]
+
+
+class DuplicateGroup:
+    """Read-only view of one set of identical files in a ``DuplicateStore``."""
+
+    __slots__ = ("_store", "index")
+
+    def __init__(self, store, index):
+        self._store = store
+        self.index = index
+
+    def __len__(self):
+        starts = self._store.starts
+        return starts[self.index + 1] - starts[self.index]
+
+    @property
+    def hash(self):
+        return self._store.hashes[self.index]
+
+    @property
+    def size(self):
+        return self._store.sizes[self.index]
+
+    @property
+    def name(self):
+        return self._store.names[self.index]
+
+    def path(self, position):
+        return self._store.path(self._store.starts[self.index] + position)
+
+    @property
+    def paths(self):
+        return [self.path(position) for position in range(len(self))]
+
+    def distance(self, position):
+        """Hamming distance from the group's first image (0 for byte-identical sets)."""
+        return self._store.distances[self._store.starts[self.index] + position]
+
+    @property
+    def max_distance(self):
+        starts = self._store.starts
+        return max(self._store.distances[starts[self.index] : starts[self.index + 1]], default=0)
+
+    def shared(self, position):
+        """Percent of content shared with the group's first file (100 for byte-identical sets)."""
+        return self._store.shared[self._store.starts[self.index] + position]
+
+    @property
+    def reclaimable(self):
+        return self._store.reclaimable[self.index]
+
+    @property
+    def wasted(self):
+        """Bytes held by every copy but one (``reclaimable`` for partial duplicates)."""
+        if self._store.partial:
+            return self.reclaimable
+        return self.size * max(len(self) - 1, 0)
+
+    def as_dict(self):
+        record = {"hash": self.hash, "name": self.name, "size": self.size, "paths": self.paths}
+        if self._store.scored:
+            record["distances"] = [self.distance(position) for position in range(len(self))]
+        if self._store.partial:
+            record["shared"] = [self.shared(position) for position in range(len(self))]
+            record["reclaimable"] = self.reclaimable
+        return record
+
+
+class DuplicateStore:
+    """Duplicate groups held column-wise over one shared folder table.
+
+    Every file of every group sits in the flat ``folder_ids`` / ``file_names``
+    columns; group ``g`` owns rows ``starts[g]:starts[g + 1]``. Similar-image
+    groups also fill the per-file ``distances`` column (``scored`` is set);
+    partial-duplicate groups fill ``shared`` per file and ``reclaimable`` per
+    group (``partial`` is set).
+    """
+
+    def __init__(self):
+        self.table = FolderTable()
+        self.hashes = []
+        self.names = []
+        self.sizes = array("q")
+        self.starts = array("l", [0])
+        self.folder_ids = array("l")
+        self.file_names = []
+        self.distances = array("b")
+        self.scored = False
+        self.shared = array("b")
+        self.reclaimable = array("q")
+        self.partial = False
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.hashes)
+        if not 0 <= index < len(self.hashes):
+            raise IndexError("group index out of range")
+        return DuplicateGroup(self, index)
+
+    def __iter__(self):
+        for index in range(len(self.hashes)):
+            yield DuplicateGroup(self, index)
+
+    def add(self, group):
+        """Store a ``find_duplicates`` (or similar-file) group dict and return its ``DuplicateGroup``."""
+        name = group["name"]
+        distances = group.get("distances")
+        if distances is not None:
+            self.scored = True
+            self.distances.extend(distances)
+        else:
+            self.distances.extend(bytes(len(group["paths"])))
+        shared = group.get("shared")
+        if shared is not None:
+            self.partial = True
+            self.shared.extend(shared)
+        else:
+            self.shared.extend([100] * len(group["paths"]))
+        self.reclaimable.append(group.get("reclaimable", 0))
+        for path in group["paths"]:
+            folder, base = os.path.split(path)
+            if base == name:
+                base = name
+            self.folder_ids.append(self.table.intern(folder))
+            self.file_names.append(base)
+        self.hashes.append(group["hash"])
+        self.names.append(name)
+        self.sizes.append(group["size"])
+        self.starts.append(len(self.file_names))
+        return DuplicateGroup(self, len(self.hashes) - 1)
+
+    def path(self, row):
+        return os.path.join(self.table.folders[self.folder_ids[row]], self.file_names[row])
+
+    def file_count(self):
+        return len(self.file_names)
+
+    def wasted_bytes(self):
+        return sum(group.wasted for group in self)
+
+    def remove_path(self, index, position):
+        row = self.starts[index] + position
+        del self.folder_ids[row]
+        del self.file_names[row]
+        del self.distances[row]
+        del self.shared[row]
+        starts = self.starts
+        for g in range(index + 1, len(starts)):
+            starts[g] -= 1
+
+    def remove(self, index):
+        first, end = self.starts[index], self.starts[index + 1]
+        del self.folder_ids[first:end]
+        del self.file_names[first:end]
+        del self.distances[first:end]
+        del self.shared[first:end]
+        del self.reclaimable[index]
+        del self.hashes[index]
+        del self.names[index]
+        del self.sizes[index]
+        starts = self.starts
+        del starts[index + 1]
+        for g in range(index + 1, len(starts)):
+            starts[g] -= end - first
+
+    def discard(self, paths, folders=()):
+        """Drop ``paths`` and everything under ``folders`` from their groups.
+
+        Groups left with fewer than two files are removed. Returns the
+        ``(group, remaining)`` changes from the last group to the first, with
+        ``remaining`` 0 for a removed group, so views can apply them in order.
+        """
+        names_by_id, dropped = self.table.lookup(paths, folders)
+        changes = []
+        if not names_by_id and not dropped:
+            return changes
+        for index in range(len(self.hashes) - 1, -1, -1):
+            first, end = self.starts[index], self.starts[index + 1]
+            gone = [
+                row - first
+                for row in range(first, end)
+                if self.folder_ids[row] in dropped
+                or self.file_names[row] in names_by_id.get(self.folder_ids[row], ())
+            ]
+            if not gone:
+                continue
+            if end - first - len(gone) < 2:
+                self.remove(index)
+                changes.append((index, 0))
+                continue
+            for position in reversed(gone):
+                self.remove_path(index, position)
+            changes.append((index, end - first - len(gone)))
+        return changes
+
+    def sort(self, by="name"):
+        """Order groups like ``sort_groups``: by name then first path, or by wasted bytes."""
+        starts = self.starts
+        if by == "wasted":
+            wasted = [group.wasted for group in self]
+            order = sorted(
+                range(len(self.hashes)), key=lambda g: (-wasted[g], self.names[g].lower(), self.path(starts[g]))
+            )
+        else:
+            order = sorted(range(len(self.hashes)), key=lambda g: (self.names[g].lower(), self.path(starts[g])))
+        folder_ids = array("l")
+        file_names = []
+        distances = array("b")
+        shared = array("b")
+        new_starts = array("l", [0])
+        for g in order:
+            folder_ids.extend(self.folder_ids[starts[g] : starts[g + 1]])
+            file_names.extend(self.file_names[starts[g] : starts[g + 1]])
+            distances.extend(self.distances[starts[g] : starts[g + 1]])
+            shared.extend(self.shared[starts[g] : starts[g + 1]])
+            new_starts.append(len(file_names))
+        self.hashes = [self.hashes[g] for g in order]
+        self.names = [self.names[g] for g in order]
+        self.sizes = array("q", (self.sizes[g] for g in order))
+        self.reclaimable = array("q", (self.reclaimable[g] for g in order))
+        self.starts = new_starts
+        self.folder_ids = folder_ids
+        self.file_names = file_names
+        self.distances = distances
+        self.shared = shared
+        return self
@@ -0,0 +1,87 @@
+from bisect import bisect_right
+from itertools import accumulate
+
+
+class GroupedRows:
+    """Flattens groups of children into the row numbers a list view scrolls over.
+
+    Each group contributes a header row plus, while open, one row per child.
+    Only per-group child counts are stored, so locating a row is a bisect over
+    cached offsets no matter how many children the groups hold.
+    """
+
+    def __init__(self, sizes=()):
+        self._sizes = list(sizes)
+        self._open = set()
+        self._starts = None
+
+    def __len__(self):
+        if not self._open:
+            return len(self._sizes)
+        return self._offsets()[-1]
+
+    @property
+    def group_count(self):
+        return len(self._sizes)
+
+    def size(self, group):
+        return self._sizes[group]
+
+    def set_sizes(self, sizes):
+        self._sizes = list(sizes)
+        self._open.clear()
+        self._starts = None
+
+    def append_group(self, size=0):
+        self._sizes.append(size)
+        self._starts = None
+        return len(self._sizes) - 1
+
+    def resize(self, group, size):
+        self._sizes[group] = size
+        if group in self._open:
+            self._starts = None
+
+    def grow(self, group, count=1):
+        self.resize(group, self._sizes[group] + count)
+
+    def remove_group(self, group):
+        del self._sizes[group]
+        self._open = {g if g < group else g - 1 for g in self._open if g != group}
+        self._starts = None
+
+    def is_open(self, group):
+        return group in self._open
+
+    def set_open(self, group, flag):
+        if flag == (group in self._open):
+            return
+        if flag:
+            self._open.add(group)
+        else:
+            self._open.discard(group)
+        self._starts = None
+
+    def toggle(self, group):
+        self.set_open(group, group not in self._open)
+
+    def locate(self, row):
+        """Return ``(group, child)`` for a row; ``child`` is -1 on header rows."""
+        if not self._open:
+            return row, -1
+        starts = self._offsets()
+        group = bisect_right(starts, row) - 1
+        return group, row - starts[group] - 1
+
+    def row_of(self, group, child=-1):
+        if not self._open:
+            return group
+        return self._offsets()[group] + 1 + child
+
+    def _offsets(self):
+        # starts[g] is the header row of group g; starts[-1] is the row count.
+        if self._starts is None:
+            is_open = self._open
+            heights = (1 + size if g in is_open else 1 for g, size in enumerate(self._sizes))
+            self._starts = [0, *accumulate(heights)]
+        return self._starts
@@ -0,0 +1,227 @@
+import os
+import stat
+import sys
+from array import array
+from itertools import compress, repeat
+from operator import contains
+from time import perf_counter
+
+from .control import stopped
+from .filters import SearchMatcher, normalize_query
+from .options import SearchFilters
+from .trigram import load_name_index
+from .walk import folder_level, owning_root, walk_roots, within_depth
+
+
+def search(roots, query, filters=None, progress=None, stop_event=None, profiler=None):
+    """Yield a result dict for every file under ``roots`` whose name matches ``query``.
+
+    ``progress`` is an optional ``ProgressReporter`` that receives the
+    directory, file and match counts as the walk goes; ``profiler`` an
+    optional ``ScanProfiler`` that times the walk, filter and stat stages.
+    Results are produced in walk order (completion order when
+    ``filters.walk_workers > 1``); ``sort_results`` gives a stable order.
+    """
+    for folder, name, size in search_matches(roots, query, filters, progress, stop_event, profiler):
+        yield make_result(folder, name, size)
+
+
+def search_matches(roots, query, filters=None, progress=None, stop_event=None, profiler=None):
+    """Like ``search`` but yield bare ``(folder, name, size)`` tuples.
+
+    Suited to feeding a ``ResultStore`` without building a dict per match.
+    """
+    for root, entry in iter_candidates(roots, query, filters, progress, stop_event, profiler=profiler):
+        started = profiler is not None and perf_counter()
+        try:
+            size = entry.stat().st_size
+        except OSError:
+            size = 0
+        if profiler is not None:
+            profiler.add("stat", perf_counter() - started)
+        if progress is not None:
+            progress.matched()
+        yield root, entry.name, size
+
+
+def iter_candidates(roots, query, filters=None, progress=None, stop_event=None, stage="walk", profiler=None):
+    """Yield ``(root, entry)`` for every file that passes the name query and ``filters``.
+
+    ``progress`` sees the walk under ``stage`` (``"index"`` while an index
+    is being built); matches are left for the caller to count. With
+    ``filters.use_index`` the query is answered from each root's trigram
+    ``NameIndex`` instead of replaying the whole indexed tree.
+    """
+    filters = filters or SearchFilters()
+    folder_tokens = set(filters.excluded_folders)
+    on_build = None
+    if progress is not None:
+
+        def on_build(_path):
+            progress.set_stage("index")
+
+        progress.set_stage(stage)
+
+    if filters.use_index:
+        for root_folder in roots:
+            if stopped(stop_event):
+                return
+            started = perf_counter()
+            names = load_name_index(root_folder, on_build)
+            if profiler is not None:
+                profiler.add("walk", perf_counter() - started, len(names))
+            if progress is not None:
+                if progress.stage == "index":
+                    progress.set_stage(stage)
+                progress.dir_visited(root_folder, len(names))
+            candidates = names.search(query, filters, stop_event)
+            yield from candidates if profiler is None else profiler.timed("filter", candidates)
+        return
+
+    matcher = SearchMatcher(query, filters.include_exts, folder_tokens, filters.excluded_names)
+
+    walk = walk_roots(
+        roots,
+        filters.max_depth,
+        folder_tokens,
+        workers=filters.walk_workers,
+        stop_event=stop_event,
+    )
+    if profiler is not None:
+        walk = profiler.timed("walk", walk, lambda listing: len(listing[2]))
+    for root, _dirs, files in walk:
+        if stopped(stop_event):
+            return
+        if progress is not None:
+            progress.dir_visited(root, len(files))
+        accept = matcher.for_folder(root)
+        if accept is None:
+            continue
+        if profiler is not None:
+            for entry in profiler.filter(accept, files):
+                yield root, entry
+            continue
+        for entry in files:
+            if accept(entry.name):
+                yield root, entry
+
+
+def match_paths(paths, roots, query, filters=None):
+    """Yield ``(folder, name, size)`` for the files among ``paths`` a search of ``roots`` would return.
+
+    Used to re-check files a watcher reports as created or modified; paths
+    that are gone, outside ``roots`` or not regular files are skipped.
+    """
+    filters = filters or SearchFilters()
+    matcher = SearchMatcher(query, filters.include_exts, set(filters.excluded_folders), filters.excluded_names)
+    accepts = {}
+    for path in paths:
+        folder, name = os.path.split(path)
+        accept = accepts.get(folder, False)
+        if accept is False:
+            accept = accepts[folder] = _folder_accept(matcher, roots, folder, filters.max_depth)
+        if accept is None or not accept(name):
+            continue
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if stat.S_ISREG(st.st_mode):
+            yield folder, name, st.st_size
+
+
+def _folder_accept(matcher, roots, folder, max_depth):
+    root = owning_root(roots, folder)
+    if root is None or not within_depth(folder_level(root, folder), max_depth):
+        return None
+    return matcher.for_folder(folder)
+
+
+class ResultRefiner:
+    """Answers a narrower follow-up to a finished name search from its results.
+
+    ``covers`` tells whether every match of a new search is already in
+    ``store``: same roots and index setting, a plain query that contains this
+    one (or the same query), and include, exclusion and depth rules at least
+    as strict. ``refine`` then filters ``store`` in memory instead of walking
+    again; a query that only grew is a substring test over the lowered names,
+    which each refined result passes on to the next.
+    """
+
+    def __init__(self, roots, query, filters, store, lowered=None):
+        self.roots = list(roots)
+        self.query, self.wildcard = normalize_query(query)
+        self.filters = filters or SearchFilters()
+        self.store = store
+        self._lowered = lowered if lowered is not None else [name.lower() for name in store.names]
+
+    def covers(self, roots, query, filters=None):
+        filters = filters or SearchFilters()
+        base = self.filters
+        text, wildcard = normalize_query(query)
+        if list(roots) != self.roots or filters.use_index != base.use_index:
+            return False
+        if text != self.query and (wildcard or self.wildcard or self.query not in text):
+            return False
+        # Includes are alternatives, so fewer of them narrow; exclusions and depth narrow the other way.
+        includes = {token.lower() for token in filters.include_exts}
+        if base.include_exts and not (includes and includes <= {token.lower() for token in base.include_exts}):
+            return False
+        if not (set(filters.excluded_folders) >= set(base.excluded_folders)):
+            return False
+        if not (set(filters.excluded_names) >= set(base.excluded_names)):
+            return False
+        return base.max_depth is None or (filters.max_depth is not None and filters.max_depth <= base.max_depth)
+
+    def nbytes(self):
+        lowered = self._lowered
+        return self.store.nbytes() + sys.getsizeof(lowered) + sum(map(sys.getsizeof, lowered))
+
+    def refine(self, query, filters=None):
+        """Return a ``ResultRefiner`` over the rows of ``store`` that still match; needs ``covers`` first."""
+        filters = filters or SearchFilters()
+        text, _wildcard = normalize_query(query)
+        lowered = self._lowered
+        if text != self.query:
+            rows = array("l", compress(range(len(lowered)), map(contains, lowered, repeat(text))))
+        else:
+            rows = range(len(lowered))
+        if filters != self.filters:
+            rows = self._recheck(rows, query, filters)
+        if len(rows) == len(lowered):
+            return ResultRefiner(self.roots, query, filters, self.store, lowered)
+        lowered = list(map(lowered.__getitem__, rows))
+        return ResultRefiner(self.roots, query, filters, self.store.subset(rows), lowered)
+
+    def _recheck(self, rows, query, filters):
+        matcher = SearchMatcher(query, filters.include_exts, set(filters.excluded_folders), filters.excluded_names)
+        store = self.store
+        folder_ids = store.folder_ids
+        names = store.names
+        folders = store.table.folders
+        accepts = {}
+        kept = array("l")
+        for row in rows:
+            folder_id = folder_ids[row]
+            accept = accepts.get(folder_id, False)
+            if accept is False:
+                accept = accepts[folder_id] = _folder_accept(matcher, self.roots, folders[folder_id], filters.max_depth)
+            if accept is not None and accept(names[row]):
+                kept.append(row)
+        return kept
+
+
+def make_result(folder, name, size):
+    return {
+        "folder": folder,
+        "parent": os.path.basename(folder),
+        "name": name,
+        "ext": os.path.splitext(name)[1].lower(),
+        "size": size,
+        "path": os.path.join(folder, name),
+    }
+
+
+def sort_results(results):
+    results.sort(key=lambda item: (item["folder"].lower(), item["name"].lower(), item["path"]))
+    return results
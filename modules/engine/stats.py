@@ -0,0 +1,60 @@
+from dataclasses import dataclass
+
+
+def format_size(num_bytes):
+    try:
+        num = int(num_bytes)
+    except (TypeError, ValueError):
+        return ""
+
+    for unit in ["B", "KB", "MB", "GB", "TB"]:
+        if num < 1024:
+            return f"{num:.0f} {unit}"
+        num /= 1024
+    return f"{num:.0f} PB"
+
+
+@dataclass
+class ScanStats:
+    files: int = 0
+    size_candidates: int = 0
+    candidate_bytes: int = 0
+    partial_files: int = 0
+    partial_bytes: int = 0
+    full_files: int = 0
+    full_bytes: int = 0
+    cache_hits: int = 0
+    images: int = 0
+    images_decoded: int = 0
+    chunked_files: int = 0
+    chunked_bytes: int = 0
+    chunks: int = 0
+
+    @property
+    def bytes_read(self):
+        return self.partial_bytes + self.full_bytes
+
+    @property
+    def bytes_saved(self):
+        # Relative to full-hashing every file that shares its size with another.
+        return max(self.candidate_bytes - self.bytes_read, 0)
+
+    def summary(self):
+        if self.chunked_files:
+            return (
+                f"Chunked: {self.chunked_files}/{self.files} files, {format_size(self.chunked_bytes)} read · "
+                f"{self.chunks} chunks"
+            )
+        if self.images:
+            return (
+                f"Images: {self.images}/{self.files} files · "
+                f"Decoded: {self.images_decoded} · "
+                f"Cache: {self.cache_hits} hits"
+            )
+        return (
+            f"Size: {self.size_candidates}/{self.files} candidates · "
+            f"Partial: {self.partial_files} files, {format_size(self.partial_bytes)} read · "
+            f"Full: {self.full_files} files, {format_size(self.full_bytes)} read · "
+            f"Cache: {self.cache_hits} hits · "
+            f"Saved {format_size(self.bytes_saved)}"
+        )
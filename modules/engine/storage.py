@@ -0,0 +1,10 @@
+import os
+
+
+def user_data_dir(*parts):
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_DATA_HOME")
+    if not base:
+        base = os.path.join(os.path.expanduser("~"), ".local", "share")
+    path = os.path.join(base, "SmartUtilityHub", *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,282 @@
+import os
+import threading
+from array import array
+
+from .control import stopped
+from .filters import SearchMatcher, compile_globs, normalize_query
+from .index import FileIndex
+from .walk import IndexedEntry, within_depth
+
+# Once the candidate set is this small, verifying names beats intersecting more lists.
+VERIFY_LIMIT = 2048
+# Only intersect with posting lists at most this many times the current candidate count.
+INTERSECT_RATIO = 16
+
+
+def trigrams(text):
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def literal_segments(pattern):
+    """Split an ``fnmatch`` pattern into the literal runs every match must contain.
+
+    ``*``, ``?`` and ``[...]`` classes end a run; an unterminated ``[`` is a
+    literal, as in ``fnmatch.translate``.
+    """
+    segments = []
+    current = []
+    i, n = 0, len(pattern)
+    while i < n:
+        ch = pattern[i]
+        i += 1
+        if ch in "*?":
+            segments.append("".join(current))
+            current = []
+        elif ch == "[":
+            j = i
+            if j < n and pattern[j] == "!":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            while j < n and pattern[j] != "]":
+                j += 1
+            if j >= n:
+                current.append(ch)
+            else:
+                segments.append("".join(current))
+                current = []
+                i = j + 1
+        else:
+            current.append(ch)
+    segments.append("".join(current))
+    return [s for s in segments if s]
+
+
+class TrigramIndex:
+    """Inverted trigram index over distinct lowered names.
+
+    ``match(query)`` returns the ids of names a File Search query accepts,
+    with the same substring / ``fnmatch`` semantics as ``SearchMatcher``.
+    Posting lists narrow the candidates first; every candidate is then
+    verified, so trigrams only ever speed things up. Queries without a
+    three-character literal run fall back to checking every name.
+    """
+
+    def __init__(self):
+        self.names = []
+        self._ids = {}
+        self.postings = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name):
+        lname = name.lower()
+        name_id = self._ids.get(lname)
+        if name_id is None:
+            name_id = self._ids[lname] = len(self.names)
+            self.names.append(lname)
+            postings = self.postings
+            for tri in trigrams(lname):
+                ids = postings.get(tri)
+                if ids is None:
+                    ids = postings[tri] = array("i")
+                ids.append(name_id)
+        return name_id
+
+    def candidates(self, lowered_query, use_wildcards):
+        """Return candidate name ids, or ``None`` when the query has no trigrams."""
+        segments = literal_segments(lowered_query) if use_wildcards else [lowered_query]
+        wanted = set()
+        for segment in segments:
+            wanted |= trigrams(segment)
+        if not wanted:
+            return None
+        lists = []
+        for tri in wanted:
+            ids = self.postings.get(tri)
+            if ids is None:
+                return []
+            lists.append(ids)
+        lists.sort(key=len)
+        result = lists[0]
+        for ids in lists[1:]:
+            if len(result) <= VERIFY_LIMIT or len(ids) > INTERSECT_RATIO * len(result):
+                break
+            result = set(result).intersection(ids)
+        return result
+
+    def match(self, query):
+        lowered_query, use_wildcards = normalize_query(query)
+        names = self.names
+        candidates = self.candidates(lowered_query, use_wildcards)
+        if candidates is None:
+            candidates = range(len(names))
+        if use_wildcards:
+            glob = compile_globs([lowered_query])
+            return sorted(i for i in candidates if glob.match(names[i]))
+        return sorted(i for i in candidates if lowered_query in names[i])
+
+
+class NameIndex:
+    """In-memory snapshot of a ``FileIndex`` with a ``TrigramIndex`` over its names.
+
+    Files are numbered in ``FileIndex.walk()`` order, so ``search`` yields
+    matches in the order an index walk would, and applies the same depth,
+    exclusion and include rules. ``patch`` folds in folders re-listed by
+    ``FileIndex.update``; their files then come last until the next rebuild.
+    """
+
+    def __init__(self, index):
+        self.root = index.root
+        self.refreshed = index.last_refresh()
+        self.trigrams = TrigramIndex()
+        self.dir_paths = []
+        self.dir_levels = array("i")
+        self.file_dirs = array("i")
+        self.file_names = []
+        self.file_sizes = array("q")
+        self.file_mtimes = array("q")
+        self.dead_dirs = set()
+        self._dir_ids = {}
+        self._extra_files = {}
+        name_ids = array("i")
+        for current_root, level, _dirs, rows in index.walk():
+            self._add_dir(current_root, level, rows, name_ids)
+        self._build_name_files(name_ids)
+
+    def _add_dir(self, path, level, rows, name_ids):
+        dir_id = len(self.dir_paths)
+        self.dir_paths.append(path)
+        self.dir_levels.append(level)
+        self._dir_ids[path] = dir_id
+        add = self.trigrams.add
+        for name, size, mtime_ns in rows:
+            name_ids.append(add(name))
+            self.file_dirs.append(dir_id)
+            self.file_names.append(name)
+            self.file_sizes.append(size)
+            self.file_mtimes.append(mtime_ns)
+
+    def __len__(self):
+        return len(self.file_names)
+
+    def _build_name_files(self, name_ids):
+        # name id -> file ids, as one flat array sliced by per-name offsets.
+        counts = array("i", bytes(4 * (len(self.trigrams) + 1)))
+        for name_id in name_ids:
+            counts[name_id + 1] += 1
+        for i in range(1, len(counts)):
+            counts[i] += counts[i - 1]
+        self.name_starts = array("i", counts)
+        fill = counts
+        files = array("i", bytes(4 * len(name_ids)))
+        for file_id, name_id in enumerate(name_ids):
+            files[fill[name_id]] = file_id
+            fill[name_id] += 1
+        self.name_files = files
+
+    def patch(self, index, folders):
+        """Replace the rows of ``folders`` (relative paths re-listed by ``index.update``)."""
+        first_file = len(self.file_names)
+        name_ids = array("i")
+        for rel in folders:
+            path = os.path.join(self.root, rel) if rel else self.root
+            old = self._dir_ids.pop(path, None)
+            if old is not None:
+                self.dead_dirs.add(old)
+            rows = index.listed(rel)
+            if rows is not None:
+                self._add_dir(path, rel.count(os.sep) + 1 if rel else 0, rows, name_ids)
+        # Sub-folders removed along with a re-listed parent.
+        listed = {os.path.join(self.root, rel) if rel else self.root for rel in index.listed_dirs()}
+        for path in [p for p in self._dir_ids if p not in listed]:
+            self.dead_dirs.add(self._dir_ids.pop(path))
+        extra = self._extra_files
+        for offset, name_id in enumerate(name_ids):
+            extra.setdefault(name_id, []).append(first_file + offset)
+
+    def file_ids(self, query):
+        starts = self.name_starts
+        files = self.name_files
+        built = len(starts) - 1
+        extra = self._extra_files
+        matched = []
+        for name_id in self.trigrams.match(query):
+            if name_id < built:
+                matched.extend(files[starts[name_id] : starts[name_id + 1]])
+            if extra:
+                matched.extend(extra.get(name_id, ()))
+        matched.sort()
+        return matched
+
+    def search(self, query, filters, stop_event=None):
+        """Yield ``(root, entry)`` like ``iter_candidates`` does for an index walk."""
+        max_depth = filters.max_depth
+        matcher = SearchMatcher(query, filters.include_exts, filters.excluded_folders, filters.excluded_names)
+        accepts = {}
+        for count, file_id in enumerate(self.file_ids(query)):
+            if count % 4096 == 0 and stopped(stop_event):
+                return
+            dir_id = self.file_dirs[file_id]
+            accept = accepts.get(dir_id, False)
+            if accept is False:
+                accept = accepts[dir_id] = self._folder_matcher(dir_id, matcher, max_depth)
+            name = self.file_names[file_id]
+            if accept is None or not accept(name):
+                continue
+            root = self.dir_paths[dir_id]
+            yield root, IndexedEntry(
+                name, os.path.join(root, name), self.file_sizes[file_id], self.file_mtimes[file_id]
+            )
+
+    def _folder_matcher(self, dir_id, matcher, max_depth):
+        # A walk only reaches a folder whose parent was shallow enough to
+        # descend; excluded ancestors are covered by the folder's own path.
+        if dir_id in self.dead_dirs or not within_depth(self.dir_levels[dir_id], max_depth):
+            return None
+        return matcher.for_folder(self.dir_paths[dir_id])
+
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+def load_name_index(root, on_build=None, index_dir=None):
+    """Return a cached ``NameIndex`` for ``root``, rebuilding it after each index refresh.
+
+    Builds the on-disk index first (calling ``on_build``) if it is empty.
+    """
+    with FileIndex(root, index_dir) as index:
+        if index.is_empty():
+            if on_build is not None:
+                on_build(root)
+            index.refresh()
+        with _snapshots_lock:
+            cached = _snapshots.get(index.db_path)
+            if cached is not None and cached.refreshed == index.last_refresh():
+                return cached
+            snapshot = NameIndex(index)
+            _snapshots[index.db_path] = snapshot
+            return snapshot
+
+
+def update_name_index(root, paths, index_dir=None):
+    """Apply changed ``paths`` to the filename index of ``root`` and to its cached ``NameIndex``.
+
+    Does nothing if ``root`` has no index yet. Returns the number of folders re-listed.
+    """
+    with FileIndex(root, index_dir) as index:
+        if index.is_empty():
+            return 0
+        with _snapshots_lock:
+            before = index.last_refresh()
+            folders = index.update(paths)
+            cached = _snapshots.get(index.db_path)
+            if cached is not None and folders:
+                if cached.refreshed == before:
+                    cached.patch(index, folders)
+                    cached.refreshed = index.last_refresh()
+                else:
+                    del _snapshots[index.db_path]
+        return len(folders)
@@ -0,0 +1,225 @@
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .control import stopped
+from .index import FileIndex
+
+# How long the parallel walker waits for a listing before re-checking the stop event.
+POLL_INTERVAL = 0.1
+
+
+class IndexedEntry:
+    """Stand-in for ``os.DirEntry`` built from an index row; ``stat()`` returns the recorded size and mtime."""
+
+    __slots__ = ("name", "path", "st_size", "st_mtime_ns")
+
+    def __init__(self, name, path, size, mtime_ns):
+        self.name = name
+        self.path = path
+        self.st_size = size
+        self.st_mtime_ns = mtime_ns
+
+    def stat(self):
+        return self
+
+    def is_dir(self):
+        return False
+
+
+def walk_depth(level):
+    # Depth as the original relpath-based check computed it: the root and its
+    # direct children both count as depth 0, grandchildren as 1, and so on.
+    return level - 1 if level > 1 else 0
+
+
+def within_depth(level, max_depth):
+    """True if a walk limited to ``max_depth`` lists a folder ``level`` steps below its root."""
+    return max_depth is None or level == 0 or walk_depth(level - 1) < max_depth
+
+
+def owning_root(roots, path):
+    """Return the innermost root in ``roots`` that contains ``path``, or ``None``."""
+    best = None
+    for root in roots:
+        if path == root or path.startswith(root.rstrip(os.sep) + os.sep):
+            if best is None or len(root) > len(best):
+                best = root
+    return best
+
+
+def folder_level(root, folder):
+    """Number of steps from ``root`` down to ``folder`` (0 for the root itself)."""
+    rel = os.path.relpath(folder, root)
+    return 0 if rel == os.curdir else rel.count(os.sep) + 1
+
+
+def _excluded(lowered_path, tokens):
+    for tok in tokens:
+        if tok in lowered_path:
+            return True
+    return False
+
+
+def _list_dir(path, prefetch_stat=False):
+    """List ``path`` into ``(dirs, dir_entries, files)``; ``None`` if it cannot be read.
+
+    With ``prefetch_stat`` each file entry is stat'ed here so the result is
+    cached on the entry before it reaches the consumer thread.
+    """
+    try:
+        scandir_it = os.scandir(path)
+    except OSError:
+        return None
+
+    dirs = []
+    dir_entries = {}
+    files = []
+    with scandir_it:
+        while True:
+            try:
+                entry = next(scandir_it)
+            except StopIteration:
+                break
+            except OSError:
+                break
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                dirs.append(entry.name)
+                dir_entries[entry.name] = entry
+            else:
+                if prefetch_stat:
+                    try:
+                        entry.stat()
+                    except OSError:
+                        pass
+                files.append(entry)
+    return dirs, dir_entries, files
+
+
+def _prune(dirs, dir_entries, level, max_depth, tokens):
+    if tokens and dirs:
+        dirs[:] = [d for d in dirs if not _excluded(dir_entries[d].path.lower(), tokens)]
+    if max_depth is not None and walk_depth(level) >= max_depth:
+        dirs[:] = []
+
+
+def _descend(dirs, dir_entries):
+    for name in dirs:
+        entry = dir_entries.get(name)
+        if entry is None:
+            continue
+        try:
+            if entry.is_symlink():
+                continue
+        except OSError:
+            continue
+        yield entry.path
+
+
+def scandir_walk(root_folder, max_depth=None, tokens=()):
+    """Top-down ``os.scandir`` walk yielding ``(root, dirs, files)``.
+
+    ``files`` are ``os.DirEntry`` objects, so sizes come from the entry's
+    cached stat instead of a second ``stat`` per path. Excluded folders and
+    anything past ``max_depth`` are pruned from ``dirs`` before the caller sees
+    them; callers may prune ``dirs`` further in place. Like ``os.walk``,
+    unreadable folders are skipped and symlinked folders are listed but not
+    followed.
+    """
+    stack = [(root_folder, 0)]
+    while stack:
+        current_root, level = stack.pop()
+        listing = _list_dir(current_root)
+        if listing is None:
+            continue
+        dirs, dir_entries, files = listing
+        _prune(dirs, dir_entries, level, max_depth, tokens)
+
+        yield current_root, dirs, files
+
+        children = list(_descend(dirs, dir_entries))
+        stack.extend((path, level + 1) for path in reversed(children))
+
+
+def parallel_walk(roots, max_depth=None, tokens=(), workers=4, stop_event=None):
+    """Walk several roots at once, listing directories on a thread pool.
+
+    Every directory listing (including the stat of its files) is an
+    independent task, so separate roots and the subtrees inside a large root
+    are read concurrently; this pays off when per-directory latency dominates,
+    as on network shares. Results are
+    merged into one stream in completion order with the same
+    ``(root, dirs, files)`` shape, pruning and depth rules as
+    ``scandir_walk``; sort the output if a stable order is needed.
+    """
+    if workers <= 1:
+        for root_folder in roots:
+            yield from scandir_walk(root_folder, max_depth, tokens)
+        return
+
+    pending = deque((root_folder, 0) for root_folder in reversed(list(roots)))
+    inflight = {}
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="walk")
+    try:
+        while pending or inflight:
+            if stopped(stop_event):
+                return
+            while pending and len(inflight) < workers * 2:
+                path, level = pending.pop()
+                inflight[executor.submit(_list_dir, path, True)] = (path, level)
+            done, _ = wait(inflight, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                current_root, level = inflight.pop(future)
+                listing = future.result()
+                if listing is None:
+                    continue
+                dirs, dir_entries, files = listing
+                _prune(dirs, dir_entries, level, max_depth, tokens)
+
+                yield current_root, dirs, files
+
+                children = list(_descend(dirs, dir_entries))
+                pending.extend((path, level + 1) for path in reversed(children))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def index_walk(root_folder, max_depth=None, tokens=(), on_build=None):
+    """Same contract as ``scandir_walk``, served from the on-disk ``FileIndex``."""
+    with FileIndex(root_folder) as index:
+        if index.is_empty():
+            if on_build is not None:
+                on_build(root_folder)
+            index.refresh()
+        for current_root, level, dirs, rows in index.walk():
+            if tokens and dirs:
+                dirs[:] = [d for d in dirs if not _excluded(os.path.join(current_root, d).lower(), tokens)]
+            if max_depth is not None and walk_depth(level) >= max_depth:
+                dirs[:] = []
+            files = [
+                IndexedEntry(name, os.path.join(current_root, name), size, mtime_ns) for name, size, mtime_ns in rows
+            ]
+            yield current_root, dirs, files
+
+
+def limited_walk(root_folder, max_depth, tokens, use_index=False, on_build=None):
+    if use_index:
+        return index_walk(root_folder, max_depth, tokens, on_build)
+    return scandir_walk(root_folder, max_depth, tokens)
+
+
+def walk_roots(roots, max_depth, tokens, use_index=False, on_build=None, workers=1, stop_event=None):
+    """Walk every root in ``roots`` as one ``(root, dirs, files)`` stream.
+
+    Live walks use ``parallel_walk`` when ``workers > 1``; index-backed walks
+    read from local SQLite files and stay sequential.
+    """
+    if use_index:
+        for root_folder in roots:
+            yield from index_walk(root_folder, max_depth, tokens, on_build)
+        return
+    yield from parallel_walk(roots, max_depth, tokens, workers, stop_event)
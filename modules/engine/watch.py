@@ -0,0 +1,452 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from .index import FileIndex
+from .trigram import update_name_index
+from .walk import owning_root
+
+CREATED = "created"
+DELETED = "deleted"
+MODIFIED = "modified"
+# Events were lost (e.g. the kernel queue overflowed); the root needs a full rescan.
+RESCAN = "rescan"
+
+DEFAULT_DEBOUNCE = 0.5
+DEFAULT_MAX_DELAY = 5.0
+DEFAULT_POLL_INTERVAL = 2.0
+MAX_BATCH = 10_000
+# Longest a backend read blocks, so stop requests are noticed promptly.
+READ_TIMEOUT = 0.25
+
+FileEvent = namedtuple("FileEvent", "kind path is_dir")
+Changes = namedtuple("Changes", "deleted deleted_dirs touched rescans")
+
+
+# ------------------------------------------------------------------ INOTIFY
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+    | IN_DONT_FOLLOW
+)
+EVENT_HEADER = struct.Struct("iIII")
+READ_SIZE = 64 * 1024
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    if not hasattr(libc, "inotify_init1"):
+        raise OSError(errno.ENOSYS, "libc has no inotify support")
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    return libc
+
+
+class InotifyBackend:
+    """Linux inotify through ``ctypes``: one watch per folder, added as folders appear.
+
+    Files found in a folder that was created or moved in are reported as
+    created, since they may predate its watch. Symlinked folders are not
+    followed, matching the walkers.
+    """
+
+    name = "inotify"
+
+    def __init__(self, roots):
+        self.roots = list(roots)
+        self._libc = _load_libc()
+        fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._fd = fd
+        self._paths = {}
+        try:
+            for root in self.roots:
+                self._watch_tree(root, None)
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _add_watch(self, path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                raise OSError(err, "inotify watch limit reached (raise fs.inotify.max_user_watches)")
+            # The folder vanished or cannot be read; a walk would skip it too.
+            return
+        self._paths[wd] = path
+
+    def _watch_tree(self, top, events):
+        stack = [top]
+        while stack:
+            path = stack.pop()
+            self._add_watch(path)
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                        except OSError:
+                            is_dir = False
+                        if is_dir:
+                            stack.append(entry.path)
+                        if events is not None:
+                            events.append(FileEvent(CREATED, entry.path, is_dir))
+            except OSError:
+                continue
+
+    def _unwatch_tree(self, top):
+        prefix = top + os.sep
+        for wd, path in list(self._paths.items()):
+            if path == top or path.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._paths[wd]
+
+    def read(self, timeout):
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self._fd, READ_SIZE)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            self._translate(wd, mask, name, events)
+        return events
+
+    def _translate(self, wd, mask, name, events):
+        if mask & IN_Q_OVERFLOW:
+            events.extend(FileEvent(RESCAN, root, True) for root in self.roots)
+            return
+        if mask & IN_IGNORED:
+            self._paths.pop(wd, None)
+            return
+        folder = self._paths.get(wd)
+        if folder is None:
+            return
+        if not name:
+            # Events on a watched folder itself arrive through its parent,
+            # except for the roots.
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF) and folder in self.roots:
+                events.append(FileEvent(DELETED, folder, True))
+            return
+        path = os.path.join(folder, name)
+        is_dir = bool(mask & IN_ISDIR)
+        if mask & (IN_CREATE | IN_MOVED_TO):
+            events.append(FileEvent(CREATED, path, is_dir))
+            if is_dir:
+                self._watch_tree(path, events)
+        elif mask & (IN_DELETE | IN_MOVED_FROM):
+            events.append(FileEvent(DELETED, path, is_dir))
+            if is_dir:
+                self._unwatch_tree(path)
+        elif not is_dir:
+            events.append(FileEvent(MODIFIED, path, False))
+
+
+# ------------------------------------------------------------------ POLLING
+_MISSING = object()
+
+
+class PollingBackend:
+    """Portable fallback that diffs a ``(size, mtime)`` snapshot of every file.
+
+    The interval stretches to at least four times the last snapshot's
+    duration, so large trees are never walked back to back.
+    """
+
+    name = "poll"
+
+    def __init__(self, roots, interval=DEFAULT_POLL_INTERVAL):
+        self.roots = list(roots)
+        self.interval = interval
+        self._state, elapsed = self._snapshot()
+        self._next = time.monotonic() + max(interval, 4 * elapsed)
+
+    def close(self):
+        self._state = {}
+
+    def _snapshot(self):
+        started = time.monotonic()
+        state = {}
+        for root in self.roots:
+            stack = [root]
+            while stack:
+                path = stack.pop()
+                try:
+                    with os.scandir(path) as it:
+                        for entry in it:
+                            try:
+                                if entry.is_dir(follow_symlinks=False):
+                                    state[entry.path] = None
+                                    stack.append(entry.path)
+                                else:
+                                    st = entry.stat(follow_symlinks=False)
+                                    state[entry.path] = (st.st_size, st.st_mtime_ns)
+                            except OSError:
+                                continue
+                except OSError:
+                    continue
+        return state, time.monotonic() - started
+
+    def read(self, timeout):
+        wait = self._next - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return []
+        if wait > 0:
+            time.sleep(wait)
+        old = self._state
+        new, elapsed = self._snapshot()
+        self._state = new
+        self._next = time.monotonic() + max(self.interval, 4 * elapsed)
+
+        events = []
+        # Folders map to None and files to (size, mtime_ns).
+        for path, before in old.items():
+            after = new.get(path, _MISSING)
+            if after is _MISSING or (after is None) != (before is None):
+                events.append(FileEvent(DELETED, path, before is None))
+        for path, after in new.items():
+            before = old.get(path, _MISSING)
+            if before is _MISSING or (after is None) != (before is None):
+                events.append(FileEvent(CREATED, path, after is None))
+            elif after is not None and after != before:
+                events.append(FileEvent(MODIFIED, path, False))
+        return events
+
+
+BACKENDS = {"inotify": InotifyBackend, "poll": PollingBackend}
+
+
+def available_watch_backends():
+    """Names usable as ``Watcher(backend=...)``, besides ``"auto"``."""
+    names = []
+    try:
+        _load_libc()
+        names.append("inotify")
+    except OSError:
+        pass
+    names.append("poll")
+    return names
+
+
+def open_backend(roots, backend="auto", poll_interval=DEFAULT_POLL_INTERVAL):
+    """Open ``backend`` over ``roots``; ``"auto"`` prefers inotify and falls back to polling."""
+    if backend == "poll":
+        return PollingBackend(roots, poll_interval)
+    if backend not in ("auto", "inotify"):
+        raise ValueError(f"unknown watch backend: {backend}")
+    try:
+        return InotifyBackend(roots)
+    except OSError:
+        if backend == "inotify":
+            raise
+        return PollingBackend(roots, poll_interval)
+
+
+# ------------------------------------------------------------------ BATCHING
+def coalesce(pending, event):
+    """Fold ``event`` into ``pending`` (keyed by path and kind of entry), keeping the net effect."""
+    key = (event.path, event.is_dir)
+    previous = pending.get(key)
+    if previous is None or event.kind == RESCAN:
+        pending[key] = event
+    elif previous.kind == RESCAN:
+        return
+    elif event.kind == DELETED:
+        if previous.kind == CREATED:
+            # Appeared and vanished within one batch.
+            del pending[key]
+        else:
+            pending[key] = event
+    elif previous.kind != CREATED:
+        # Modified, or deleted and then re-created: either way the old entry is stale.
+        pending[key] = event._replace(kind=MODIFIED)
+
+
+def split_batch(events):
+    """Sort a batch into ``Changes`` path sets.
+
+    ``deleted``: files gone; ``deleted_dirs``: folders gone or replaced, with
+    everything below them; ``touched``: files created or modified, to be
+    read again; ``rescans``: roots whose events were lost. Apply removals
+    before re-reading ``touched``.
+    """
+    deleted = set()
+    deleted_dirs = set()
+    touched = set()
+    rescans = set()
+    for event in events:
+        if event.kind == RESCAN:
+            rescans.add(event.path)
+        elif event.is_dir:
+            if event.kind != CREATED:
+                deleted_dirs.add(event.path)
+        elif event.kind == DELETED:
+            deleted.add(event.path)
+        else:
+            touched.add(event.path)
+    return Changes(deleted, deleted_dirs, touched, rescans)
+
+
+def update_indexes(roots, events, index_dir=None):
+    """Apply a batch to the filename index of each root in ``roots`` that has one.
+
+    Only the folders holding changed paths are re-listed; roots whose events
+    were lost get a full ``refresh``. Returns the number of folders re-read.
+    """
+    by_root = {}
+    rescans = set()
+    for event in events:
+        root = owning_root(roots, event.path)
+        if root is None:
+            continue
+        if event.kind == RESCAN:
+            rescans.add(root)
+        else:
+            by_root.setdefault(root, []).append(event.path)
+    relisted = 0
+    for root in rescans:
+        with FileIndex(root, index_dir) as index:
+            if not index.is_empty():
+                relisted += index.refresh()
+    for root, paths in by_root.items():
+        if root not in rescans:
+            relisted += update_name_index(root, paths, index_dir)
+    return relisted
+
+
+class Watcher:
+    """Watch ``roots`` on a daemon thread and pass debounced batches to ``on_batch``.
+
+    Events are coalesced per path; a batch is handed over once the tree has
+    been quiet for ``debounce`` seconds, or after ``max_delay`` seconds (or
+    ``MAX_BATCH`` paths) during a sustained burst such as a large copy.
+    ``on_batch`` runs on the watcher thread with a list of ``FileEvent``; if
+    it raises, ``on_error`` gets the exception and watching carries on.
+    """
+
+    def __init__(
+        self,
+        roots,
+        on_batch,
+        backend="auto",
+        debounce=DEFAULT_DEBOUNCE,
+        max_delay=DEFAULT_MAX_DELAY,
+        poll_interval=DEFAULT_POLL_INTERVAL,
+        on_error=None,
+    ):
+        self.roots = list(roots)
+        self.on_batch = on_batch
+        self.on_error = on_error
+        self.backend_name = backend
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.backend = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *_exc):
+        self.stop()
+
+    def start(self):
+        """Open the backend (raising ``OSError`` if it cannot) and start watching."""
+        self.backend = open_backend(self.roots, self.backend_name, self.poll_interval)
+        self.backend_name = self.backend.name
+        self._thread = threading.Thread(target=self._run, name="watch", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        pending = {}
+        first = last = 0.0
+        try:
+            while not self._stop.is_set():
+                timeout = READ_TIMEOUT
+                if pending:
+                    due = min(last + self.debounce, first + self.max_delay) - time.monotonic()
+                    timeout = min(max(due, 0.0), READ_TIMEOUT)
+                events = self.backend.read(timeout)
+                now = time.monotonic()
+                if events:
+                    if not pending:
+                        first = now
+                    last = now
+                    for event in events:
+                        coalesce(pending, event)
+                if pending and (
+                    now - last >= self.debounce or now - first >= self.max_delay or len(pending) >= MAX_BATCH
+                ):
+                    batch = list(pending.values())
+                    pending = {}
+                    if not self._stop.is_set():
+                        self._deliver(batch)
+        finally:
+            self.backend.close()
+
+    def _deliver(self, batch):
+        try:
+            self.on_batch(batch)
+        except Exception as exc:
+            if self.on_error is not None:
+                self.on_error(exc)
@@ -0,0 +1,37 @@
+import tkinter as tk
+import ttkbootstrap as ttk
+from ttkbootstrap.constants import *
+
+from modules.engine.storage import user_data_dir
+
+
+class ScanReport(ttk.Toplevel):
+    """Window showing a finished ``ScanProfiler`` report and where its files were written."""
+
+    def __init__(self, master, profiler, title="Scan Report"):
+        super().__init__(master)
+        self.title(title)
+        self.geometry("980x560")
+        try:
+            self.paths = profiler.dump(user_data_dir("profiles"))
+            saved = "Saved: " + "  ·  ".join(self.paths)
+        except OSError as exc:
+            self.paths = []
+            saved = f"Could not save the report files: {exc}"
+
+        body = ttk.Frame(self)
+        body.pack(fill=BOTH, expand=True, padx=10, pady=(10, 4))
+        text = tk.Text(body, wrap=NONE, font=("Consolas", 9))
+        yscroll = ttk.Scrollbar(body, orient=VERTICAL, command=text.yview)
+        xscroll = ttk.Scrollbar(body, orient=HORIZONTAL, command=text.xview)
+        text.configure(yscrollcommand=yscroll.set, xscrollcommand=xscroll.set)
+        yscroll.pack(side=RIGHT, fill=Y)
+        xscroll.pack(side=BOTTOM, fill=X)
+        text.pack(side=LEFT, fill=BOTH, expand=True)
+        text.insert("1.0", profiler.report())
+        text.configure(state=DISABLED)
+
+        footer = ttk.Frame(self)
+        footer.pack(fill=X, padx=10, pady=(0, 10))
+        ttk.Label(footer, text=saved, bootstyle="secondary", wraplength=820).pack(side=LEFT, fill=X, expand=True)
+        ttk.Button(footer, text="Close", command=self.destroy).pack(side=RIGHT)
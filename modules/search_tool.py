@@ -1,5 +1,4 @@
 import os
-import fnmatch
 import tkinter as tk
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
@@ -7,10 +6,42 @@ from tkinter import filedialog, messagebox
 import threading
 import subprocess
 import platform
+import re
+import sqlite3
+import time
+from array import array
+
+from modules.engine import (
+    ContentOptions,
+    ContentStore,
+    FileIndex,
+    ProgressReporter,
+    ResultCache,
+    ResultStore,
+    ScanOrchestrator,
+    ScanProfiler,
+    SearchFilters,
+    Watcher,
+    content_search,
+    parse_max_depth,
+    search_matches,
+)
+from modules.engine.content import compile_content_query, grep_paths
+from modules.engine.hashing import default_workers
+from modules.engine.options import parse_workers
+from modules.engine.filters import normalize_include_token
+from modules.engine.result_cache import DEFAULT_MAX_BYTES, roots_signature, search_key
+from modules.engine.rows import GroupedRows
+from modules.engine.search import ResultRefiner, match_paths
+from modules.engine.watch import split_batch, update_indexes
+from modules.scan_report import ScanReport
+from modules.virtual_tree import VirtualTree
 
 
 class SearchTool(ttk.Frame):
-    PAGE_SIZE = 50
+    RESULT_POLL_MS = 100
+    # Typing only waits this long when the new query needs a walk; refinements apply at once.
+    INSTANT_WALK_DELAY_MS = 300
 
     def __init__(self, master):
         super().__init__(master)
@@ -18,16 +49,42 @@ class SearchTool(ttk.Frame):
         self.exclusions = {"folders": set(), "names": set()}
         self.include_exts = set()
         self.folder_preset_vars = {}
-        self._all_results = []
-        self._render_index = 0
-        self.folder_nodes = {}
+        self._results = ResultStore()
+        self._group_ids = {}
+        self._group_folders = array("l")
+        self._members = []
+        self._rows = GroupedRows()
+        self._orchestrator = ScanOrchestrator()
+        self._search_job = None
+        self._search_quiet = False
+        self._refiners = []
+        self._instant_after = None
+        self._result_cache = ResultCache()
+        self._search_signature = None
+        self._search_started = 0.0
+        self._first_result_after = None
+        self._progress = ProgressReporter()
+        self._profiler = None
+        self._index_progress = None
+        self._last_search = None
+        self._watcher = None
         self._create_widgets()
 
+    def destroy(self):
+        # Cancels a running search so its executor threads do not hold up interpreter exit.
+        self._orchestrator.close()
+        self._stop_watch()
+        self._discard_profile()
+        super().destroy()
+
     # ------------------------------------------------------------------ UI SETUP
     def _create_widgets(self):
         ttk.Label(self, text="🔍 File Search", font=("Segoe UI", 12, "bold")).pack(pady=10)
 
         self.var_filters_open = tk.BooleanVar(value=False)
+        self.var_use_index = tk.BooleanVar(value=False)
+        self.var_content = tk.BooleanVar(value=False)
+        self.var_instant = tk.BooleanVar(value=False)
 
         top = ttk.Frame(self)
         top.pack(pady=5, fill=X)
@@ -38,6 +95,7 @@ class SearchTool(ttk.Frame):
         self.entry_query = ttk.Entry(top, width=36)
         self.entry_query.pack(side=LEFT, padx=5)
         self._set_placeholder(self.entry_query, "Search files, folders, settings…")
+        self.entry_query.bind("<KeyRelease>", lambda _event: self._on_query_change(), add="+")
 
         depth_row = ttk.Frame(top)
         depth_row.pack(side=LEFT, padx=6)
@@ -53,9 +111,46 @@ class SearchTool(ttk.Frame):
             command=self._toggle_filters,
         ).pack(side=LEFT, padx=5)
 
+        ttk.Checkbutton(
+            top,
+            text="Use index",
+            variable=self.var_use_index,
+            bootstyle="round-toggle",
+        ).pack(side=LEFT, padx=5)
+
+        ttk.Checkbutton(
+            top,
+            text="Search inside files",
+            variable=self.var_content,
+            bootstyle="round-toggle",
+        ).pack(side=LEFT, padx=5)
+
+        ttk.Checkbutton(
+            top,
+            text="Search as you type",
+            variable=self.var_instant,
+            bootstyle="round-toggle",
+            command=self._on_query_change,
+        ).pack(side=LEFT, padx=5)
+
         self.btn_search = ttk.Button(top, text="Search", bootstyle="success", command=self.start_search)
         self.btn_search.pack(side=LEFT, padx=5)
 
+        self.btn_stop = ttk.Button(
+            top, text="Stop", bootstyle="danger-outline", command=self.stop_search, state=DISABLED
+        )
+        self.btn_stop.pack(side=LEFT, padx=5)
+
+        self.btn_pause = ttk.Button(
+            top, text="Pause", bootstyle="secondary-outline", command=self.toggle_pause, state=DISABLED
+        )
+        self.btn_pause.pack(side=LEFT, padx=5)
+
+        self.btn_refresh_index = ttk.Button(
+            top, text="Refresh Index", bootstyle="secondary-outline", command=self.refresh_index
+        )
+        self.btn_refresh_index.pack(side=LEFT, padx=5)
+
         self.lbl_selected = ttk.Label(self, text="No folders selected", bootstyle="secondary")
         self.lbl_selected.pack(fill=X, padx=10, pady=4)
 
@@ -94,6 +189,50 @@ class SearchTool(ttk.Frame):
         self._set_placeholder(self.include_entry, ".csv or *.report")
         ttk.Button(include_entry_row, text="Add", command=self._add_include_ext).pack(side=LEFT, padx=6)
 
+        self.var_sort_results = tk.BooleanVar(value=True)
+        ttk.Checkbutton(
+            include_entry_row, text="Sort results when done", variable=self.var_sort_results
+        ).pack(side=LEFT, padx=(18, 0))
+
+        self.var_watch = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            include_entry_row, text="Keep results live", variable=self.var_watch, command=self._toggle_watch
+        ).pack(side=LEFT, padx=(18, 0))
+
+        ttk.Label(include_entry_row, text="Walk threads (for network drives):").pack(side=LEFT, padx=(18, 6))
+        self.walk_workers_var = tk.StringVar(value="1")
+        ttk.Entry(include_entry_row, textvariable=self.walk_workers_var, width=4).pack(side=LEFT)
+
+        ttk.Label(include_entry_row, text="Result cache (MB):").pack(side=LEFT, padx=(18, 6))
+        self.cache_mb_var = tk.StringVar(value=str(DEFAULT_MAX_BYTES // (1024 * 1024)))
+        ttk.Entry(include_entry_row, textvariable=self.cache_mb_var, width=6).pack(side=LEFT)
+
+        self.var_profile = tk.BooleanVar(value=False)
+        ttk.Checkbutton(include_entry_row, text="Profile searches", variable=self.var_profile).pack(
+            side=LEFT, padx=(18, 0)
+        )
+        # cProfile and tracemalloc slow the search several-fold, so they stay off the plain stage timing.
+        self.var_profile_cpu = tk.BooleanVar(value=False)
+        ttk.Checkbutton(include_entry_row, text="with cProfile", variable=self.var_profile_cpu).pack(side=LEFT, padx=4)
+        self.var_profile_memory = tk.BooleanVar(value=False)
+        ttk.Checkbutton(include_entry_row, text="with tracemalloc", variable=self.var_profile_memory).pack(
+            side=LEFT, padx=4
+        )
+
+        content_row = ttk.Frame(self.filters_frame)
+        content_row.pack(fill=X, pady=4, padx=10)
+        ttk.Label(content_row, text="Inside files:").pack(side=LEFT, padx=(0, 6))
+        self.var_content_regex = tk.BooleanVar(value=False)
+        ttk.Checkbutton(content_row, text="Regex", variable=self.var_content_regex).pack(side=LEFT, padx=4)
+        self.var_content_case = tk.BooleanVar(value=False)
+        ttk.Checkbutton(content_row, text="Match case", variable=self.var_content_case).pack(side=LEFT, padx=4)
+        ttk.Label(content_row, text="Skip files over (MB):").pack(side=LEFT, padx=(18, 6))
+        self.content_max_mb_var = tk.StringVar(value=str(ContentOptions.max_file_size // (1024 * 1024)))
+        ttk.Entry(content_row, textvariable=self.content_max_mb_var, width=6).pack(side=LEFT)
+        ttk.Label(content_row, text="Read threads:").pack(side=LEFT, padx=(18, 6))
+        self.content_workers_var = tk.StringVar(value=str(default_workers()))
+        ttk.Entry(content_row, textvariable=self.content_workers_var, width=4).pack(side=LEFT)
+
 
 
         self.chips_frame = ttk.Frame(self.filters_frame)
@@ -107,24 +246,18 @@ class SearchTool(ttk.Frame):
 
         cols = ("Folder", "Ext", "Size", "Location", "FullPath")
 
-        tree_frame = ttk.Frame(self)
-        tree_frame.pack(fill=BOTH, expand=True, padx=10, pady=5)
-
-        yscroll = ttk.Scrollbar(tree_frame, orient=VERTICAL)
-        yscroll.pack(side=RIGHT, fill=Y)
-
-        xscroll = ttk.Scrollbar(tree_frame, orient=HORIZONTAL)
-        xscroll.pack(side=BOTTOM, fill=X)
-
-        self.tree = ttk.Treeview(
-            tree_frame,
+        self.result_view = VirtualTree(
+            self,
             columns=cols,
-            show="tree",
-            selectmode="browse",
+            row_count=lambda: len(self._rows),
+            render_row=self._render_row,
+            on_activate=self._on_row_activate,
+            on_toggle=self._on_row_toggle,
             height=18,
-            yscrollcommand=yscroll.set,
-            xscrollcommand=xscroll.set,
         )
+        self.result_view.pack(fill=BOTH, expand=True, padx=10, pady=5)
+
+        self.tree = self.result_view.tree
         self.tree.heading("#0", text="Name")
         self.tree.column("#0", width=240, stretch=True, anchor="w")
         self.tree.heading("Folder", text="Folder")
@@ -138,18 +271,11 @@ class SearchTool(ttk.Frame):
         self.tree.heading("FullPath", text="")
         self.tree.column("FullPath", width=0, stretch=False)
         self.tree["displaycolumns"] = ("Folder", "Ext", "Size", "Location")
-        self.tree.pack(fill=BOTH, expand=True)
-        yscroll.config(command=self.tree.yview)
-        xscroll.config(command=self.tree.xview)
-        self.tree.bind("<Double-1>", lambda _e: self.open_file())
 
         btnrow = ttk.Frame(self)
         btnrow.pack(fill=X, padx=10, pady=(0, 8))
         ttk.Button(btnrow, text="Open File", command=self.open_file).pack(side=LEFT, padx=4)
         ttk.Button(btnrow, text="Open Folder", command=self.open_folder).pack(side=LEFT, padx=4)
-        self.btn_show_more = ttk.Button(btnrow, text="Show 50 more", bootstyle="secondary", command=self._show_more)
-        self.btn_show_more.pack(side=RIGHT)
-        self.btn_show_more.config(state=DISABLED)
 
     # ------------------------------------------------------------------ PLACEHOLDER
     def _set_placeholder(self, entry, text):
@@ -200,9 +326,7 @@ class SearchTool(ttk.Frame):
         placeholder = getattr(self.include_entry, "placeholder_text", "")
         if not value or value == placeholder.lower():
             return
-        if not value.startswith(".") and not value.startswith("*"):
-            value = "." + value
-        self.include_exts.add(value)
+        self.include_exts.add(normalize_include_token(value))
         self.include_entry.delete(0, tk.END)
         self._refresh_chips()
 
@@ -241,6 +365,7 @@ class SearchTool(ttk.Frame):
             make_chip(f"name: {pattern}", "names", pattern)
 
         self.lbl_filters_title.config(text=f"({count} applied)")
+        self._on_query_change()
 
     def _remove_chip(self, bucket, value):
         if bucket == "includes":
@@ -269,171 +394,484 @@ class SearchTool(ttk.Frame):
             self.lbl_selected.config(text="No folders selected")
 
     # ------------------------------------------------------------------ SEARCH
-    def start_search(self):
-        query = self.entry_query.get().strip()
-        placeholder = getattr(self.entry_query, "placeholder_text", "")
-        if not self.folder_paths or not query or query == placeholder:
-            messagebox.showwarning("Input Missing", "Please select folder(s) and enter search term.")
+    def start_search(self, quiet=False):
+        self._cancel_instant()
+        query = self._current_query()
+        if not self.folder_paths or not query:
+            if not quiet:
+                messagebox.showwarning("Input Missing", "Please select folder(s) and enter search term.")
+            return
+
+        filters = self._build_filters()
+        content_options = None
+        if self.var_content.get():
+            content_options = self._build_content_options()
+            try:
+                compile_content_query(query, content_options.regex, content_options.case_sensitive)
+            except re.error as exc:
+                messagebox.showerror("Invalid Pattern", f"Unable to search for this regular expression.\n{exc}")
+                return
+
+        self._result_cache.resize(self._get_cache_bytes())
+        if content_options is None and self._serve_cached(query, filters):
             return
 
-        lowered_query = query.lower()
-        use_wildcards = any(ch in lowered_query for ch in "*?")
+        self._stop_watch()
+        self._last_search = (list(self.folder_paths), query, filters, content_options)
+        self._search_quiet = quiet
+        self._refiners = []
+        self._search_signature = roots_signature(self.folder_paths)
+        self._search_started = time.perf_counter()
+        self._first_result_after = None
+        progress = self._progress = ProgressReporter()
+        self._discard_profile()
+        profiler = None
+        cpu, memory = self.var_profile_cpu.get(), self.var_profile_memory.get()
+        if self.var_profile.get() or cpu or memory:
+            profiler = self._profiler = ScanProfiler(cpu=cpu, memory=memory).start()
 
         self.lbl_status.config(text="Searching…")
         self.progress.start()
-        self._all_results.clear()
-        self._render_index = 0
-        self.folder_nodes.clear()
-        for child in self.tree.get_children():
-            self.tree.delete(child)
-
-        threading.Thread(
-            target=self._search_files_thread, args=(lowered_query, use_wildcards), daemon=True
-        ).start()
+        self.btn_stop.config(state=NORMAL)
+        self.btn_pause.config(state=NORMAL, text="Pause")
+        self._clear_results(content=content_options is not None)
+
+        # Runs under the same name as any search still streaming results, which cancels that one.
+        folders = list(self.folder_paths)
+        job = self._search_job = self._orchestrator.run(
+            "search",
+            lambda control: self._search_source(folders, query, filters, content_options, progress, profiler, control),
+        )
+        self.after(self.RESULT_POLL_MS, lambda: self._drain_results(job))
+
+    def _serve_cached(self, query, filters):
+        folders = list(self.folder_paths)
+        refiner = self._result_cache.get(search_key(folders, query, filters))
+        if refiner is None:
+            return False
+        # A walk still streaming results is superseded by the cached set.
+        if self._search_job is not None:
+            self._search_job.cancel()
+            self._search_job = None
+            self._end_search_ui()
+            self._discard_profile()
+        self._stop_watch()
+        self._last_search = (folders, query, filters, None)
+        self._refiners = [refiner]
+        self._results = refiner.store
+        self._regroup()
+        self.lbl_status.config(
+            text=f"Found {len(self._results)} matching file(s) from memory. {self._result_cache.describe()}."
+        )
+        if self.var_watch.get():
+            self._start_watch()
+        return True
 
-    def _search_files_thread(self, lowered_query, use_wildcards):
-        results = []
-
-        max_depth = self._get_max_depth()
-
-        include_filters = self._normalize_include_filters()
-
-        for base in self.folder_paths:
-            for root, dirs, files in os.walk(base):
-                self.after(0, lambda path=root: self.lbl_status.config(text=f"Searching… {path}"))
-                if max_depth is not None:
-                    rel = os.path.relpath(root, base)
-                    depth = 0 if rel == "." else rel.count(os.sep)
-                    if depth >= max_depth:
-                        dirs[:] = []
-
-                if self.exclusions["folders"]:
-                    dirs[:] = [
-                        d
-                        for d in dirs
-                        if not any(tok in os.path.join(root, d).lower() for tok in self.exclusions["folders"])
-                    ]
-                for fname in files:
-                    if not self._query_matches(fname, lowered_query, use_wildcards):
-                        continue
-                    if self._path_excluded(root, fname):
-                        continue
-                    if include_filters and not self._matches_includes(fname, include_filters):
-                        continue
-                    full_path = os.path.join(root, fname)
-                    try:
-                        size = os.path.getsize(full_path)
-                    except OSError:
-                        size = 0
-                    results.append(
-                        {
-                            "folder": root,
-                            "parent": os.path.basename(root),
-                            "name": fname,
-                            "ext": os.path.splitext(fname)[1].lower(),
-                            "size": size,
-                            "path": full_path,
-                        }
-                    )
-
-        results.sort(key=lambda item: (item["folder"].lower(), item["name"].lower()))
-        self.after(0, lambda: self._on_search_complete(results))
-
-    def _on_search_complete(self, results):
+    def _end_search_ui(self):
         self.progress.stop()
-        self._all_results = results
-        self._render_index = 0
-        self.folder_nodes.clear()
-        self._render_next_batch()
-        count = len(results)
-        self.lbl_status.config(text=f"Found {count} matching file(s).")
-        messagebox.showinfo("Search Complete", f"Found {count} matching file(s).")
+        self.btn_stop.config(state=DISABLED)
+        self.btn_pause.config(state=DISABLED, text="Pause")
 
-    # ------------------------------------------------------------------ RESULTS RENDERING
-    def _render_next_batch(self, batch=PAGE_SIZE):
-        if not self._all_results:
-            self.btn_show_more.config(state=DISABLED)
+    def _current_query(self):
+        query = self.entry_query.get().strip()
+        placeholder = getattr(self.entry_query, "placeholder_text", "")
+        return "" if query == placeholder else query
+
+    def stop_search(self):
+        if self._search_job is not None:
+            self._search_job.cancel()
+            self.btn_pause.config(state=DISABLED, text="Pause")
+            self.lbl_status.config(text="Stopping search…")
+
+    def toggle_pause(self):
+        job = self._search_job
+        if job is None:
             return
+        if job.paused:
+            job.resume()
+            self.btn_pause.config(text="Pause")
+        else:
+            job.pause()
+            self.btn_pause.config(text="Resume")
+
+    def _build_filters(self):
+        return SearchFilters(
+            include_exts=set(self.include_exts),
+            excluded_folders=set(self.exclusions["folders"]),
+            excluded_names=set(self.exclusions["names"]),
+            max_depth=self._get_max_depth(),
+            use_index=self.var_use_index.get(),
+            walk_workers=parse_workers(self.walk_workers_var.get()),
+        )
+
+    def _build_content_options(self):
+        try:
+            max_mb = max(float(self.content_max_mb_var.get().strip()), 0)
+        except ValueError:
+            max_mb = ContentOptions.max_file_size / (1024 * 1024)
+        return ContentOptions(
+            regex=self.var_content_regex.get(),
+            case_sensitive=self.var_content_case.get(),
+            max_file_size=int(max_mb * 1024 * 1024),
+            workers=parse_workers(self.content_workers_var.get(), default_workers()),
+        )
 
-        end = min(self._render_index + batch, len(self._all_results))
-        for item in self._all_results[self._render_index : end]:
-            folder = item["folder"]
-            node = self.folder_nodes.get(folder)
-            if not node:
-                basename = os.path.basename(folder) or folder
-                node = self.tree.insert(
-                    "",
-                    tk.END,
-                    text=basename,
-                    open=False,
-                    values=(folder, "", "", "", folder),
+    def _search_source(self, folders, query, filters, content_options, progress, profiler, control):
+        if content_options is None:
+            source = search_matches(folders, query, filters, progress=progress, stop_event=control, profiler=profiler)
+        else:
+            source = (
+                (folder, name, size, line, snippet)
+                for folder, name, size, hits in content_search(
+                    folders, query, filters, content_options, progress=progress, stop_event=control, profiler=profiler
                 )
-                self.folder_nodes[folder] = node
-
-            size_str = self._format_size(item["size"])
-            self.tree.insert(
-                node,
-                tk.END,
-                text=item["name"],
-                values=(item["folder"], item["ext"], size_str, item["parent"], item["path"]),
+                for line, snippet in hits
             )
+        # Each batch is pulled on whichever executor thread is free, so cProfile follows the pulls.
+        yield from source if profiler is None else profiler.profiled(source)
+
+    def _show_profile(self, profiler):
+        if profiler is not None:
+            profiler.stop()
+            ScanReport(self, profiler, "Search Report")
+
+    def _discard_profile(self):
+        # Stops tracemalloc for a profiled search that was superseded or closed before it finished.
+        if self._profiler is not None:
+            self._profiler.stop()
+            self._profiler = None
+
+    def _drain_results(self, job):
+        if job is not self._search_job:
+            return
+        if not self.winfo_exists():
+            job.cancel()
+            return
+
+        # Taking a batch frees room in the job's bounded buffer; until then the search waits.
+        items, finished = job.drain()
+        render_started = time.perf_counter()
+        start = len(self._results)
+        append = self._results.append
+        for item in items:
+            append(*item)
+        if self._first_result_after is None and self._results:
+            self._first_result_after = time.perf_counter() - self._search_started
+
+        if len(self._results) > start:
+            # Keep the selected row pinned while open folders above it grow.
+            selected = self._selected_location()
+            self._add_results(start)
+            if selected:
+                self.result_view.selected_row = self._rows.row_of(*selected)
+            self.result_view.refresh()
+        if self._profiler is not None and items:
+            self._profiler.add("render", time.perf_counter() - render_started, len(items))
+
+        if finished:
+            self._on_search_complete(job)
+            return
+        if job.cancelled:
+            self.lbl_status.config(text="Stopping search…")
+        elif job.paused:
+            self.lbl_status.config(text=f"Paused · {self._progress.snapshot().describe()}")
+        else:
+            self.lbl_status.config(text=self._progress.snapshot().describe())
+        self.after(self.RESULT_POLL_MS, lambda: self._drain_results(job))
+
+    def _on_search_complete(self, job):
+        self._end_search_ui()
+        self._search_job = None
+        profiler, self._profiler = self._profiler, None
+        if job.error is not None:
+            self._show_profile(profiler)
+            self.lbl_status.config(text="Search failed.")
+            messagebox.showerror("Search Failed", f"The search stopped with an error.\n{job.error}")
+            return
+        if job.cancelled:
+            self._show_profile(profiler)
+            self.lbl_status.config(text=f"Search stopped after {len(self._results)} result(s).")
+            return
+        elapsed = time.perf_counter() - self._search_started
+        if self.var_sort_results.get() and self._results:
+            started = time.perf_counter()
+            self._results.sort()
+            self._regroup()
+            if profiler is not None:
+                profiler.add("sort", time.perf_counter() - started, len(self._results))
+        self._show_profile(profiler)
+        folders, query, filters, content_options = self._last_search
+        cache_status = ""
+        if content_options is None:
+            refiner = ResultRefiner(folders, query, filters, self._results)
+            self._refiners = [refiner]
+            key = search_key(folders, query, filters)
+            self._result_cache.put(key, refiner, refiner.nbytes(), self._search_signature)
+            cache_status = f" {self._result_cache.describe()}."
+        count = len(self._results)
+        timing = f" in {elapsed:.1f}s"
+        if self._first_result_after is not None:
+            timing += f" (first result after {self._first_result_after:.2f}s)"
+        if isinstance(self._results, ContentStore):
+            found = f"Found {count} matching line(s) in {self._progress.matches} file(s)"
+        else:
+            found = f"Found {count} matching file(s)"
+        self.lbl_status.config(text=f"{found}{timing}.{cache_status}")
+        if self.var_watch.get():
+            self._start_watch()
+        if not self._search_quiet:
+            messagebox.showinfo("Search Complete", f"{found}.")
+
+    # ------------------------------------------------------------------ INSTANT SEARCH
+    def _on_query_change(self):
+        # Key release in the query box, or a filter chip changed.
+        if not self.var_instant.get() or self.var_content.get():
+            return
+        self._cancel_instant()
+        query = self._current_query()
+        if not self.folder_paths or not query:
+            return
+        filters = self._build_filters()
+        if self._last_search is not None and self._last_search[1:] == (query, filters, None):
+            return
+        if self._refine(query, filters):
+            return
+        if search_key(self.folder_paths, query, filters) in self._result_cache:
+            self.start_search(quiet=True)
+        else:
+            self._instant_after = self.after(self.INSTANT_WALK_DELAY_MS, lambda: self.start_search(quiet=True))
+
+    def _cancel_instant(self):
+        if self._instant_after is not None:
+            self.after_cancel(self._instant_after)
+            self._instant_after = None
+
+    def _refine(self, query, filters):
+        """Narrow the current results in memory when ``query`` and ``filters`` only tighten a finished search."""
+        if self._search_job is not None:
+            return False
+        # The deepest refinement the new query still fits holds the fewest candidates; the ones above it go.
+        refiners = self._refiners
+        for depth in range(len(refiners) - 1, -1, -1):
+            if refiners[depth].covers(self.folder_paths, query, filters):
+                break
+        else:
+            return False
+        del refiners[depth + 1 :]
+        started = time.perf_counter()
+        refiner = refiners[-1].refine(query, filters)
+        refiners.append(refiner)
+        self._results = refiner.store
+        self._last_search = (list(self.folder_paths), query, filters, None)
+        self._regroup()
+        elapsed = (time.perf_counter() - started) * 1000
+        self.lbl_status.config(text=f"Found {len(self._results)} matching file(s), refined in {elapsed:.0f} ms.")
+        return True
+
+    # ------------------------------------------------------------------ LIVE UPDATES
+    def _toggle_watch(self):
+        if not self.var_watch.get():
+            self._stop_watch()
+        elif self._last_search is not None and self._search_job is None:
+            self._start_watch()
+
+    def _start_watch(self):
+        self._stop_watch()
+        watcher = Watcher(
+            self._last_search[0],
+            lambda events: self._on_watch_batch(watcher, events),
+            on_error=lambda exc: self.after(0, lambda: self._on_watch_error(watcher, exc)),
+        )
+        try:
+            watcher.start()
+        except OSError as exc:
+            self.var_watch.set(False)
+            messagebox.showerror("Keep Results Live", f"Unable to watch the selected folders.\n{exc}")
+            return
+        self._watcher = watcher
+
+    def _stop_watch(self):
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def _on_watch_batch(self, watcher, events):
+        # Runs on the watcher thread: bring the index up to date and re-check
+        # changed files here, then hand the rows to the UI thread.
+        search = self._last_search
+        folders, query, filters, content_options = search
+        changes = split_batch(events)
+        if filters.use_index:
+            update_indexes(folders, events)
+        if content_options is None:
+            rows = list(match_paths(changes.touched, folders, query, filters))
+        else:
+            rows = [
+                (folder, name, size, line, snippet)
+                for folder, name, size, hits in grep_paths(changes.touched, folders, query, filters, content_options)
+                for line, snippet in hits
+            ]
+        self.after(0, lambda: self._apply_watch_batch(watcher, search, changes, rows))
+
+    def _on_watch_error(self, watcher, exc):
+        # The watcher keeps running; only the failed batch is lost.
+        if watcher is self._watcher:
+            self.lbl_status.config(text=f"Keep results live: could not apply changes: {exc}")
+
+    def _apply_watch_batch(self, watcher, search, changes, rows):
+        if watcher is not self._watcher:
+            return
+        if search is not self._last_search:
+            # The query was refined while this batch was matched; only name searches refine.
+            folders, query, filters, _content_options = self._last_search
+            rows = list(match_paths(changes.touched, folders, query, filters))
+        removed = self._results.discard(changes.deleted | changes.touched, changes.deleted_dirs)
+        for row in rows:
+            self._results.append(*row)
+        if removed or rows:
+            if self.var_sort_results.get():
+                self._results.sort()
+            self._regroup(keep_position=True)
+        # Other cached and refined sets may hold the changed paths; only the live set is known to be current.
+        self._result_cache.invalidate(changes.deleted | changes.touched | changes.deleted_dirs | changes.rescans)
+        folders, query, filters, content_options = self._last_search
+        if content_options is None:
+            refiner = ResultRefiner(folders, query, filters, self._results)
+            self._refiners = [refiner]
+            if not changes.rescans:
+                self._result_cache.put(search_key(folders, query, filters), refiner, refiner.nbytes())
+        status = f"Watching for changes: {len(self._results)} result(s), updated {time.strftime('%H:%M:%S')}."
+        if changes.rescans:
+            status += " Some changes were missed; search again to catch up."
+        self.lbl_status.config(text=status)
+
+    # ------------------------------------------------------------------ INDEX
+    def refresh_index(self):
+        if not self.folder_paths:
+            messagebox.showwarning("Select Folder", "Please choose at least one folder first.")
+            return
+        self.btn_refresh_index.config(state=DISABLED)
+        self.lbl_status.config(text="Refreshing index…")
+        self.progress.start()
+        reporter = ProgressReporter()
+        reporter.set_stage("index")
+        self._index_progress = reporter
+        threading.Thread(
+            target=self._refresh_index_thread, args=(list(self.folder_paths), reporter), daemon=True
+        ).start()
+        self.after(self.RESULT_POLL_MS, lambda: self._poll_index_progress(reporter))
+
+    def _poll_index_progress(self, reporter):
+        if reporter is not self._index_progress:
+            return
+        self.lbl_status.config(text=reporter.snapshot().describe())
+        self.after(self.RESULT_POLL_MS, lambda: self._poll_index_progress(reporter))
+
+    def _refresh_index_thread(self, folders, reporter):
+        started = time.perf_counter()
+        rescanned = 0
+        files = 0
+        error = None
+        try:
+            for base in folders:
+                with FileIndex(base) as index:
+                    rescanned += index.refresh(progress=reporter.dir_visited)
+                    files += index.stats()["files"]
+        except (OSError, sqlite3.Error) as exc:
+            error = exc
+        elapsed = time.perf_counter() - started
+        self.after(0, lambda: self._on_refresh_complete(folders, rescanned, files, elapsed, error))
+
+    def _on_refresh_complete(self, folders, rescanned, files, elapsed, error=None):
+        self._index_progress = None
+        # A refresh that failed part-way may still have rewritten some folders.
+        self._result_cache.invalidate(folders)
+        self.progress.stop()
+        self.btn_refresh_index.config(state=NORMAL)
+        if error is not None:
+            self.lbl_status.config(text="Index refresh failed.")
+            messagebox.showerror("Refresh Failed", f"The filename index could not be refreshed.\n{error}")
+            return
+        self.lbl_status.config(
+            text=f"Index up to date: {files} file(s), {rescanned} folder(s) re-read in {elapsed:.1f}s."
+        )
 
-        self._render_index = end
-        if self._render_index >= len(self._all_results):
-            self.btn_show_more.config(state=DISABLED)
+    # ------------------------------------------------------------------ RESULTS RENDERING
+    def _clear_results(self, content=False):
+        self._results = ContentStore() if content else ResultStore()
+        self._reset_groups()
+        self.result_view.reset()
+
+    def _reset_groups(self):
+        self._group_ids = {}
+        self._group_folders = array("l")
+        self._members = []
+        self._rows = GroupedRows()
+
+    def _add_results(self, start):
+        # Results are grouped by folder id in arrival order; each group keeps
+        # only the indices of its files, never a widget item.
+        folder_ids = self._results.folder_ids
+        group_ids = self._group_ids
+        for idx in range(start, len(folder_ids)):
+            folder_id = folder_ids[idx]
+            group = group_ids.get(folder_id)
+            if group is None:
+                group = self._rows.append_group()
+                group_ids[folder_id] = group
+                self._group_folders.append(folder_id)
+                self._members.append(array("l"))
+            self._members[group].append(idx)
+            self._rows.grow(group)
+
+    def _regroup(self, keep_position=False):
+        # Folder ids survive a sort, so open folders stay open.
+        opened = [self._group_folders[g] for g in range(self._rows.group_count) if self._rows.is_open(g)]
+        self._reset_groups()
+        self._add_results(0)
+        for folder_id in opened:
+            group = self._group_ids.get(folder_id)
+            if group is not None:
+                self._rows.set_open(group, True)
+        if keep_position:
+            self.result_view.selected_row = None
+            self.result_view.refresh()
         else:
-            self.btn_show_more.config(state=NORMAL)
+            self.result_view.reset()
+
+    def _render_row(self, row):
+        group, child = self._rows.locate(row)
+        folder = self._results.table[self._group_folders[group]]
+        if child < 0:
+            marker = "▾" if self._rows.is_open(group) else "▸"
+            basename = os.path.basename(folder) or folder
+            return f"{marker} {basename}", (folder, "", "", "", folder)
+        item = self._results[self._members[group][child]]
+        size_str = self._format_size(item.size)
+        if isinstance(self._results, ContentStore):
+            return f"    {item.name}:{item.line}", (folder, item.ext, size_str, item.snippet, item.path)
+        return f"    {item.name}", (folder, item.ext, size_str, item.parent, item.path)
+
+    def _selected_location(self):
+        row = self.result_view.selected_row
+        if row is None or row >= len(self._rows):
+            return None
+        return self._rows.locate(row)
 
-    def _show_more(self):
-        if self._render_index < len(self._all_results):
-            self._render_next_batch()
+    def _on_row_activate(self, row):
+        group, child = self._rows.locate(row)
+        if child < 0:
+            self._on_row_toggle(row, not self._rows.is_open(group))
         else:
-            messagebox.showinfo("Results", "All results are already displayed.")
-
-    # ------------------------------------------------------------------ EXCLUSIONS
-    def _path_excluded(self, folder, name):
-        full_lower = os.path.join(folder, name).lower()
-        lname = name.lower()
-
-        for tok in self.exclusions["folders"]:
-            if tok in full_lower:
-                return True
-
-        for pattern in self.exclusions["names"]:
-            if fnmatch.fnmatch(lname, pattern):
-                return True
-
-        return False
-
-    def _query_matches(self, filename, lowered_query, use_wildcards):
-        lname = filename.lower()
-        if use_wildcards:
-            return fnmatch.fnmatch(lname, lowered_query)
-        return lowered_query in lname
-
-    def _normalize_include_filters(self):
-        if not self.include_exts:
-            return []
-
-        filters = []
-        for token in self.include_exts:
-            if token.startswith("*") or any(ch in token for ch in "*?"):
-                filters.append(("pattern", token.lower()))
-            elif token.startswith("."):
-                filters.append(("ext", token.lower()))
-            else:
-                filters.append(("ext", f".{token.lower()}"))
-        return filters
-
-    def _matches_includes(self, filename, filters):
-        lname = filename.lower()
-        ext = os.path.splitext(lname)[1]
-        for ftype, value in filters:
-            if ftype == "ext" and ext == value:
-                return True
-            if ftype == "pattern" and fnmatch.fnmatch(lname, value):
-                return True
-        return False
+            self.open_file()
+
+    def _on_row_toggle(self, row, expand):
+        group, child = self._rows.locate(row)
+        if child >= 0 and expand:
+            return
+        self._rows.set_open(group, expand)
+        self.result_view.selected_row = self._rows.row_of(group)
+        self.result_view.see(self.result_view.selected_row)
 
     # ------------------------------------------------------------------ UTILITIES
     def _format_size(self, num_bytes):
@@ -449,21 +887,14 @@ class SearchTool(ttk.Frame):
         return f"{num:.0f} PB"
 
     def _selected_path(self):
-        selection = self.tree.selection()
-        if not selection:
+        selected = self._selected_location()
+        if not selected:
             return None
-        node = selection[0]
-        # If a folder row is selected, use the folder path stored on the row.
-        path = self.tree.set(node, "FullPath")
-        if path:
-            return path
-        # Otherwise fall back to the parent folder path plus the file name.
-        parent = self.tree.parent(node)
-        if not parent:
-            return None
-        folder = self.tree.set(parent, "FullPath")
-        name = self.tree.item(node, "text")
-        return os.path.join(folder, name)
+        group, child = selected
+        # A folder row stands for the folder itself.
+        if child < 0:
+            return self._results.table[self._group_folders[group]]
+        return self._results.path(self._members[group][child])
 
     def open_file(self):
         path = self._selected_path()
@@ -491,12 +922,11 @@ class SearchTool(ttk.Frame):
                 subprocess.call(["open", folder])
         except Exception as exc:
             messagebox.showerror("Open Folder", f"Unable to open folder.\n{exc}")
-    def _get_max_depth(self):
-        value = self.max_depth_var.get().strip()
-        if not value:
-            return None
+    def _get_cache_bytes(self):
         try:
-            depth = int(value)
-            return depth if depth >= 0 else None
+            return int(max(float(self.cache_mb_var.get().strip()), 0) * 1024 * 1024)
         except ValueError:
-            return None
+            return DEFAULT_MAX_BYTES
+
+    def _get_max_depth(self):
+        return parse_max_depth(self.max_depth_var.get())
@@ -0,0 +1,171 @@
+import tkinter as tk
+import ttkbootstrap as ttk
+from ttkbootstrap.constants import *
+
+
+class VirtualTree(ttk.Frame):
+    """Treeview that only holds items for the rows currently on screen.
+
+    Rows are pulled on demand through ``row_count()`` and ``render_row(row)``,
+    which returns ``(text, values)``. The vertical scrollbar spans the full
+    row range, so memory and redraw cost depend on the window height rather
+    than on how many results exist.
+    """
+
+    WHEEL_ROWS = 3
+    DEFAULT_ROW_HEIGHT = 20
+
+    def __init__(self, master, columns, row_count, render_row, on_activate=None, on_toggle=None, **tree_options):
+        super().__init__(master)
+        self.row_count = row_count
+        self.render_row = render_row
+        self.on_activate = on_activate
+        self.on_toggle = on_toggle
+        self.top = 0
+        self.selected_row = None
+        self._slots = []
+        self._slot_index = {}
+        self._visible = 1
+
+        self.yscroll = ttk.Scrollbar(self, orient=VERTICAL, command=self._on_yscroll)
+        self.yscroll.pack(side=RIGHT, fill=Y)
+        xscroll = ttk.Scrollbar(self, orient=HORIZONTAL)
+        xscroll.pack(side=BOTTOM, fill=X)
+
+        self.tree = ttk.Treeview(
+            self,
+            columns=columns,
+            show="tree",
+            selectmode="browse",
+            xscrollcommand=xscroll.set,
+            **tree_options,
+        )
+        self.tree.pack(fill=BOTH, expand=True)
+        xscroll.config(command=self.tree.xview)
+
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda _e: self.scroll_rows(-self.WHEEL_ROWS))
+        self.tree.bind("<Button-5>", lambda _e: self.scroll_rows(self.WHEEL_ROWS))
+        self.tree.bind("<Double-1>", self._on_double_click)
+        self.tree.bind("<Return>", lambda _e: self._activate())
+        self.tree.bind("<Up>", lambda _e: self.move_selection(-1))
+        self.tree.bind("<Down>", lambda _e: self.move_selection(1))
+        self.tree.bind("<Prior>", lambda _e: self.move_selection(-self._visible))
+        self.tree.bind("<Next>", lambda _e: self.move_selection(self._visible))
+        self.tree.bind("<Home>", lambda _e: self.move_selection(-self.row_count()))
+        self.tree.bind("<End>", lambda _e: self.move_selection(self.row_count()))
+        self.tree.bind("<Left>", lambda _e: self._toggle(False))
+        self.tree.bind("<Right>", lambda _e: self._toggle(True))
+
+    # ------------------------------------------------------------------ RENDERING
+    def refresh(self):
+        total = self.row_count()
+        visible = self._visible
+        self.top = max(0, min(self.top, total - visible))
+        self._ensure_slots(min(visible, total - self.top))
+        for slot, iid in enumerate(self._slots):
+            text, values = self.render_row(self.top + slot)
+            self.tree.item(iid, text=text, values=values)
+        self._sync_selection()
+        if total <= visible:
+            self.yscroll.set(0.0, 1.0)
+        else:
+            self.yscroll.set(self.top / total, (self.top + visible) / total)
+
+    def reset(self):
+        self.top = 0
+        self.selected_row = None
+        self.refresh()
+
+    def see(self, row):
+        if row < self.top:
+            self.top = row
+        elif row >= self.top + self._visible:
+            self.top = row - self._visible + 1
+        self.refresh()
+
+    def scroll_rows(self, delta):
+        self.top += delta
+        self.refresh()
+        return "break"
+
+    def move_selection(self, delta):
+        total = self.row_count()
+        if not total:
+            return "break"
+        current = self.top if self.selected_row is None else self.selected_row
+        self.selected_row = max(0, min(current + delta, total - 1))
+        self.see(self.selected_row)
+        return "break"
+
+    def _ensure_slots(self, count):
+        count = max(count, 0)
+        while len(self._slots) < count:
+            iid = self.tree.insert("", tk.END, text="")
+            self._slot_index[iid] = len(self._slots)
+            self._slots.append(iid)
+        if len(self._slots) > count:
+            stale = self._slots[count:]
+            del self._slots[count:]
+            for iid in stale:
+                del self._slot_index[iid]
+            self.tree.delete(*stale)
+
+    def _sync_selection(self):
+        slot = None if self.selected_row is None else self.selected_row - self.top
+        if slot is not None and 0 <= slot < len(self._slots):
+            iid = self._slots[slot]
+            if self.tree.selection() != (iid,):
+                self.tree.selection_set(iid)
+            self.tree.focus(iid)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+
+    def _row_height(self):
+        try:
+            height = int(ttk.Style().lookup("Treeview", "rowheight"))
+        except (TypeError, ValueError, tk.TclError):
+            height = 0
+        return height or self.DEFAULT_ROW_HEIGHT
+
+    # ------------------------------------------------------------------ EVENTS
+    def _on_configure(self, event):
+        self._visible = max(1, event.height // self._row_height())
+        self.refresh()
+
+    def _on_yscroll(self, *args):
+        total = self.row_count()
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * total)
+        elif args[0] == "scroll":
+            step = int(args[1])
+            self.top += step * self._visible if args[2] == "pages" else step
+        self.refresh()
+
+    def _on_wheel(self, event):
+        return self.scroll_rows(-self.WHEEL_ROWS if event.delta > 0 else self.WHEEL_ROWS)
+
+    def _on_select(self, _event):
+        # Selections cleared because the row scrolled away keep the logical row.
+        selection = self.tree.selection()
+        if selection and selection[0] in self._slot_index:
+            self.selected_row = self.top + self._slot_index[selection[0]]
+
+    def _on_double_click(self, event):
+        iid = self.tree.identify_row(event.y)
+        if iid in self._slot_index:
+            self.selected_row = self.top + self._slot_index[iid]
+            self._activate()
+        return "break"
+
+    def _activate(self):
+        if self.on_activate and self.selected_row is not None:
+            self.on_activate(self.selected_row)
+        return "break"
+
+    def _toggle(self, expand):
+        if self.on_toggle and self.selected_row is not None:
+            self.on_toggle(self.selected_row, expand)
+        return "break"
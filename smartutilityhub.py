@@ -0,0 +1,9 @@
+import sys
+import multiprocessing
+
+from modules.cli import main
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())